@@ -1,29 +1,36 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import numpy as np
 
 # Importar módulos personalizados
+# Plotly e yfinance são importados só onde são usados (após os KPIs), para
+# reduzir o tempo até a primeira renderização (ver scripts/perfil_importacao.py)
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 # Importar sistema de autenticação simples
-from simple_auth import simple_auth
+from simple_auth import obter_autenticador
 from user_manager import get_user_data_manager
 
-from core.market_data import obter_indices, calcular_correlacao_carteira_mercado, obter_taxa_selic
-from core.carteira_health import analisar_saude_carteira, gerar_recomendacoes
-from core.news_analyzer import analisar_sentimento_carteira, buscar_noticias_mercado
-from core.benchmarks import simular_benchmark
-from core.carteira_loader import carregar_carteira_completa, carregar_carteira_csv
+import app_cache as cache
+import engine
+from app_progressivo import CargaProgressiva, Espaco
+from formatting import exibir_tabela, formatar_colunas, configurar_colunas
+from core.carteira_loader import carteira_simplificada, colunas_csv
+from core.carteira_cache import versao_carteira
+from core.snapshot_dashboard import (
+    carregar_snapshot, salvar_snapshot, atualizar_snapshot, entrada, valores_mercado,
+    resumo_metricas, rotulo_horario
+)
+from core.portfolio_metrics import PortfolioMetrics
+from core.metricas_incrementais import MetricasIncrementais
+from core.carteira_health import analisar_saude_valores
+from core.historico_precos import versao_historico
+from core.risco import MINIMO_PREGOES, vetor_risco
 from core.reinvestment_manager import (
-    calcular_reinvestimento, gerar_carteira_atualizada, 
-    salvar_carteira_atualizada, gerar_relatorio_reinvestimento,
-    calcular_distribuicao_reinvestimento
+    gerar_carteira_atualizada, salvar_carteira_atualizada, gerar_relatorio_reinvestimento
 )
 
 # -------------------------------------------------
@@ -31,6 +38,7 @@ from core.reinvestment_manager import (
 # -------------------------------------------------
 # Verificar se o usuário está autenticado
 try:
+    simple_auth = obter_autenticador()
     if not simple_auth.is_authenticated():
         simple_auth.render_login_page()
         st.stop()
@@ -290,115 +298,164 @@ atualizar_dados_auto = st.sidebar.checkbox(
 
 atualizar_mercado = st.sidebar.button("🔄 Atualizar Dados de Mercado", type="primary")
 
+renderizacao_progressiva = st.sidebar.checkbox(
+    "⚡ Renderização progressiva",
+    value=True,
+    help="Exibe KPIs, saúde e projeções imediatamente; dados de mercado aparecem conforme chegam"
+)
+
+# -------------------------------------------------
+# KPIs (placeholder: num processo recém-iniciado mostra o último snapshot
+# enquanto a carteira carrega)
+# -------------------------------------------------
+def render_kpis(valores: dict):
+    """Linha de KPIs a partir dos agregados da carteira (resumo_metricas)"""
+    st.markdown("### 📈 Indicadores Principais (KPIs)")
+
+    kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
+
+    with kpi1:
+        st.metric(
+            "💰 Patrimônio Total",
+            f"R$ {valores['patrimonio']:,.2f}",
+            help="Valor total investido na carteira"
+        )
+
+    with kpi2:
+        st.metric(
+            "📥 Renda Mensal",
+            f"R$ {valores['renda_mensal']:,.2f}",
+            help="Dividendos recebidos mensalmente"
+        )
+
+    with kpi3:
+        st.metric(
+            "📊 Yield Médio",
+            f"{valores['yield_medio']*100:.2f}%",
+            delta=f"{(valores['yield_medio']*100 - 1.0):.2f}% vs meta",
+            help="Rentabilidade média mensal da carteira"
+        )
+
+    with kpi4:
+        st.metric(
+            "📆 Renda Anual Projetada",
+            f"R$ {valores['renda_anual']:,.2f}",
+            help="Renda anual com base nos dividendos mensais"
+        )
+
+    with kpi5:
+        num_ativos = valores["num_ativos"]
+        st.metric(
+            "🎯 Número de Ativos",
+            f"{num_ativos}",
+            help="Quantidade de FIIs na carteira"
+        )
+
+
+snapshot = carregar_snapshot()
+espaco_kpis = Espaco()
+
 # -------------------------------------------------
 # LOAD CSV
 # -------------------------------------------------
 try:
     if uploaded_file is not None:
-        # Se foi feito upload, usar arquivo temporário
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-            tmp.write(uploaded_file.getvalue())
-            tmp_path = tmp.name
-        
-        if atualizar_dados_auto:
-            df = carregar_carteira_completa(tmp_path, atualizar_dados=True, usar_preco_medio=False)
-        else:
-            df_temp = pd.read_csv(tmp_path)
-            # Se CSV tem apenas Ticker e Quantidade, tentar usar loader automático
-            if set(df_temp.columns) <= {"Ticker", "Quantidade"}:
-                st.info("💡 CSV simplificado detectado. Ativando atualização automática de dados...")
-                df = carregar_carteira_completa(tmp_path, atualizar_dados=True, usar_preco_medio=False)
-            else:
-                df = df_temp
+        # Upload: processado direto da memória (sem arquivo temporário)
+        conteudo_carteira = uploaded_file.getvalue()
     else:
         # Usar arquivo padrão
-        if atualizar_dados_auto:
-            df = carregar_carteira_completa(carteira_path, atualizar_dados=True, usar_preco_medio=False)
-        else:
-            df_temp = pd.read_csv(carteira_path)
-            # Se CSV tem apenas Ticker e Quantidade, tentar usar loader automático
-            if set(df_temp.columns) <= {"Ticker", "Quantidade"}:
-                st.info("💡 CSV simplificado detectado. Ativando atualização automática de dados...")
-                df = carregar_carteira_completa(carteira_path, atualizar_dados=True, usar_preco_medio=False)
-            else:
-                df = df_temp
+        conteudo_carteira = Path(carteira_path).read_bytes()
+    
+    versao = versao_carteira(conteudo_carteira)
+    anteriores = {
+        nome: entrada(snapshot, nome, versao=versao, atualizar_dados=atualizar_dados_auto)
+        for nome in ("metricas", "saude")
+    }
+    if cache.processo_frio() and anteriores["metricas"]:
+        with espaco_kpis.provisorio().container():
+            st.caption(
+                f"🕒 Valores de {rotulo_horario(anteriores['metricas'])} — carregando carteira..."
+                + (f" | Score de saúde: {anteriores['saude']['valor']['score']:.0f}/100" if anteriores["saude"] else "")
+            )
+            render_kpis(anteriores["metricas"]["valor"])
+    
+    # Se CSV tem apenas Ticker e Quantidade, o loader usa dados de mercado automaticamente
+    if not atualizar_dados_auto and carteira_simplificada(colunas_csv(conteudo_carteira)):
+        st.info("💡 CSV simplificado detectado. Ativando atualização automática de dados...")
+    
+    # Carteira enriquecida, cacheada pelo hash do conteúdo do CSV
+    df = cache.carregar_carteira(
+        conteudo_carteira,
+        atualizar_dados=atualizar_dados_auto,
+        forcar_atualizacao=atualizar_mercado
+    )
 except FileNotFoundError:
+    espaco_kpis.limpar()
     st.error(f"❌ Arquivo não encontrado: {carteira_path}")
     st.info("⬅️ Por favor, importe um arquivo CSV na sidebar ou coloque data/carteira.csv")
     st.stop()
 except Exception as e:
+    espaco_kpis.limpar()
     st.error(f"❌ Erro ao carregar arquivo: {e}")
     if atualizar_dados_auto:
         st.info("💡 Dica: Tente desativar 'Atualizar automaticamente' se houver problema de conexão")
     st.stop()
 
-# -------------------------------------------------
-# VALIDAÇÃO
-# -------------------------------------------------
-cols = ["Ticker", "Quantidade", "Preco_Medio", "Dividendo_Mensal"]
-for c in cols:
-    if c not in df.columns:
-        st.error(f"❌ Coluna obrigatória ausente: {c}")
-        st.stop()
-
-df[cols[1:]] = df[cols[1:]].astype(float)
-
 # -------------------------------------------------
 # CÁLCULOS BASE
 # -------------------------------------------------
-df["Valor_Investido"] = df["Quantidade"] * df["Preco_Medio"]
-df["Renda_Mensal"] = df["Quantidade"] * df["Dividendo_Mensal"]
-df["Yield_Mensal"] = df["Renda_Mensal"] / df["Valor_Investido"]
-
-patrimonio = df["Valor_Investido"].sum()
-renda_mensal = df["Renda_Mensal"].sum()
-yield_medio = renda_mensal / patrimonio
-renda_anual = renda_mensal * 12
+# Colunas derivadas e agregados calculados uma única vez e compartilhados por todas as seções
+metricas = engine.metricas(df)
+df = metricas.frame
+
+patrimonio = metricas.patrimonio
+renda_mensal = metricas.renda_mensal
+yield_medio = metricas.yield_medio
+renda_anual = metricas.renda_anual
+
+# Chave de cache: hash do conteúdo das posições
+chave_carteira = cache.hash_carteira(df)
+tickers = metricas.tickers
+
+# Risco de preço e saúde dependem do histórico local, atualizado em segundo plano
+# (busca "historico"): as seções que os exibem recalculam depois da atualização
+def risco_e_saude():
+    """Risco e saúde com a mesma versão do histórico local (a disponível agora)"""
+    versao = versao_historico(tickers)
+    risco = cache.risco_carteira(chave_carteira, versao, metricas)
+    return risco, cache.saude_carteira(chave_carteira, versao, metricas, risco)
+
+# Buscas de mercado em segundo plano: as seções abaixo que dependem delas
+# ficam com placeholders e são preenchidas ao final (carga.preencher)
+carga = CargaProgressiva({
+    "sentimento": (cache.sentimento_atual, tickers),
+    "noticias": (cache.noticias_atuais,),
+    "indices": (cache.indices_mercado,),
+    "correlacao": (cache.correlacao_mercado, tickers),
+    "selic": (cache.taxa_selic,),
+    "historico": (cache.historico_precos, tickers),
+    "catalogo": (cache.catalogo_fiis, tickers),  # metadados dos FIIs (só os desatualizados)
+}, progressivo=renderizacao_progressiva)
+
+# Valores de mercado do último snapshot: exibidos nos placeholders até os novos chegarem
+mercado_anterior = valores_mercado(snapshot, tickers)
+
+def provisorio(*nomes) -> dict:
+    """Argumentos de carga.secao com os valores anteriores de `nomes` (se houver todos)"""
+    itens = [mercado_anterior.get(nome) for nome in nomes]
+    if not all(itens):
+        return {}
+    mais_antigo = min(itens, key=lambda item: item["em"])
+    return {
+        "provisorio": {nome: item["valor"] for nome, item in zip(nomes, itens)},
+        "rotulo": f"Valores de {rotulo_horario(mais_antigo)}"
+    }
 
 # -------------------------------------------------
 # KPIs PRINCIPAIS
 # -------------------------------------------------
-st.markdown("### 📈 Indicadores Principais (KPIs)")
-
-kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
-
-with kpi1:
-    st.metric(
-        "💰 Patrimônio Total",
-        f"R$ {patrimonio:,.2f}",
-        help="Valor total investido na carteira"
-    )
-
-with kpi2:
-    st.metric(
-        "📥 Renda Mensal",
-        f"R$ {renda_mensal:,.2f}",
-        help="Dividendos recebidos mensalmente"
-    )
-
-with kpi3:
-    st.metric(
-        "📊 Yield Médio",
-        f"{yield_medio*100:.2f}%",
-        delta=f"{(yield_medio*100 - 1.0):.2f}% vs meta",
-        help="Rentabilidade média mensal da carteira"
-    )
-
-with kpi4:
-    st.metric(
-        "📆 Renda Anual Projetada",
-        f"R$ {renda_anual:,.2f}",
-        help="Renda anual com base nos dividendos mensais"
-    )
-
-with kpi5:
-    num_ativos = len(df)
-    st.metric(
-        "🎯 Número de Ativos",
-        f"{num_ativos}",
-        help="Quantidade de FIIs na carteira"
-    )
+with espaco_kpis.definitivo():
+    render_kpis(resumo_metricas(metricas))
 
 st.divider()
 
@@ -407,48 +464,56 @@ st.divider()
 # -------------------------------------------------
 st.markdown("### 🤖 Insights de IA - Saúde da Carteira")
 
-with st.spinner("Analisando saúde da carteira..."):
-    saude = analisar_saude_carteira(df)
-
-# Score de Saúde
-col_score, col_status = st.columns([3, 1])
-
-with col_score:
-    st.markdown(f"**Score de Saúde:** {saude['score']:.0f}/100")
-    st.progress(saude['score'] / 100)
-
-with col_status:
-    cores = {"green": "🟢", "blue": "🔵", "orange": "🟠", "red": "🔴"}
-    st.markdown(f"**{cores.get(saude['cor_status'], '⚪')} {saude['status']}**")
-
-# Insights e Alertas
-if saude['insights'] or saude['alertas']:
-    col_insights, col_alertas = st.columns(2)
-    
-    with col_insights:
-        if saude['insights']:
-            st.markdown("#### ✅ Insights Positivos")
-            for insight in saude['insights']:
-                st.markdown(f"""
-                <div class="insight-box insight-{insight['tipo']}">
-                    <strong>{insight['titulo']}</strong><br>
-                    {insight['mensagem']}
-                </div>
-                """, unsafe_allow_html=True)
-    
-    with col_alertas:
-        if saude['alertas']:
-            st.markdown("#### ⚠️ Alertas e Atenções")
-            for alerta in saude['alertas']:
-                st.markdown(f"""
-                <div class="insight-box insight-{alerta['tipo']}">
-                    <strong>{alerta['titulo']}</strong><br>
-                    {alerta['mensagem']}
-                </div>
-                """, unsafe_allow_html=True)
+def render_saude(carga: CargaProgressiva):
+    """Score, insights e alertas, com o risco do histórico já atualizado"""
+    try:
+        carga.resultado("historico")
+    except Exception:
+        pass  # o aviso fica na seção de risco; segue com o histórico local
+    _, saude = risco_e_saude()
+
+    # Score de Saúde
+    col_score, col_status = st.columns([3, 1])
+
+    with col_score:
+        st.markdown(f"**Score de Saúde:** {saude['score']:.0f}/100")
+        st.progress(saude['score'] / 100)
+
+    with col_status:
+        cores = {"green": "🟢", "blue": "🔵", "orange": "🟠", "red": "🔴"}
+        st.markdown(f"**{cores.get(saude['cor_status'], '⚪')} {saude['status']}**")
+
+    # Insights e Alertas
+    if saude['insights'] or saude['alertas']:
+        col_insights, col_alertas = st.columns(2)
+
+        with col_insights:
+            if saude['insights']:
+                st.markdown("#### ✅ Insights Positivos")
+                for insight in saude['insights']:
+                    st.markdown(f"""
+                    <div class="insight-box insight-{insight['tipo']}">
+                        <strong>{insight['titulo']}</strong><br>
+                        {insight['mensagem']}
+                    </div>
+                    """, unsafe_allow_html=True)
+
+        with col_alertas:
+            if saude['alertas']:
+                st.markdown("#### ⚠️ Alertas e Atenções")
+                for alerta in saude['alertas']:
+                    st.markdown(f"""
+                    <div class="insight-box insight-{alerta['tipo']}">
+                        <strong>{alerta['titulo']}</strong><br>
+                        {alerta['mensagem']}
+                    </div>
+                    """, unsafe_allow_html=True)
+
+carga.secao(["historico"], render_saude, "⏳ Analisando saúde da carteira...",
+            provisorio={"historico": {}}, rotulo="Histórico local")
 
 # Recomendações
-recomendacoes = gerar_recomendacoes(df)
+recomendacoes = cache.recomendacoes(chave_carteira, metricas)
 if recomendacoes:
     st.markdown("#### 💡 Recomendações Estratégicas")
     for rec in recomendacoes:
@@ -459,51 +524,103 @@ if recomendacoes:
         - 💼 Ação sugerida: {rec['acao']}
         """)
 
+# -------------------------------------------------
+# RISCO DE PREÇO (histórico local)
+# -------------------------------------------------
+st.markdown("### 📉 Risco de Preço")
+
+def render_risco(carga: CargaProgressiva):
+    """Volatilidade, drawdown e VaR/CVaR da carteira e de cada ativo"""
+    try:
+        carga.resultado("historico")  # só aguarda a atualização do histórico local
+    except Exception as e:
+        st.warning(f"⚠️ Erro ao atualizar histórico de preços: {e}")
+    risco_atual = cache.risco_carteira(chave_carteira, versao_historico(tickers), metricas)
+
+    if risco_atual is None:
+        st.info(f"📉 Histórico de preços insuficiente (mínimo de {MINIMO_PREGOES} pregões). "
+                "Ative 'Atualizar automaticamente' com conexão para baixar os fechamentos.")
+        return
+
+    carteira_risco = risco_atual["carteira"]
+    col_r1, col_r2, col_r3, col_r4 = st.columns(4)
+    with col_r1:
+        st.metric("🌊 Volatilidade Anual", f"{carteira_risco['volatilidade_anual']:.1f}%",
+                  help=f"Pelo modelo de covariância: {carteira_risco['volatilidade_modelo']:.1f}%")
+    with col_r2:
+        st.metric("📉 Drawdown Máximo", f"{carteira_risco['max_drawdown']:.1f}%")
+    with col_r3:
+        st.metric("⚠️ VaR 95% (1 dia)", f"{carteira_risco['var_95']:.2f}%",
+                  help=f"Paramétrico: {carteira_risco['var_parametrico']:.2f}%")
+    with col_r4:
+        st.metric("🔻 CVaR 95% (1 dia)", f"{carteira_risco['cvar_95']:.2f}%",
+                  help=f"Paramétrico: {carteira_risco['cvar_parametrico']:.2f}%")
+
+    st.caption(
+        f"{risco_atual['pregoes']} pregões até {risco_atual['ate']} | "
+        f"{risco_atual['cobertura']:.0f}% do patrimônio com histórico | "
+        f"shrinkage da covariância: {risco_atual['shrinkage']:.2f}"
+    )
+    with st.expander("📋 Risco por ativo"):
+        exibir_tabela(risco_atual["ativos"].reset_index(), {
+            "Ticker": ("texto", "Ticker"),
+            **{coluna: ("pct", coluna) for coluna in risco_atual["ativos"].columns},
+        })
+
+carga.secao(["historico"], render_risco, "⏳ Atualizando histórico de preços...",
+            provisorio={"historico": {}}, rotulo="Histórico local")
+
+st.divider()
+
 # -------------------------------------------------
 # ANÁLISE DE NOTÍCIAS E SENTIMENTOS
 # -------------------------------------------------
 st.markdown("### 📰 Análise de Sentimentos e Notícias")
 
-with st.spinner("Analisando sentimentos da carteira..."):
+def render_sentimentos(carga: CargaProgressiva):
+    """Sentimento da carteira e notícias do mercado"""
     try:
-        sentimentos_carteira = analisar_sentimento_carteira(df["Ticker"].tolist())
-        noticias_mercado = buscar_noticias_mercado()
+        sentimentos_carteira = carga.resultado("sentimento")
+        noticias_mercado = carga.resultado("noticias")
     except Exception as e:
         st.warning(f"⚠️ Erro ao analisar sentimentos: {e}")
         sentimentos_carteira = {"sentimento_geral": "neutro", "score_medio": 0, "resumo": "Análise indisponível"}
         noticias_mercado = []
 
-col_sent1, col_sent2 = st.columns(2)
+    col_sent1, col_sent2 = st.columns(2)
 
-with col_sent1:
-    st.markdown("#### 🤖 Sentimento da Carteira")
+    with col_sent1:
+        st.markdown("#### 🤖 Sentimento da Carteira")
     
-    sentimento_icon = {
-        "positivo": "🟢",
-        "neutro": "🟡",
-        "negativo": "🔴"
-    }
+        sentimento_icon = {
+            "positivo": "🟢",
+            "neutro": "🟡",
+            "negativo": "🔴"
+        }
     
-    st.markdown(f"""
-    **{sentimento_icon.get(sentimentos_carteira['sentimento_geral'], '⚪')} {sentimentos_carteira['sentimento_geral'].upper()}**
+        st.markdown(f"""
+        **{sentimento_icon.get(sentimentos_carteira['sentimento_geral'], '⚪')} {sentimentos_carteira['sentimento_geral'].upper()}**
     
-    {sentimentos_carteira.get('resumo', 'Análise em andamento')}
-    """)
+        {sentimentos_carteira.get('resumo', 'Análise em andamento')}
+        """)
     
-    if 'score_medio' in sentimentos_carteira:
-        score_sent = (sentimentos_carteira['score_medio'] + 1) / 2 * 100  # Normalizar -1 a 1 para 0 a 100
-        st.progress(score_sent / 100)
-
-with col_sent2:
-    if noticias_mercado:
-        st.markdown("#### 📰 Notícias do Mercado")
-        for noticia in noticias_mercado[:3]:  # Mostrar 3 primeiras
-            st.markdown(f"""
-            **{noticia.get('titulo', 'Sem título')}**  
-            *{noticia.get('fonte', 'Fonte desconhecida')} - {noticia.get('data', 'N/A')}*
-            """)
-    else:
-        st.info("📰 Notícias serão carregadas em atualização futura")
+        if 'score_medio' in sentimentos_carteira:
+            score_sent = (sentimentos_carteira['score_medio'] + 1) / 2 * 100  # Normalizar -1 a 1 para 0 a 100
+            st.progress(score_sent / 100)
+
+    with col_sent2:
+        if noticias_mercado:
+            st.markdown("#### 📰 Notícias do Mercado")
+            for noticia in noticias_mercado[:3]:  # Mostrar 3 primeiras
+                st.markdown(f"""
+                **{noticia.get('titulo', 'Sem título')}**  
+                *{noticia.get('fonte', 'Fonte desconhecida')} - {str(noticia.get('data', 'N/A'))[:10]}*
+                """)
+        else:
+            st.info("📰 Nenhuma notícia local. Coloque dumps RSS, Atom ou JSONL em data/noticias/")
+
+carga.secao(["sentimento", "noticias"], render_sentimentos, "⏳ Analisando sentimentos da carteira...",
+            **provisorio("sentimento", "noticias"))
 
 st.divider()
 
@@ -512,44 +629,47 @@ st.divider()
 # -------------------------------------------------
 st.markdown("### 📊 Indicadores de Mercado")
 
-with st.spinner("Carregando dados de mercado..."):
+def render_indicadores_mercado(carga: CargaProgressiva):
+    """IBOVESPA, IFIX e correlação da carteira com o IFIX"""
     try:
-        indices = obter_indices()
-        correlacao = calcular_correlacao_carteira_mercado(df["Ticker"].tolist())
+        indices = carga.resultado("indices")
+        correlacao = carga.resultado("correlacao")
     except Exception as e:
         st.warning(f"⚠️ Erro ao carregar dados de mercado: {e}")
         indices = {"ibov": {"valor": None, "variacao_30d": 0}, "ifix": {"valor": None, "variacao_30d": 0}}
         correlacao = 0.0
 
-col_mkt1, col_mkt2, col_mkt3 = st.columns(3)
-
-with col_mkt1:
-    if indices["ibov"]["valor"]:
-        variacao_ibov = indices["ibov"]["variacao_30d"]
+    col_mkt1, col_mkt2, col_mkt3 = st.columns(3)
+
+    with col_mkt1:
+        if indices["ibov"]["valor"]:
+            variacao_ibov = indices["ibov"]["variacao_30d"]
+            st.metric(
+                "📈 IBOVESPA",
+                f"{indices['ibov']['valor']:,.0f}" if indices['ibov']['valor'] else "N/A",
+                delta=f"{variacao_ibov:.2f}%",
+                delta_color="normal" if variacao_ibov >= 0 else "inverse"
+            )
+
+    with col_mkt2:
+        if indices["ifix"]["valor"]:
+            variacao_ifix = indices["ifix"]["variacao_30d"]
+            st.metric(
+                "🏢 IFIX",
+                f"{indices['ifix']['valor']:,.2f}" if indices['ifix']['valor'] else "N/A",
+                delta=f"{variacao_ifix:.2f}%",
+                delta_color="normal" if variacao_ifix >= 0 else "inverse",
+                help="Índice de Fundos Imobiliários"
+            )
+
+    with col_mkt3:
         st.metric(
-            "📈 IBOVESPA",
-            f"{indices['ibov']['valor']:,.0f}" if indices['ibov']['valor'] else "N/A",
-            delta=f"{variacao_ibov:.2f}%",
-            delta_color="normal" if variacao_ibov >= 0 else "inverse"
+            "🔗 Correlação com IFIX",
+            f"{correlacao:.2f}",
+            help="Correlação da carteira com o índice IFIX"
         )
 
-with col_mkt2:
-    if indices["ifix"]["valor"]:
-        variacao_ifix = indices["ifix"]["variacao_30d"]
-        st.metric(
-            "🏢 IFIX",
-            f"{indices['ifix']['valor']:,.2f}" if indices['ifix']['valor'] else "N/A",
-            delta=f"{variacao_ifix:.2f}%",
-            delta_color="normal" if variacao_ifix >= 0 else "inverse",
-            help="Índice de Fundos Imobiliários"
-        )
-
-with col_mkt3:
-    st.metric(
-        "🔗 Correlação com IFIX",
-        f"{correlacao:.2f}",
-        help="Correlação da carteira com o índice IFIX"
-    )
+carga.secao(["indices", "correlacao"], render_indicadores_mercado, **provisorio("indices", "correlacao"))
 
 st.divider()
 
@@ -559,68 +679,14 @@ st.divider()
 st.markdown("### 📈 Projeções de Crescimento Orgânico")
 
 # Projeção com reinvestimento
-meses = []
-rendas = []
-patrimonios = []
-
-pat = patrimonio
-renda = renda_mensal
-
-for i in range(horizonte):
-    meses.append(i + 1)
-    rendas.append(renda)
-    patrimonios.append(pat)
-    
-    pat = pat + renda
-    renda = pat * yield_medio
-
-df_proj = pd.DataFrame({
-    "Mês": meses,
-    "Renda Mensal Projetada": rendas,
-    "Patrimônio Projetado": patrimonios
-})
-
-# Gráfico de projeção duplo
-fig_proj = make_subplots(
-    rows=2, cols=1,
-    subplot_titles=("Renda Mensal Projetada", "Patrimônio Projetado"),
-    vertical_spacing=0.15,
-    row_heights=[0.5, 0.5]
-)
-
-fig_proj.add_trace(
-    go.Scatter(
-        x=df_proj["Mês"],
-        y=df_proj["Renda Mensal Projetada"],
-        mode="lines+markers",
-        name="Renda Mensal",
-        line=dict(color="#2E86AB", width=3),
-        marker=dict(size=4)
-    ),
-    row=1, col=1
-)
+df_proj = cache.projecao(chave_carteira, horizonte, metricas)
+rendas = df_proj["Renda Mensal Projetada"].tolist()
+patrimonios = df_proj["Patrimônio Projetado"].tolist()
 
-fig_proj.add_trace(
-    go.Scatter(
-        x=df_proj["Mês"],
-        y=df_proj["Patrimônio Projetado"],
-        mode="lines+markers",
-        name="Patrimônio",
-        line=dict(color="#A23B72", width=3),
-        marker=dict(size=4)
-    ),
-    row=2, col=1
-)
+# Gráfico de projeção duplo (esqueleto em cache; séries longas são reduzidas via LTTB)
+from charts import grafico_crescimento, grafico_benchmarks
 
-fig_proj.update_xaxes(title_text="Mês", row=2, col=1)
-fig_proj.update_yaxes(title_text="R$", row=1, col=1)
-fig_proj.update_yaxes(title_text="R$", row=2, col=1)
-fig_proj.update_layout(
-    height=700,
-    showlegend=True,
-    hovermode="x unified",
-    template=get_plot_template()
-)
+fig_proj = grafico_crescimento(df_proj, template=get_plot_template())
 
 st.plotly_chart(fig_proj, use_container_width=True)
 
@@ -649,7 +715,7 @@ with col_proj2:
     )
 
 with col_proj3:
-    meses_dobrar = saude['metricas'].get('meses_dobrar', 0)
+    meses_dobrar = metricas.meses_dobrar
     st.metric(
         "⏱️ Tempo para Dobrar",
         f"{meses_dobrar:.0f} meses",
@@ -661,122 +727,90 @@ with col_proj3:
 # -------------------------------------------------
 st.markdown("### ⚖️ Comparação com Benchmarks de Mercado")
 
-try:
-    taxa_selic = obter_taxa_selic()
-    taxa_selic_anual = taxa_selic / 100  # Converter para decimal
-    
-    # Simular carteira vs benchmarks
-    benchmark_selic = simular_benchmark(patrimonio, taxa_selic_anual, horizonte)
-    benchmark_ifix = simular_benchmark(patrimonio, 0.10, horizonte)  # Assumindo ~10% ao ano para IFIX
-    benchmark_poupanca = simular_benchmark(patrimonio, 0.085, horizonte)  # ~8.5% ao ano
-    
-    # Converter para DataFrame para facilitar plotagem
-    df_bench = pd.DataFrame({
-        "Mês": range(1, horizonte + 1),
-        "Carteira (Reinvestimento)": patrimonios,
-        "SELIC": [b["Valor"] for b in benchmark_selic],
-        "IFIX (Estimado)": [b["Valor"] for b in benchmark_ifix],
-        "Poupança": [b["Valor"] for b in benchmark_poupanca]
-    })
-    
-    # Gráfico comparativo
-    fig_bench = go.Figure()
-    
-    fig_bench.add_trace(go.Scatter(
-        x=df_bench["Mês"],
-        y=df_bench["Carteira (Reinvestimento)"],
-        mode="lines",
-        name="Carteira (Reinvestimento)",
-        line=dict(color="#2E86AB", width=3)
-    ))
-    
-    fig_bench.add_trace(go.Scatter(
-        x=df_bench["Mês"],
-        y=df_bench["SELIC"],
-        mode="lines",
-        name=f"SELIC ({taxa_selic}% a.a.)",
-        line=dict(color="#A23B72", width=2, dash="dash")
-    ))
-    
-    fig_bench.add_trace(go.Scatter(
-        x=df_bench["Mês"],
-        y=df_bench["IFIX (Estimado)"],
-        mode="lines",
-        name="IFIX (~10% a.a.)",
-        line=dict(color="#F18F01", width=2, dash="dot")
-    ))
-    
-    fig_bench.add_trace(go.Scatter(
-        x=df_bench["Mês"],
-        y=df_bench["Poupança"],
-        mode="lines",
-        name="Poupança (~8.5% a.a.)",
-        line=dict(color="#C73E1D", width=2, dash="dashdot")
-    ))
-    
-    fig_bench.update_layout(
-        title="Crescimento do Patrimônio: Carteira vs Benchmarks",
-        xaxis_title="Mês",
-        yaxis_title="Patrimônio (R$)",
-        hovermode="x unified",
-        height=500,
-        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
-        template=get_plot_template()
-    )
-    
-    st.plotly_chart(fig_bench, use_container_width=True)
-    
-    # Comparação no período final
-    valor_final_carteira = patrimonios[-1]
-    valor_final_selic = benchmark_selic[-1]["Valor"]
-    valor_final_ifix = benchmark_ifix[-1]["Valor"]
-    valor_final_poupanca = benchmark_poupanca[-1]["Valor"]
-    
-    diff_selic = ((valor_final_carteira / valor_final_selic) - 1) * 100
-    diff_ifix = ((valor_final_carteira / valor_final_ifix) - 1) * 100
-    diff_poupanca = ((valor_final_carteira / valor_final_poupanca) - 1) * 100
-    
-    col_bench1, col_bench2, col_bench3, col_bench4 = st.columns(4)
-    
-    with col_bench1:
-        st.metric(
-            f"💰 Carteira ({horizonte}m)",
-            f"R$ {valor_final_carteira:,.2f}",
-            help="Com reinvestimento de dividendos"
-        )
-    
-    with col_bench2:
-        st.metric(
-            f"SELIC ({horizonte}m)",
-            f"R$ {valor_final_selic:,.2f}",
-            delta=f"{diff_selic:+.1f}%",
-            delta_color="normal" if diff_selic > 0 else "inverse"
-        )
-    
-    with col_bench3:
-        st.metric(
-            f"IFIX ({horizonte}m)",
-            f"R$ {valor_final_ifix:,.2f}",
-            delta=f"{diff_ifix:+.1f}%",
-            delta_color="normal" if diff_ifix > 0 else "inverse"
+def render_benchmarks(carga: CargaProgressiva):
+    """Carteira vs SELIC, IFIX e poupança (depende da taxa SELIC atual)"""
+    try:
+        taxa_selic = carga.resultado("selic")
+        taxa_selic_anual = taxa_selic / 100  # Converter para decimal
+    
+        # Simular carteira vs benchmarks
+        series_benchmark = cache.benchmarks(patrimonio, taxa_selic_anual, horizonte)
+        benchmark_selic = series_benchmark["SELIC"]
+        benchmark_ifix = series_benchmark["IFIX (Estimado)"]
+        benchmark_poupanca = series_benchmark["Poupança"]
+    
+        # Gráfico comparativo
+        fig_bench = grafico_benchmarks(
+            df_proj["Mês"],
+            {
+                "Carteira (Reinvestimento)": patrimonios,
+                f"SELIC ({taxa_selic}% a.a.)": [b["Valor"] for b in benchmark_selic],
+                "IFIX (~10% a.a.)": [b["Valor"] for b in benchmark_ifix],
+                "Poupança (~8.5% a.a.)": [b["Valor"] for b in benchmark_poupanca]
+            },
+            template=get_plot_template()
         )
     
-    with col_bench4:
-        st.metric(
-            f"Poupança ({horizonte}m)",
-            f"R$ {valor_final_poupanca:,.2f}",
-            delta=f"{diff_poupanca:+.1f}%",
-            delta_color="normal" if diff_poupanca > 0 else "inverse"
+        # Chave distinta: a seção pode ser desenhada com valores provisórios e depois com os novos
+        st.plotly_chart(
+            fig_bench, use_container_width=True,
+            key="benchmarks_provisorio" if carga.provisorio else "benchmarks"
         )
     
-    # Análise
-    if diff_selic > 0:
-        st.success(f"✅ Sua carteira supera a SELIC em {diff_selic:.1f}% no período projetado!")
-    else:
-        st.warning(f"⚠️ Sua carteira está abaixo da SELIC em {abs(diff_selic):.1f}% - considere revisar os ativos.")
+        # Comparação no período final
+        valor_final_carteira = patrimonios[-1]
+        valor_final_selic = benchmark_selic[-1]["Valor"]
+        valor_final_ifix = benchmark_ifix[-1]["Valor"]
+        valor_final_poupanca = benchmark_poupanca[-1]["Valor"]
+    
+        diff_selic = ((valor_final_carteira / valor_final_selic) - 1) * 100
+        diff_ifix = ((valor_final_carteira / valor_final_ifix) - 1) * 100
+        diff_poupanca = ((valor_final_carteira / valor_final_poupanca) - 1) * 100
+    
+        col_bench1, col_bench2, col_bench3, col_bench4 = st.columns(4)
+    
+        with col_bench1:
+            st.metric(
+                f"💰 Carteira ({horizonte}m)",
+                f"R$ {valor_final_carteira:,.2f}",
+                help="Com reinvestimento de dividendos"
+            )
+    
+        with col_bench2:
+            st.metric(
+                f"SELIC ({horizonte}m)",
+                f"R$ {valor_final_selic:,.2f}",
+                delta=f"{diff_selic:+.1f}%",
+                delta_color="normal" if diff_selic > 0 else "inverse"
+            )
+    
+        with col_bench3:
+            st.metric(
+                f"IFIX ({horizonte}m)",
+                f"R$ {valor_final_ifix:,.2f}",
+                delta=f"{diff_ifix:+.1f}%",
+                delta_color="normal" if diff_ifix > 0 else "inverse"
+            )
+    
+        with col_bench4:
+            st.metric(
+                f"Poupança ({horizonte}m)",
+                f"R$ {valor_final_poupanca:,.2f}",
+                delta=f"{diff_poupanca:+.1f}%",
+                delta_color="normal" if diff_poupanca > 0 else "inverse"
+            )
+    
+        # Análise
+        if diff_selic > 0:
+            st.success(f"✅ Sua carteira supera a SELIC em {diff_selic:.1f}% no período projetado!")
+        else:
+            st.warning(f"⚠️ Sua carteira está abaixo da SELIC em {abs(diff_selic):.1f}% - considere revisar os ativos.")
     
-except Exception as e:
-    st.warning(f"⚠️ Erro ao calcular benchmarks: {e}")
+    except Exception as e:
+        st.warning(f"⚠️ Erro ao calcular benchmarks: {e}")
+
+carga.secao(["selic"], render_benchmarks, "⏳ Carregando taxa SELIC para os benchmarks...",
+            **provisorio("selic"))
 
 st.divider()
 
@@ -785,7 +819,10 @@ st.divider()
 # -------------------------------------------------
 st.markdown("### 🎯 Análise de Alocação")
 
-col_alloc1, col_alloc2 = st.columns(2)
+import plotly.express as px
+import plotly.graph_objects as go
+
+col_alloc1, col_setor = st.columns(2)
 
 with col_alloc1:
     # Gráfico de pizza
@@ -801,11 +838,43 @@ with col_alloc1:
     fig_pie.update_layout(template=get_plot_template())
     st.plotly_chart(fig_pie, use_container_width=True)
 
+with col_setor:
+    # Mesma distribuição agregada por segmento (catálogo de FIIs)
+    setores = metricas.setores.reset_index()
+    fig_setor = px.pie(
+        setores,
+        names="Segmento",
+        values="Valor_Investido",
+        hole=0.4,
+        title="Distribuição por Segmento",
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig_setor.update_traces(textposition='inside', textinfo='percent+label')
+    fig_setor.update_layout(template=get_plot_template())
+    st.plotly_chart(fig_setor, use_container_width=True)
+
+col_alloc2, col_setores = st.columns(2)
+
+with col_setores:
+    st.markdown("#### 🏢 Exposição por Segmento")
+    st.caption(
+        f"{metricas.num_setores} segmentos | maior: {metricas.maior_setor or '-'} "
+        f"({metricas.max_concentracao_setor:.1f}%) | HHI setorial: {metricas.hhi_setor:.0f}"
+    )
+    formatos_setor = {
+        "Num_Ativos": ("qtd", "Ativos"),
+        "Valor_Investido": ("brl", "Valor Investido"),
+        "Pct_Patrimonio": ("pct", "% Patrimônio"),
+        "Renda_Mensal": ("brl", "Renda Mensal"),
+        "Pct_Renda": ("pct", "% Renda"),
+        "Yield (%)": ("pct", "Yield (%)"),
+    }
+    exibir_tabela(setores, {"Segmento": ("texto", "Segmento"), **formatos_setor})
+    exibir_tabela(metricas.tipos.reset_index(), {"Tipo": ("texto", "Tipo"), **formatos_setor})
+
 with col_alloc2:
     # Gráfico de barras - Yield por ativo
-    df_yield = df.copy()
-    df_yield["Yield (%)"] = df_yield["Yield_Mensal"] * 100
-    df_yield = df_yield.sort_values("Yield (%)", ascending=True)
+    df_yield = df.sort_values("Yield (%)", ascending=True)
     
     fig_bar = px.bar(
         df_yield,
@@ -831,32 +900,16 @@ st.divider()
 # -------------------------------------------------
 st.markdown("### 📋 Análise Detalhada e Comparação de Fundos")
 
-# Preparar DataFrame para visualização
-df_view = df.copy()
-df_view["Pct_Patrimonio"] = (df_view["Valor_Investido"] / patrimonio) * 100
-df_view["Yield (%)"] = df_view["Yield_Mensal"] * 100
-df_view["Renda_Anual"] = df_view["Renda_Mensal"] * 12
-df_view["Dividendo_Anual"] = df_view["Dividendo_Mensal"] * 12
-
-# Adicionar métricas comparativas
-yield_medio_geral = df_view["Yield (%)"].mean()
-df_view["Yield_vs_Media"] = df_view["Yield (%)"] - yield_medio_geral
-df_view["Prioridade_Reinvestimento"] = df_view.apply(
-    lambda row: "Alta" if row["Yield (%)"] > yield_medio_geral * 1.1 
-    else "Média" if row["Yield (%)"] > yield_medio_geral * 0.9 
-    else "Baixa", axis=1
-)
+# Colunas de visualização já vêm calculadas na carteira enriquecida
+df_view = metricas.frame
 
-# Tabs para diferentes visualizações
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Tabela Interativa", 
-    "🔄 Comparação de Fundos", 
-    "💡 Sugestão de Reinvestimento", 
-    "📈 Análise Comparativa",
-    "💰 Calcular e Aplicar Reinvestimento"
-])
+# Seções das tabs: funções com entradas explícitas. As que têm widgets são
+# fragmentos (st.fragment), então interagir com elas reexecuta apenas a própria seção
 
-with tab1:
+@st.fragment
+def render_tabela_interativa(metricas: PortfolioMetrics):
+    """Tab 1: tabela completa com ordenação (fragmento: reordenar não reexecuta o dashboard)"""
+    df_view = metricas.frame
     st.markdown("#### Tabela Completa da Carteira")
     
     # Filtros e ordenação
@@ -877,60 +930,40 @@ with tab1:
         ascending=(ordem == "Crescente")
     )
     
-    # Formatação profissional da tabela
-    df_display = df_sorted[[
-        "Ticker",
-        "Quantidade",
-        "Preco_Medio",
-        "Dividendo_Mensal",
-        "Valor_Investido",
-        "Pct_Patrimonio",
-        "Renda_Mensal",
-        "Renda_Anual",
-        "Yield (%)",
-        "Prioridade_Reinvestimento"
-    ]].copy()
-    
-    # Formatar valores monetários e percentuais
-    df_display["Preco_Medio"] = df_display["Preco_Medio"].apply(lambda x: f"R$ {x:,.2f}")
-    df_display["Dividendo_Mensal"] = df_display["Dividendo_Mensal"].apply(lambda x: f"R$ {x:,.2f}")
-    df_display["Valor_Investido"] = df_display["Valor_Investido"].apply(lambda x: f"R$ {x:,.2f}")
-    df_display["Renda_Mensal"] = df_display["Renda_Mensal"].apply(lambda x: f"R$ {x:,.2f}")
-    df_display["Renda_Anual"] = df_display["Renda_Anual"].apply(lambda x: f"R$ {x:,.2f}")
-    df_display["Pct_Patrimonio"] = df_display["Pct_Patrimonio"].apply(lambda x: f"{x:.2f}%")
-    df_display["Yield (%)"] = df_display["Yield (%)"].apply(lambda x: f"{x:.2f}%")
-    
-    # Renomear colunas para exibição
-    df_display.columns = [
-        "Ticker", "Qtd", "Preço Médio", "Dividendo Mensal",
-        "Valor Investido", "% Patrimônio", "Renda Mensal",
-        "Renda Anual", "Yield %", "Prioridade Reinvest."
-    ]
-    
-    st.dataframe(
-        df_display,
-        use_container_width=True,
-        hide_index=True,
-        height=400
-    )
+    # Formatação profissional da tabela (dados numéricos, formato via column_config)
+    exibir_tabela(df_sorted, {
+        "Ticker": ("texto", "Ticker"),
+        "Quantidade": ("qtd", "Qtd"),
+        "Preco_Medio": ("brl", "Preço Médio"),
+        "Dividendo_Mensal": ("brl", "Dividendo Mensal"),
+        "Valor_Investido": ("brl", "Valor Investido"),
+        "Pct_Patrimonio": ("pct", "% Patrimônio"),
+        "Renda_Mensal": ("brl", "Renda Mensal"),
+        "Renda_Anual": ("brl", "Renda Anual"),
+        "Yield (%)": ("pct", "Yield %"),
+        "Prioridade_Reinvestimento": ("texto", "Prioridade Reinvest.")
+    }, height=400)
     
     # Estatísticas resumidas
     st.markdown("#### 📊 Estatísticas Resumidas")
     col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
     
     with col_stat1:
-        st.metric("Concentração Máxima", f"{df_view['Pct_Patrimonio'].max():.1f}%")
+        st.metric("Concentração Máxima", f"{metricas.max_concentracao:.1f}%")
     
     with col_stat2:
-        st.metric("Yield Médio", f"{yield_medio_geral:.2f}%")
+        st.metric("Yield Médio", f"{metricas.yield_medio_ativos:.2f}%")
     
     with col_stat3:
-        st.metric("Yield Mínimo", f"{df_view['Yield (%)'].min():.2f}%")
+        st.metric("Yield Mínimo", f"{metricas.yield_min:.2f}%")
     
     with col_stat4:
-        st.metric("Yield Máximo", f"{df_view['Yield (%)'].max():.2f}%")
+        st.metric("Yield Máximo", f"{metricas.yield_max:.2f}%")
 
-with tab2:
+
+@st.fragment
+def render_comparacao_fundos(df_view: pd.DataFrame):
+    """Tab 2: comparação lado a lado entre dois fundos (fragmento)"""
     st.markdown("#### 🔄 Comparação Lado a Lado entre Fundos")
     
     col_comp1, col_comp2 = st.columns(2)
@@ -945,45 +978,25 @@ with tab2:
         df1 = df_view[df_view["Ticker"] == fundo1].iloc[0]
         df2 = df_view[df_view["Ticker"] == fundo2].iloc[0]
         
-        # Tabela comparativa
-        comparacao = pd.DataFrame({
-            "Métrica": [
-                "Ticker",
-                "Quantidade",
-                "Preço Médio",
-                "Valor Investido",
-                "% do Patrimônio",
-                "Dividendo Mensal",
-                "Dividendo Anual",
-                "Renda Mensal",
-                "Renda Anual",
-                "Yield Mensal (%)"
-            ],
-            fundo1: [
-                df1["Ticker"],
-                f"{df1['Quantidade']:.0f}",
-                f"R$ {df1['Preco_Medio']:,.2f}",
-                f"R$ {df1['Valor_Investido']:,.2f}",
-                f"{df1['Pct_Patrimonio']:.2f}%",
-                f"R$ {df1['Dividendo_Mensal']:,.2f}",
-                f"R$ {df1['Dividendo_Anual']:,.2f}",
-                f"R$ {df1['Renda_Mensal']:,.2f}",
-                f"R$ {df1['Renda_Anual']:,.2f}",
-                f"{df1['Yield (%)']:.2f}%"
-            ],
-            fundo2: [
-                df2["Ticker"],
-                f"{df2['Quantidade']:.0f}",
-                f"R$ {df2['Preco_Medio']:,.2f}",
-                f"R$ {df2['Valor_Investido']:,.2f}",
-                f"{df2['Pct_Patrimonio']:.2f}%",
-                f"R$ {df2['Dividendo_Mensal']:,.2f}",
-                f"R$ {df2['Dividendo_Anual']:,.2f}",
-                f"R$ {df2['Renda_Mensal']:,.2f}",
-                f"R$ {df2['Renda_Anual']:,.2f}",
-                f"{df2['Yield (%)']:.2f}%"
-            ]
-        })
+        # Tabela comparativa: tipos misturados por linha, então as duas linhas
+        # são formatadas como texto de uma vez e depois transpostas
+        campos_comparacao = {
+            "Ticker": ("texto", "Ticker"),
+            "Quantidade": ("qtd", "Quantidade"),
+            "Preco_Medio": ("brl", "Preço Médio"),
+            "Valor_Investido": ("brl", "Valor Investido"),
+            "Pct_Patrimonio": ("pct", "% do Patrimônio"),
+            "Dividendo_Mensal": ("brl", "Dividendo Mensal"),
+            "Dividendo_Anual": ("brl", "Dividendo Anual"),
+            "Renda_Mensal": ("brl", "Renda Mensal"),
+            "Renda_Anual": ("brl", "Renda Anual"),
+            "Yield (%)": ("pct", "Yield Mensal (%)")
+        }
+        selecionados = pd.DataFrame([df1, df2], index=[fundo1, fundo2])
+        comparacao = formatar_colunas(
+            selecionados, {coluna: tipo for coluna, (tipo, _) in campos_comparacao.items()}
+        ).T
+        comparacao.insert(0, "Métrica", [rotulo for _, rotulo in campos_comparacao.values()])
         
         st.dataframe(comparacao, use_container_width=True, hide_index=True)
         
@@ -998,18 +1011,20 @@ with tab2:
         }
         
         for metrica, (valor1, valor2) in metricas_numericas.items():
+            # Rótulos formatados pelo Plotly no navegador
+            texttemplate = "%{y:.2f}%" if metrica == "Yield (%)" else "R$ %{y:,.2f}"
             fig_comp.add_trace(go.Bar(
                 name=fundo1 if metrica != "Yield (%)" else f"{fundo1} ({valor1:.2f}%)",
                 x=[metrica],
                 y=[valor1],
-                text=[f"R$ {valor1:,.2f}" if "R$" not in str(valor1) else f"{valor1:.2f}%"],
+                texttemplate=texttemplate,
                 textposition="auto"
             ))
             fig_comp.add_trace(go.Bar(
                 name=fundo2 if metrica != "Yield (%)" else f"{fundo2} ({valor2:.2f}%)",
                 x=[metrica],
                 y=[valor2],
-                text=[f"R$ {valor2:,.2f}" if "R$" not in str(valor2) else f"{valor2:.2f}%"],
+                texttemplate=texttemplate,
                 textposition="auto"
             ))
         
@@ -1024,7 +1039,9 @@ with tab2:
     else:
         st.warning("⚠️ Selecione dois fundos diferentes para comparação.")
 
-with tab3:
+
+def render_sugestao_reinvestimento(df_view: pd.DataFrame):
+    """Tab 3: sugestão de distribuição dos dividendos"""
     st.markdown("#### 💡 Sugestões de Reinvestimento de Dividendos")
     
     # Calcular renda total disponível para reinvestimento
@@ -1037,39 +1054,35 @@ with tab3:
     """)
     
     # Ordenar por prioridade de reinvestimento
-    df_reinvest = df_view.copy()
-    df_reinvest = df_reinvest.sort_values("Yield (%)", ascending=False)
+    df_reinvest = df_view.sort_values("Yield (%)", ascending=False)
     
     # Calcular sugestão de alocação
-    sugestoes = []
-    for _, row in df_reinvest.iterrows():
-        # Proporção baseada em yield relativo
-        peso_yield = row["Yield (%)"] / df_reinvest["Yield (%)"].sum()
-        # Proporção inversa à concentração (para diversificar)
-        peso_diversificacao = 1 / (row["Pct_Patrimonio"] + 1)
-        # Peso combinado
-        peso_final = (peso_yield * 0.7) + (peso_diversificacao * 0.3)
-        sugestoes.append({
-            "Ticker": row["Ticker"],
-            "Yield (%)": row["Yield (%)"],
-            "Peso Sugerido": peso_final,
-            "Valor Sugerido (R$)": renda_total_mensal * peso_final,
-            "Prioridade": row["Prioridade_Reinvestimento"]
-        })
-    
-    df_sugestao = pd.DataFrame(sugestoes)
+    # Proporção baseada em yield relativo
+    peso_yield = df_reinvest["Yield (%)"] / df_reinvest["Yield (%)"].sum()
+    # Proporção inversa à concentração (para diversificar)
+    peso_diversificacao = 1 / (df_reinvest["Pct_Patrimonio"] + 1)
+    # Peso combinado
+    peso_final = (peso_yield * 0.7) + (peso_diversificacao * 0.3)
+    
+    df_sugestao = pd.DataFrame({
+        "Ticker": df_reinvest["Ticker"],
+        "Yield (%)": df_reinvest["Yield (%)"],
+        "Peso Sugerido": peso_final,
+        "Valor Sugerido (R$)": renda_total_mensal * peso_final,
+        "Prioridade": df_reinvest["Prioridade_Reinvestimento"]
+    })
     df_sugestao["Peso Sugerido (%)"] = (df_sugestao["Peso Sugerido"] / df_sugestao["Peso Sugerido"].sum()) * 100
     df_sugestao["Valor Sugerido (R$)"] = df_sugestao["Valor Sugerido (R$)"] * (df_sugestao["Peso Sugerido"] / df_sugestao["Peso Sugerido"].sum())
     df_sugestao = df_sugestao.sort_values("Valor Sugerido (R$)", ascending=False)
     
     # Formatação
-    df_sugestao_display = df_sugestao.copy()
-    df_sugestao_display["Yield (%)"] = df_sugestao_display["Yield (%)"].apply(lambda x: f"{x:.2f}%")
-    df_sugestao_display["Peso Sugerido (%)"] = df_sugestao_display["Peso Sugerido (%)"].apply(lambda x: f"{x:.1f}%")
-    df_sugestao_display["Valor Sugerido (R$)"] = df_sugestao_display["Valor Sugerido (R$)"].apply(lambda x: f"R$ {x:,.2f}")
-    df_sugestao_display = df_sugestao_display[["Ticker", "Yield (%)", "Prioridade", "Peso Sugerido (%)", "Valor Sugerido (R$)"]]
-    
-    st.dataframe(df_sugestao_display, use_container_width=True, hide_index=True)
+    exibir_tabela(df_sugestao, {
+        "Ticker": ("texto", "Ticker"),
+        "Yield (%)": ("pct", "Yield (%)"),
+        "Prioridade": ("texto", "Prioridade"),
+        "Peso Sugerido (%)": ("pct", "Peso Sugerido (%)"),
+        "Valor Sugerido (R$)": ("brl", "Valor Sugerido (R$)")
+    })
     
     # Gráfico de sugestão
     fig_reinvest = px.bar(
@@ -1090,7 +1103,9 @@ with tab3:
     
     st.info("💡 **Dica:** Priorize fundos com yield acima da média para maximizar retorno, mas mantenha diversificação.")
 
-with tab4:
+
+def render_analise_comparativa(df_view: pd.DataFrame):
+    """Tab 4: dividendos vs yield e ranking"""
     st.markdown("#### 📈 Análise Comparativa de Dividendos e Yield")
     
     # Gráfico de dividendos vs yield
@@ -1127,7 +1142,7 @@ with tab4:
         marker_color=df_view_sorted["Yield (%)"],
         marker_showscale=True,
         marker_colorbar=dict(title="Yield %"),
-        text=[f"R$ {x:,.2f}" for x in df_view_sorted["Renda_Mensal"]],
+        texttemplate="R$ %{x:,.2f}",
         textposition="outside"
     ))
     
@@ -1142,20 +1157,24 @@ with tab4:
     
     # Ranking de melhor yield
     st.markdown("#### 🏆 Ranking por Yield")
-    df_ranking = df_view[["Ticker", "Yield (%)", "Dividendo_Mensal", "Renda_Mensal"]].copy()
-    df_ranking = df_ranking.sort_values("Yield (%)", ascending=False)
-    df_ranking["Rank"] = range(1, len(df_ranking) + 1)
-    df_ranking["Dividendo_Mensal"] = df_ranking["Dividendo_Mensal"].apply(lambda x: f"R$ {x:,.2f}")
-    df_ranking["Renda_Mensal"] = df_ranking["Renda_Mensal"].apply(lambda x: f"R$ {x:,.2f}")
-    df_ranking["Yield (%)"] = df_ranking["Yield (%)"].apply(lambda x: f"{x:.2f}%")
-    df_ranking = df_ranking[["Rank", "Ticker", "Yield (%)", "Dividendo_Mensal", "Renda_Mensal"]]
-    
-    st.dataframe(df_ranking, use_container_width=True, hide_index=True)
+    df_ranking = df_view.sort_values("Yield (%)", ascending=False)
+    df_ranking = df_ranking.assign(Rank=np.arange(1, len(df_ranking) + 1))
+    
+    exibir_tabela(df_ranking, {
+        "Rank": ("qtd", "Rank"),
+        "Ticker": ("texto", "Ticker"),
+        "Yield (%)": ("pct", "Yield (%)"),
+        "Dividendo_Mensal": ("brl", "Dividendo_Mensal"),
+        "Renda_Mensal": ("brl", "Renda_Mensal")
+    })
 
-with tab5:
+
+@st.fragment
+def render_calculo_reinvestimento(df: pd.DataFrame, chave_carteira: str, carteira_path: str):
+    """Tab 5: cálculo e aplicação do reinvestimento (fragmento: trocar estratégia só recalcula esta seção)"""
     st.markdown("#### 💰 Calcular e Aplicar Reinvestimento Mensal")
     
-    renda_total_mensal = df_view["Renda_Mensal"].sum()
+    renda_total_mensal = df["Renda_Mensal"].sum()
     
     st.markdown(f"""
     **💰 Renda Mensal Total Disponível:** R$ {renda_total_mensal:,.2f}
@@ -1167,7 +1186,7 @@ with tab5:
     # Seleção de estratégia
     estrategia = st.radio(
         "📋 Estratégia de Distribuição:",
-        ["proporcional", "yield_alto", "diversificacao"],
+        list(engine.ESTRATEGIAS),
         format_func=lambda x: {
             "proporcional": "🔄 Proporcional à Renda Gerada",
             "yield_alto": "📈 Priorizar Maior Yield",
@@ -1176,12 +1195,9 @@ with tab5:
         help="Escolha como distribuir os dividendos entre os fundos"
     )
     
-    # Calcular distribuição
-    distribuicao = calcular_distribuicao_reinvestimento(df, estrategia)
-    
-    # Calcular reinvestimento
+    # Calcular distribuição e reinvestimento
     with st.spinner("Calculando reinvestimento..."):
-        df_reinvestimento = calcular_reinvestimento(df, distribuicao, usar_precos_atuais=True)
+        df_reinvestimento = cache.reinvestimento(chave_carteira, estrategia, df)
     
     # Mostrar resultados
     st.markdown("#### 📊 Resultado do Reinvestimento")
@@ -1200,59 +1216,22 @@ with tab5:
         st.metric("Sobra (não utilizada)", f"R$ {total_nao_utilizado:,.2f}")
     
     # Tabela detalhada
-    df_reinvest_display = df_reinvestimento.copy()
-    df_reinvest_display = df_reinvest_display[df_reinvest_display["Cotas_Compradas"] > 0]
+    df_reinvest_display = df_reinvestimento[df_reinvestimento["Cotas_Compradas"] > 0]
     
     if len(df_reinvest_display) > 0:
-        # Selecionar apenas as colunas que queremos exibir (em ordem específica)
-        colunas_exibir = [
-            "Ticker", "Quantidade_Atual", "Valor_Reinvestir", "Preco_Atual",
-            "Cotas_Compradas", "Valor_Utilizado", "Valor_Nao_Utilizado",
-            "Nova_Quantidade", "Preco_Medio_Anterior", "Novo_Preco_Medio"
-        ]
-        
-        # Filtrar apenas colunas que existem no DataFrame
-        colunas_disponiveis = [col for col in colunas_exibir if col in df_reinvest_display.columns]
-        df_reinvest_display = df_reinvest_display[colunas_disponiveis].copy()
-        
-        # Formatação
-        if "Quantidade_Atual" in df_reinvest_display.columns:
-            df_reinvest_display["Quantidade_Atual"] = df_reinvest_display["Quantidade_Atual"].apply(lambda x: f"{x:.0f}")
-        if "Valor_Reinvestir" in df_reinvest_display.columns:
-            df_reinvest_display["Valor_Reinvestir"] = df_reinvest_display["Valor_Reinvestir"].apply(lambda x: f"R$ {x:,.2f}")
-        if "Preco_Atual" in df_reinvest_display.columns:
-            df_reinvest_display["Preco_Atual"] = df_reinvest_display["Preco_Atual"].apply(lambda x: f"R$ {x:,.2f}")
-        if "Cotas_Compradas" in df_reinvest_display.columns:
-            df_reinvest_display["Cotas_Compradas"] = df_reinvest_display["Cotas_Compradas"].apply(lambda x: f"{int(x)}")
-        if "Valor_Utilizado" in df_reinvest_display.columns:
-            df_reinvest_display["Valor_Utilizado"] = df_reinvest_display["Valor_Utilizado"].apply(lambda x: f"R$ {x:,.2f}")
-        if "Valor_Nao_Utilizado" in df_reinvest_display.columns:
-            df_reinvest_display["Valor_Nao_Utilizado"] = df_reinvest_display["Valor_Nao_Utilizado"].apply(lambda x: f"R$ {x:,.2f}")
-        if "Nova_Quantidade" in df_reinvest_display.columns:
-            df_reinvest_display["Nova_Quantidade"] = df_reinvest_display["Nova_Quantidade"].apply(lambda x: f"{x:.0f}")
-        if "Preco_Medio_Anterior" in df_reinvest_display.columns:
-            df_reinvest_display["Preco_Medio_Anterior"] = df_reinvest_display["Preco_Medio_Anterior"].apply(lambda x: f"R$ {x:,.2f}")
-        if "Novo_Preco_Medio" in df_reinvest_display.columns:
-            df_reinvest_display["Novo_Preco_Medio"] = df_reinvest_display["Novo_Preco_Medio"].apply(lambda x: f"R$ {x:,.2f}")
-        
-        # Renomear colunas - mapear exatamente o número de colunas que temos
-        nomes_colunas_map = {
-            "Ticker": "Ticker",
-            "Quantidade_Atual": "Qtd Atual",
-            "Valor_Reinvestir": "Valor Reinvestir",
-            "Preco_Atual": "Preço Atual",
-            "Cotas_Compradas": "Cotas Compradas",
-            "Valor_Utilizado": "Valor Utilizado",
-            "Valor_Nao_Utilizado": "Sobra",
-            "Nova_Quantidade": "Nova Qtd",
-            "Preco_Medio_Anterior": "Preço Médio Ant.",
-            "Novo_Preco_Medio": "Novo Preço Médio"
-        }
-        
-        # Renomear usando dicionário (mais seguro)
-        df_reinvest_display = df_reinvest_display.rename(columns=nomes_colunas_map)
-        
-        st.dataframe(df_reinvest_display, use_container_width=True, hide_index=True)
+        # Colunas exibidas (em ordem específica), formatadas via column_config
+        exibir_tabela(df_reinvest_display, {
+            "Ticker": ("texto", "Ticker"),
+            "Quantidade_Atual": ("qtd", "Qtd Atual"),
+            "Valor_Reinvestir": ("brl", "Valor Reinvestir"),
+            "Preco_Atual": ("brl", "Preço Atual"),
+            "Cotas_Compradas": ("qtd", "Cotas Compradas"),
+            "Valor_Utilizado": ("brl", "Valor Utilizado"),
+            "Valor_Nao_Utilizado": ("brl", "Sobra"),
+            "Nova_Quantidade": ("qtd", "Nova Qtd"),
+            "Preco_Medio_Anterior": ("brl", "Preço Médio Ant."),
+            "Novo_Preco_Medio": ("brl", "Novo Preço Médio")
+        })
     else:
         st.info("ℹ️ Nenhuma cota será comprada com a estratégia selecionada. Ajuste os valores ou tente outra estratégia.")
     
@@ -1315,6 +1294,178 @@ with tab5:
     ⚠️ **Importante**: Após cada reinvestimento mensal, atualize a carteira usando esta ferramenta.
     """)
 
+
+COLUNAS_SIMULACAO = ["Ticker", "Quantidade", "Preco_Medio", "Dividendo_Mensal"]
+
+
+def _posicao_simulada(linha: dict):
+    """(ticker, quantidade, preço, dividendo) de uma linha do editor, ou None se incompleta/inválida"""
+    valores = [linha.get(c) for c in COLUNAS_SIMULACAO]
+    if not valores[0] or any(v is None or pd.isna(v) for v in valores[1:]) or valores[2] <= 0:
+        return None
+    return (str(valores[0]).strip().upper(), float(valores[1]), float(valores[2]), float(valores[3]))
+
+
+def _atualizar_simulacao(estado: dict, base: pd.DataFrame, mudancas: dict):
+    """
+    Aplica no modelo incremental só as linhas que mudaram desde a última execução
+
+    Chaves: índice da linha para posições originais, ("nova", i) para linhas adicionadas
+    """
+    modelo, aplicadas = estado["modelo"], estado["aplicadas"]
+
+    desejadas = {}
+    for linha, campos in mudancas.get("edited_rows", {}).items():
+        original = base.iloc[int(linha)].to_dict()
+        desejadas[int(linha)] = _posicao_simulada({**original, **campos}) or _posicao_simulada(original)
+    for i, campos in enumerate(mudancas.get("added_rows", [])):
+        desejadas[("nova", i)] = _posicao_simulada(campos)
+    for linha in mudancas.get("deleted_rows", []):
+        desejadas[int(linha)] = None
+
+    # Edições desfeitas voltam ao original (ou saem, se eram linhas novas)
+    for chave in [c for c in aplicadas if c not in desejadas]:
+        desejadas[chave] = _posicao_simulada(base.iloc[chave].to_dict()) if isinstance(chave, int) else None
+
+    for chave, posicao in desejadas.items():
+        if aplicadas.get(chave, "original") == posicao:
+            continue
+        if posicao is None:
+            modelo.remover(chave)
+        else:
+            modelo.definir(chave, *posicao)
+        aplicadas[chave] = posicao
+
+
+@st.fragment
+def render_simulacao(metricas: PortfolioMetrics, saude_atual: dict, risco: dict):
+    """Tab 6: simulação "e se" (fragmento; só as posições alteradas são recalculadas)"""
+    st.markdown("#### 🧪 Simulação: e se eu alterar uma posição?")
+    st.caption(
+        "Edite quantidade, preço ou dividendo, adicione ou remova linhas. "
+        "Nada é salvo: a carteira original não muda"
+    )
+
+    base = metricas.frame[COLUNAS_SIMULACAO].reset_index(drop=True)
+    chave_estado = f"simulacao_{cache.hash_carteira(metricas.frame)}"
+
+    # Descartar troca a chave do editor (um editor novo começa sem edições)
+    if st.button("↩️ Descartar alterações", key=f"{chave_estado}_descartar"):
+        rodada = st.session_state.pop(chave_estado)["rodada"] + 1 if chave_estado in st.session_state else 0
+        st.session_state[chave_estado] = {"rodada": rodada}
+
+    estado = st.session_state.setdefault(chave_estado, {"rodada": 0})
+    if "modelo" not in estado:
+        estado.update(modelo=MetricasIncrementais.da_carteira(base), aplicadas={})
+    chave_editor = f"{chave_estado}_editor_{estado['rodada']}"
+
+    st.data_editor(
+        base,
+        key=chave_editor,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config=configurar_colunas({
+            "Ticker": ("texto", "Ticker"),
+            "Quantidade": ("qtd", "Qtd"),
+            "Preco_Medio": ("brl", "Preço Médio"),
+            "Dividendo_Mensal": ("brl", "Dividendo Mensal"),
+        }),
+    )
+    _atualizar_simulacao(estado, base, st.session_state.get(chave_editor, {}))
+
+    modelo = estado["modelo"]
+    atual, simulado = metricas.vetor(), modelo.vetor()
+    # Risco de preço mantido o da carteira atual (pesos do histórico não são resimulados)
+    saude_simulada = analisar_saude_valores({
+        **simulado, **vetor_risco(risco),
+        "subperformantes": ", ".join(modelo.tickers_subperformantes),
+        "maior_setor": modelo.maior_setor,
+    })
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("💰 Patrimônio", f"R$ {simulado['patrimonio']:,.2f}",
+                  delta=f"{simulado['patrimonio'] - atual['patrimonio']:+,.2f}")
+    with col2:
+        st.metric("📥 Renda Mensal", f"R$ {simulado['renda_mensal']:,.2f}",
+                  delta=f"{simulado['renda_mensal'] - atual['renda_mensal']:+,.2f}")
+    with col3:
+        st.metric("📊 Yield Médio", f"{simulado['yield_medio'] * 100:.2f}%",
+                  delta=f"{(simulado['yield_medio'] - atual['yield_medio']) * 100:+.2f} p.p.")
+    with col4:
+        st.metric("🎯 Maior Posição", f"{simulado['max_concentracao']:.1f}%",
+                  delta=f"{simulado['max_concentracao'] - atual['max_concentracao']:+.1f} p.p.",
+                  delta_color="inverse")
+    with col5:
+        st.metric("🩺 Score de Saúde", f"{saude_simulada['score']}/100 ({saude_simulada['status']})",
+                  delta=saude_simulada["score"] - saude_atual["score"])
+
+    titulos_atuais = {a["titulo"] for a in saude_atual["alertas"]}
+    for alerta in saude_simulada["alertas"]:
+        novo = "" if alerta["titulo"] in titulos_atuais else " (novo)"
+        st.warning(f"**{alerta['titulo']}**{novo}: {alerta['mensagem']}")
+
+
+# Tabs para diferentes visualizações
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    "📊 Tabela Interativa", 
+    "🔄 Comparação de Fundos", 
+    "💡 Sugestão de Reinvestimento", 
+    "📈 Análise Comparativa",
+    "💰 Calcular e Aplicar Reinvestimento",
+    "🧪 Simulação"
+])
+
+with tab1:
+    render_tabela_interativa(metricas)
+
+with tab2:
+    render_comparacao_fundos(df_view)
+
+with tab3:
+    render_sugestao_reinvestimento(df_view)
+
+with tab4:
+    render_analise_comparativa(df_view)
+
+with tab5:
+    render_calculo_reinvestimento(df, chave_carteira, carteira_path)
+
+# -------------------------------------------------
+# DADOS DE MERCADO (preenche os placeholders conforme as buscas terminam)
+# -------------------------------------------------
+carga.preencher()
+
+# Depois das buscas: simulação e snapshot usam o risco e a saúde do histórico já atualizado
+risco, saude = risco_e_saude()
+with tab6:
+    render_simulacao(metricas, saude, risco)
+
+# Snapshot para o próximo cold start (valores de mercado que falharam mantêm os anteriores)
+mercado_atual = carga.resultados_obtidos()
+# Histórico de preços e catálogo ficam em data/cache, não no snapshot
+mercado_atual.pop("historico", None)
+mercado_atual.pop("catalogo", None)
+series_snapshot = None
+if "selic" in mercado_atual:
+    series_snapshot = {
+        nome: [b["Valor"] for b in serie]
+        for nome, serie in cache.benchmarks(patrimonio, mercado_atual["selic"] / 100, horizonte).items()
+    }
+try:
+    salvar_snapshot(atualizar_snapshot(
+        snapshot, versao, atualizar_dados_auto, horizonte, metricas, saude, df_proj,
+        series_snapshot, mercado_atual
+    ))
+except OSError:
+    pass  # Disco somente leitura: segue sem warm start
+
+# -------------------------------------------------
+# CACHE (sidebar)
+# -------------------------------------------------
+cache.renderizar_controle_cache()
+
 # -------------------------------------------------
 # FOOTER
 # -------------------------------------------------
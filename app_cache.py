@@ -0,0 +1,236 @@
+"""
+Camada de cache do dashboard (st.cache_data)
+Cada etapa cara é chaveada pelo hash do conteúdo da carteira + parâmetros;
+etapas que dependem do mercado expiram após TTL_MERCADO
+"""
+import functools
+import hashlib
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from core.market_data import obter_indices, calcular_correlacao_carteira_mercado, obter_taxa_selic
+from core.news_analyzer import analisar_sentimento_carteira, buscar_noticias_mercado
+from core.benchmarks import simular_benchmark
+from core.carteira_loader import COLUNAS_OBRIGATORIAS
+from core.carteira_cache import versao_carteira
+from core.historico_precos import atualizar_historico
+from core.catalogo_fiis import atualizar_catalogo, carregar_catalogo
+from core.ingestao_noticias import ingerir_noticias, versao_noticias
+from core.portfolio_metrics import PortfolioMetrics
+from core.shared_cache import cache_compartilhado
+from core.memory_cache import cache_memoria
+
+import engine
+
+TTL_MERCADO = 15 * 60  # 15 minutos
+
+# Estatísticas por etapa (por processo): chamadas totais e execuções reais (misses)
+_chamadas: Counter = Counter()
+_execucoes: Counter = Counter()
+
+
+def estagio(nome: str, ttl: int = None):
+    """
+    Decorador que envolve uma etapa em st.cache_data e contabiliza acertos
+
+    Argumentos com prefixo "_" não entram na chave (padrão do Streamlit),
+    então DataFrames e métricas são passados como `_df`/`_metricas` junto com a
+    `chave` da carteira
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def executar(*args, **kwargs):
+            _execucoes[nome] += 1
+            return func(*args, **kwargs)
+
+        executar_cache = st.cache_data(ttl=ttl, show_spinner=False)(executar)
+
+        @functools.wraps(func)
+        def chamar(*args, **kwargs):
+            _chamadas[nome] += 1
+            return executar_cache(*args, **kwargs)
+
+        chamar.clear = executar_cache.clear
+        return chamar
+    return decorador
+
+
+def hash_carteira(df: pd.DataFrame) -> str:
+    """Hash do conteúdo das posições (Ticker, Quantidade, Preço Médio, Dividendo) e da classificação"""
+    colunas = COLUNAS_OBRIGATORIAS + [c for c in ("Segmento", "Tipo") if c in df.columns]
+    valores = pd.util.hash_pandas_object(df[colunas], index=False).values
+    return hashlib.sha256(valores.tobytes()).hexdigest()[:16]
+
+
+# -------------------------------------------------
+# ETAPAS LOCAIS (dependem só da carteira)
+# -------------------------------------------------
+@estagio("carteira", ttl=TTL_MERCADO)
+def _carteira(versao: str, versao_catalogo: str, atualizar_dados: bool, _conteudo: bytes,
+             _forcar: bool = False) -> pd.DataFrame:
+    return engine.carregar(conteudo=_conteudo, atualizar_dados=atualizar_dados, forcar_atualizacao=_forcar)
+
+
+def carregar_carteira(conteudo: bytes, atualizar_dados: bool, forcar_atualizacao: bool = False) -> pd.DataFrame:
+    """
+    Carteira enriquecida a partir dos bytes do CSV (arquivo padrão ou upload)
+
+    A chave é o hash do conteúdo (e a versão da classificação do catálogo): reenviar
+    ou reexecutar com o mesmo arquivo não reprocessa nada
+    """
+    if forcar_atualizacao:
+        _carteira.clear()  # o próximo acesso recalcula (ignorando o artefato) e volta ao cache
+    return _carteira(versao_carteira(conteudo), carregar_catalogo().versao, atualizar_dados, conteudo,
+                     _forcar=forcar_atualizacao)
+
+
+@estagio("risco")
+def risco_carteira(chave: str, versao_historico: str, _metricas: PortfolioMetrics) -> Optional[Dict]:
+    return engine.risco(_metricas)
+
+
+@estagio("saude")
+def saude_carteira(chave: str, versao_historico: str, _metricas: PortfolioMetrics,
+                   _risco: Optional[Dict] = None) -> Dict:
+    return engine.saude(_metricas, _risco)
+
+
+@estagio("recomendacoes")
+def recomendacoes(chave: str, _metricas: PortfolioMetrics):
+    return engine.recomendacoes(_metricas)
+
+
+@estagio("projecao")
+def projecao(chave: str, horizonte: int, _metricas: PortfolioMetrics) -> pd.DataFrame:
+    return engine.projecao(_metricas, horizonte)
+
+
+@estagio("benchmarks")
+def benchmarks(patrimonio: float, taxa_selic_anual: float, horizonte: int) -> Dict[str, list]:
+    return {
+        "SELIC": simular_benchmark(patrimonio, taxa_selic_anual, horizonte),
+        "IFIX (Estimado)": simular_benchmark(patrimonio, 0.10, horizonte),  # Assumindo ~10% ao ano para IFIX
+        "Poupança": simular_benchmark(patrimonio, 0.085, horizonte)  # ~8.5% ao ano
+    }
+
+
+# -------------------------------------------------
+# ETAPAS DE MERCADO (expiram após TTL_MERCADO)
+# -------------------------------------------------
+@estagio("sentimento", ttl=TTL_MERCADO)
+def sentimento_carteira(tickers: Tuple[str, ...], versao_noticias: int) -> Dict:
+    return analisar_sentimento_carteira(list(tickers))
+
+
+@estagio("noticias", ttl=TTL_MERCADO)
+def noticias_mercado(versao_noticias: int):
+    return buscar_noticias_mercado()
+
+
+def atualizar_noticias() -> int:
+    """
+    Ingestão dos dumps locais, fora do st.cache_data: roda em toda execução (só lê o que
+    é novo) e devolve a versão do arquivo de notícias, que entra na chave das etapas acima
+    """
+    ingerir_noticias()
+    return versao_noticias()
+
+
+def sentimento_atual(tickers: Tuple[str, ...]) -> Dict:
+    return sentimento_carteira(tickers, atualizar_noticias())
+
+
+def noticias_atuais():
+    return noticias_mercado(atualizar_noticias())
+
+
+@estagio("indices", ttl=TTL_MERCADO)
+def indices_mercado() -> Dict:
+    return obter_indices()
+
+
+@estagio("correlacao", ttl=TTL_MERCADO)
+def correlacao_mercado(tickers: Tuple[str, ...]) -> float:
+    return calcular_correlacao_carteira_mercado(list(tickers))
+
+
+@estagio("selic", ttl=TTL_MERCADO)
+def taxa_selic() -> float:
+    return obter_taxa_selic()
+
+
+@estagio("historico", ttl=TTL_MERCADO)
+def historico_precos(tickers: Tuple[str, ...]) -> Dict[str, int]:
+    return atualizar_historico(tickers)
+
+
+@estagio("catalogo", ttl=TTL_MERCADO)
+def catalogo_fiis(tickers: Tuple[str, ...]) -> int:
+    return atualizar_catalogo(tickers)
+
+
+@estagio("reinvestimento", ttl=TTL_MERCADO)
+def reinvestimento(chave: str, estrategia: str, _df: pd.DataFrame) -> pd.DataFrame:
+    return engine.reinvestimento(_df, estrategia, usar_precos_atuais=True)
+
+
+# -------------------------------------------------
+# CONTROLE NA SIDEBAR
+# -------------------------------------------------
+def estatisticas_cache() -> pd.DataFrame:
+    """Chamadas, acertos e taxa de acerto por etapa"""
+    linhas = []
+    for nome in sorted(_chamadas):
+        chamadas = _chamadas[nome]
+        acertos = max(0, chamadas - _execucoes[nome])
+        linhas.append({
+            "Etapa": nome,
+            "Chamadas": chamadas,
+            "Acertos": acertos,
+            "Taxa (%)": (acertos / chamadas) * 100 if chamadas else 0.0
+        })
+    return pd.DataFrame(linhas, columns=["Etapa", "Chamadas", "Acertos", "Taxa (%)"])
+
+
+def processo_frio() -> bool:
+    """True enquanto nenhuma carteira foi carregada neste processo (ou após limpar o cache)"""
+    return _chamadas["carteira"] == 0
+
+
+def limpar_cache():
+    """Limpa todas as etapas cacheadas (inclusive o cache compartilhado) e zera as estatísticas"""
+    st.cache_data.clear()
+    cache_compartilhado.limpar()
+    cache_memoria.limpar()
+    _chamadas.clear()
+    _execucoes.clear()
+
+
+def renderizar_controle_cache():
+    """Expander na sidebar com estatísticas do cache e botão de limpeza"""
+    with st.sidebar.expander("🗄️ Cache"):
+        stats = estatisticas_cache()
+        total = int(stats["Chamadas"].sum())
+        acertos = int(stats["Acertos"].sum())
+        st.caption(f"{acertos}/{total} acertos neste processo")
+        st.dataframe(stats, use_container_width=True, hide_index=True)
+
+        compartilhado = cache_compartilhado.estatisticas()
+        st.caption(
+            f"Compartilhado entre processos: {int(compartilhado['Entradas'].sum())} entradas, "
+            f"{compartilhado['KB'].sum() / 1024:.1f} / {cache_compartilhado.max_bytes / 1024 ** 2:.0f} MB"
+        )
+        st.dataframe(compartilhado, use_container_width=True, hide_index=True)
+
+        memoria = cache_memoria.estatisticas()
+        st.caption(
+            f"Memória do processo: {cache_memoria.bytes / 1024 ** 2:.1f} / "
+            f"{cache_memoria.max_bytes / 1024 ** 2:.0f} MB"
+        )
+        st.dataframe(memoria, use_container_width=True, hide_index=True)
+        if st.button("🧹 Limpar Cache", help="Força recálculo de todas as etapas"):
+            limpar_cache()
+            st.rerun()
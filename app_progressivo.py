@@ -0,0 +1,192 @@
+"""
+Renderização progressiva do dashboard
+As buscas que dependem do mercado (índices, SELIC, notícias) rodam em threads de
+fundo enquanto as seções locais (KPIs, saúde, projeções) renderizam. Cada seção
+de mercado ocupa um placeholder (Espaco) que é preenchido assim que seus dados
+chegam. Se houver valores de uma execução anterior (snapshot), o placeholder
+os exibe com o horário ("valores de ...") até os dados novos chegarem
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+MAX_THREADS = 4  # por sessão
+TIMEOUT_MERCADO = 60  # segundos para todas as buscas de uma execução
+
+_CHAVE_EXECUTOR = "_carga_pool"  # (executor, tamanho)
+_CHAVE_FUTUROS = "_carga_futuros"
+
+
+def _executor_da_sessao(tarefas: int) -> ThreadPoolExecutor:
+    """
+    Pool de threads da sessão atual, com até uma thread por busca (máx. MAX_THREADS)
+
+    Um pool por sessão evita que buscas lentas de uma sessão ocupem as threads das
+    outras; as threads terminam quando a sessão (e seu session_state) é descartada
+    """
+    tamanho = max(1, min(MAX_THREADS, tarefas))
+    executor, tamanho_atual = st.session_state.get(_CHAVE_EXECUTOR, (None, 0))
+    if executor is None or tamanho_atual < tamanho:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        executor = ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix="mercado")
+        st.session_state[_CHAVE_EXECUTOR] = (executor, tamanho)
+    return executor
+
+
+def _cancelar(futuros) -> None:
+    """Cancela as buscas que ainda não começaram (as em andamento terminam sozinhas)"""
+    for futuro in futuros:
+        futuro.cancel()
+
+
+def _no_contexto(func: Callable, ctx) -> Callable:
+    """Executa func com o contexto da sessão atual (st.cache_data e avisos do Streamlit)"""
+    def executar(*args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args)
+    return executar
+
+
+class Espaco:
+    """
+    Lugar de uma seção com conteúdo provisório substituível
+
+    Provisório e definitivo ficam em posições distintas de um mesmo container:
+    redesenhar o mesmo st.empty com outro container na mesma execução faria o
+    novo bloco herdar os filhos do anterior (o Streamlit reaproveita blocos do
+    mesmo tipo no mesmo caminho)
+    """
+
+    def __init__(self):
+        caixa = st.container()
+        self._provisorio = caixa.empty()
+        self._definitivo = caixa.empty()
+
+    def provisorio(self):
+        """Placeholder do conteúdo provisório (mensagem de carga ou valores anteriores)"""
+        return self._provisorio
+
+    def definitivo(self):
+        """Descarta o provisório e retorna o container do conteúdo definitivo"""
+        self._provisorio.empty()
+        return self._definitivo.container()
+
+    def limpar(self):
+        self._provisorio.empty()
+        self._definitivo.empty()
+
+
+class _ValoresProvisorios:
+    """Mesma interface de CargaProgressiva.resultado, servindo valores já conhecidos"""
+    provisorio = True
+
+    def __init__(self, valores: Dict[str, Any]):
+        self.valores = valores
+
+    def resultado(self, nome: str):
+        return self.valores[nome]
+
+
+class CargaProgressiva:
+    """
+    Buscas de mercado em segundo plano + seções que aguardam por elas
+
+    Uso:
+        carga = CargaProgressiva({"indices": (cache.indices_mercado,)})
+        carga.secao(["indices"], render_indices)   # placeholder no lugar da seção
+        ...                                         # seções locais renderizam sem esperar
+        carga.preencher()                           # completa as seções conforme os dados chegam
+
+    Com progressivo=False cada seção é renderizada no lugar, esperando seus dados
+    (comportamento sequencial)
+
+    Uma seção pode ser desenhada duas vezes na mesma execução (valores provisórios e
+    depois os novos): elementos com chave própria devem diferenciá-las por
+    `carga.provisorio`
+    """
+    provisorio = False
+
+    def __init__(self, tarefas: Dict[str, tuple], progressivo: bool = True):
+        ctx = get_script_run_ctx()
+        self.progressivo = progressivo
+        self.prazo = time.monotonic() + TIMEOUT_MERCADO
+
+        # Uma nova execução da sessão torna obsoletas as buscas ainda na fila da anterior
+        _cancelar(st.session_state.get(_CHAVE_FUTUROS, ()))
+        executor = _executor_da_sessao(len(tarefas))
+        self.futuros: Dict[str, Future] = {
+            nome: executor.submit(_no_contexto(func, ctx), *args)
+            for nome, (func, *args) in tarefas.items()
+        }
+        st.session_state[_CHAVE_FUTUROS] = list(self.futuros.values())
+        self._pendentes: List[tuple] = []
+
+    def _restante(self) -> float:
+        return max(0.0, self.prazo - time.monotonic())
+
+    def resultado(self, nome: str):
+        """Resultado da busca `nome`; propaga a exceção da busca ou TimeoutError após o prazo"""
+        futuro = self.futuros[nome]
+        if futuro.cancelled():  # cancelada no fim do prazo
+            raise TimeoutError(f"Busca '{nome}' excedeu {TIMEOUT_MERCADO}s")
+        return futuro.result(timeout=self._restante())
+
+    def resultados_obtidos(self) -> Dict[str, Any]:
+        """Resultados das buscas que já terminaram sem erro"""
+        return {
+            nome: futuro.result()
+            for nome, futuro in self.futuros.items()
+            if futuro.done() and not futuro.cancelled() and futuro.exception() is None
+        }
+
+    def secao(self, nomes: List[str], renderizar: Callable,
+              mensagem: str = "⏳ Carregando dados de mercado...",
+              provisorio: Optional[Dict[str, Any]] = None, rotulo: str = ""):
+        """
+        Reserva o lugar de uma seção de mercado
+
+        Args:
+            nomes: buscas das quais a seção depende
+            renderizar: função(carga) que desenha a seção usando carga.resultado(...)
+            mensagem: texto exibido enquanto os dados não chegam
+            provisorio: valores anteriores para `nomes` (exibidos até os novos chegarem)
+            rotulo: legenda dos valores provisórios (ex: "valores de 19/10 14:32")
+        """
+        espaco = Espaco()
+        if not self.progressivo:
+            with espaco.definitivo():
+                renderizar(self)
+            return
+
+        if provisorio is not None and all(n in provisorio for n in nomes):
+            with espaco.provisorio().container():
+                st.caption(f"🕒 {rotulo} — atualizando...")
+                renderizar(_ValoresProvisorios(provisorio))
+        else:
+            espaco.provisorio().info(mensagem)
+        self._pendentes.append((espaco, [self.futuros[n] for n in nomes], renderizar))
+
+    def preencher(self):
+        """Renderiza as seções pendentes na ordem em que seus dados ficam prontos"""
+        while self._pendentes:
+            prontas = [p for p in self._pendentes if all(f.done() for f in p[1])]
+
+            if not prontas:
+                aguardando = {f for _, futuros, _ in self._pendentes for f in futuros if not f.done()}
+                feitos, _ = wait(aguardando, timeout=self._restante(), return_when=FIRST_COMPLETED)
+                if feitos:
+                    continue
+                # Prazo esgotado: libera a fila e as seções restantes exibem o próprio aviso de erro
+                _cancelar(aguardando)
+                prontas = list(self._pendentes)
+
+            for pendente in prontas:
+                espaco, _, renderizar = pendente
+                with espaco.definitivo():
+                    renderizar(self)
+                self._pendentes.remove(pendente)
@@ -1,23 +1,105 @@
+from functools import lru_cache
+
+import numpy as np
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
-def grafico_projecao(df, titulo="Projeção de Renda Mensal"):
+# Orçamento de pontos por trace (~largura útil do gráfico em pixels)
+PONTOS_MAX = 1500
+# Acima deste número de pontos, usar traces WebGL (Scattergl) em vez de SVG
+LIMITE_WEBGL = 1000
+
+
+# -------------------------------------------------
+# Redução de pontos (LTTB)
+# -------------------------------------------------
+def _como_float(valores):
+    arr = np.asarray(valores)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return arr.astype(float)
+
+
+def lttb(x, y, limite=PONTOS_MAX):
+    """
+    Largest-Triangle-Three-Buckets: índices de até `limite` pontos que preservam
+    a forma visual da série (picos e vales). Primeiro e último pontos são mantidos
+    """
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    xs = _como_float(x)
+    ys = _como_float(y)
+
+    # limite - 2 buckets entre o primeiro e o último ponto
+    bordas = np.linspace(1, n - 1, limite - 1).astype(int)
+    indices = np.empty(limite, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    anterior = 0
+    for i in range(limite - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        prox_fim = bordas[i + 2] if i + 2 < len(bordas) else n
+
+        # Vértice "C" do triângulo: média do próximo bucket
+        media_x = xs[fim:prox_fim].mean()
+        media_y = ys[fim:prox_fim].mean()
+
+        ax, ay = xs[anterior], ys[anterior]
+        areas = np.abs((ax - media_x) * (ys[ini:fim] - ay) - (ax - xs[ini:fim]) * (media_y - ay))
+
+        anterior = ini + int(areas.argmax())
+        indices[i + 1] = anterior
+
+    return indices
+
+
+def reduzir_serie(x, y, limite=PONTOS_MAX):
+    """Retorna (x, y) reduzidos por LTTB para caber no orçamento de pontos"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    idx = lttb(x, y, limite)
+    return x[idx], y[idx]
+
+
+# -------------------------------------------------
+# Esqueletos de figura em cache
+# -------------------------------------------------
+def _tipo_scatter(n_pontos):
+    return go.Scattergl if n_pontos > LIMITE_WEBGL else go.Scatter
+
+
+def _com_dados(esqueleto, series, limite=PONTOS_MAX):
+    """
+    Figura nova a partir do esqueleto em cache, com os arrays x/y após redução LTTB
+
+    go.Figure copia o dicionário (o esqueleto não é alterado, sem deepcopy); o cache
+    evita refazer make_subplots/add_trace/update_layout, cerca de metade do custo
+    """
+    fig = go.Figure(esqueleto, skip_invalid=True)
+    with fig.batch_update():
+        for trace, (x, y) in zip(fig.data, series):
+            trace.x, trace.y = reduzir_serie(x, y, limite)
+    return fig
+
+
+@lru_cache(maxsize=32)
+def _esqueleto_projecao(titulo, webgl):
+    Trace = go.Scattergl if webgl else go.Scatter
     fig = go.Figure()
 
     # Linha base (renda atual sem crescimento)
-    fig.add_trace(go.Scatter(
-        x=df["mes"],
-        y=df["renda_base"],
+    fig.add_trace(Trace(
         mode="lines",
         name="Renda Atual",
         line=dict(color="#E10600", width=2, dash="dash"),
         hovertemplate="Mês %{x}<br>R$ %{y:,.2f}<extra></extra>"
     ))
 
-    # Linha projetada
-    fig.add_trace(go.Scatter(
-        x=df["mes"],
-        y=df["renda_projetada"],
-        mode="lines+markers",
+    # Linha projetada (marcadores só quando há poucos pontos)
+    fig.add_trace(Trace(
+        mode="lines" if webgl else "lines+markers",
         name="Renda Projetada",
         line=dict(color="#00C853", width=3),
         marker=dict(size=6),
@@ -49,4 +131,109 @@ def grafico_projecao(df, titulo="Projeção de Renda Mensal"):
         )
     )
 
-    return fig
+    return fig.to_dict()
+
+
+def grafico_projecao(df, titulo="Projeção de Renda Mensal"):
+    webgl = _tipo_scatter(len(df)) is go.Scattergl
+    return _com_dados(_esqueleto_projecao(titulo, webgl), [
+        (df["mes"], df["renda_base"]),
+        (df["mes"], df["renda_projetada"]),
+    ])
+
+
+@lru_cache(maxsize=32)
+def _esqueleto_crescimento(template, webgl):
+    Trace = go.Scattergl if webgl else go.Scatter
+    modo = "lines" if webgl else "lines+markers"
+
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=("Renda Mensal Projetada", "Patrimônio Projetado"),
+        vertical_spacing=0.15,
+        row_heights=[0.5, 0.5]
+    )
+
+    fig.add_trace(
+        Trace(
+            mode=modo,
+            name="Renda Mensal",
+            line=dict(color="#2E86AB", width=3),
+            marker=dict(size=4)
+        ),
+        row=1, col=1
+    )
+
+    fig.add_trace(
+        Trace(
+            mode=modo,
+            name="Patrimônio",
+            line=dict(color="#A23B72", width=3),
+            marker=dict(size=4)
+        ),
+        row=2, col=1
+    )
+
+    fig.update_xaxes(title_text="Mês", row=2, col=1)
+    fig.update_yaxes(title_text="R$", row=1, col=1)
+    fig.update_yaxes(title_text="R$", row=2, col=1)
+    fig.update_layout(
+        height=700,
+        showlegend=True,
+        hovermode="x unified",
+        template=template
+    )
+
+    return fig.to_dict()
+
+
+def grafico_crescimento(df_proj, template="plotly_dark"):
+    """Projeção de renda e patrimônio (2 painéis) a partir de projetar_crescimento()"""
+    webgl = _tipo_scatter(len(df_proj)) is go.Scattergl
+    return _com_dados(_esqueleto_crescimento(template, webgl), [
+        (df_proj["Mês"], df_proj["Renda Mensal Projetada"]),
+        (df_proj["Mês"], df_proj["Patrimônio Projetado"]),
+    ])
+
+
+# Estilo de cada série do gráfico de benchmarks
+_ESTILOS_BENCHMARK = [
+    dict(color="#2E86AB", width=3),
+    dict(color="#A23B72", width=2, dash="dash"),
+    dict(color="#F18F01", width=2, dash="dot"),
+    dict(color="#C73E1D", width=2, dash="dashdot"),
+]
+
+
+@lru_cache(maxsize=32)
+def _esqueleto_benchmarks(nomes, template, webgl):
+    Trace = go.Scattergl if webgl else go.Scatter
+    fig = go.Figure()
+
+    for nome, estilo in zip(nomes, _ESTILOS_BENCHMARK):
+        fig.add_trace(Trace(mode="lines", name=nome, line=estilo))
+
+    fig.update_layout(
+        title="Crescimento do Patrimônio: Carteira vs Benchmarks",
+        xaxis_title="Mês",
+        yaxis_title="Patrimônio (R$)",
+        hovermode="x unified",
+        height=500,
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
+        template=template
+    )
+
+    return fig.to_dict()
+
+
+def grafico_benchmarks(x, series, template="plotly_dark"):
+    """
+    Carteira vs benchmarks
+
+    Args:
+        x: eixo comum (meses)
+        series: dict {nome exibido: valores}, na ordem carteira, SELIC, IFIX, poupança
+    """
+    webgl = _tipo_scatter(len(x)) is go.Scattergl
+    esqueleto = _esqueleto_benchmarks(tuple(series), template, webgl)
+    return _com_dados(esqueleto, [(x, valores) for valores in series.values()])
@@ -0,0 +1,126 @@
+"""
+Cache colunar da carteira enriquecida (Arrow IPC)
+Materializa carteira + dados de mercado + métricas derivadas em um arquivo
+que pode ser aberto via memory-map pelo app e pelo worker sem recalcular
+"""
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+DIRETORIO_CACHE = Path("data/cache")
+MAX_ARTEFATOS = 20
+
+
+def versao_carteira(conteudo: bytes) -> str:
+    """Versão da carteira: hash do conteúdo bruto do CSV de posições"""
+    return hashlib.sha256(conteudo).hexdigest()[:16]
+
+
+def id_snapshot_mercado(usa_mercado: bool, data: Optional[datetime] = None) -> str:
+    """
+    Identificador do snapshot de mercado usado no enriquecimento
+
+    Carteiras sem atualização de mercado usam "local". Com dados de mercado,
+    o snapshot é diário (preços de fechamento e dividendos mudam no máximo 1x/dia)
+    """
+    if not usa_mercado:
+        return "local"
+    return (data or datetime.now()).strftime("%Y%m%d")
+
+
+def caminho_artefato(versao: str, snapshot: str) -> Path:
+    """Caminho do artefato Arrow para (versão da carteira, snapshot de mercado)"""
+    return DIRETORIO_CACHE / f"carteira_{versao}_{snapshot}.arrow"
+
+
+def salvar_carteira_enriquecida(df: pd.DataFrame, versao: str, snapshot: str) -> Path:
+    """
+    Grava a carteira enriquecida em Arrow IPC (sem compressão, memory-mappable)
+
+    A escrita é atômica: grava em arquivo temporário e renomeia
+    """
+    DIRETORIO_CACHE.mkdir(parents=True, exist_ok=True)
+    destino = caminho_artefato(versao, snapshot)
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        b"versao_carteira": versao.encode(),
+        b"snapshot_mercado": snapshot.encode(),
+        b"gerado_em": datetime.now().isoformat().encode(),
+    })
+
+    tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with ipc.new_file(sink, tabela.schema) as writer:
+            writer.write_table(tabela)
+    os.replace(tmp, destino)
+
+    _podar_artefatos()
+    return destino
+
+
+def abrir_tabela_enriquecida(versao: str, snapshot: str) -> Optional[pa.Table]:
+    """Abre o artefato via memory-map (zero-copy). Retorna None se não existir"""
+    caminho = caminho_artefato(versao, snapshot)
+    if not caminho.exists():
+        return None
+    try:
+        return ipc.open_file(pa.memory_map(str(caminho), "r")).read_all()
+    except (pa.ArrowInvalid, OSError):
+        # Artefato corrompido ou incompleto: ignora e deixa ser regenerado
+        return None
+
+
+def abrir_carteira_enriquecida(versao: str, snapshot: str) -> Optional[pd.DataFrame]:
+    """Abre o artefato como DataFrame, reaproveitando os buffers mapeados"""
+    tabela = abrir_tabela_enriquecida(versao, snapshot)
+    if tabela is None:
+        return None
+    return tabela.to_pandas(split_blocks=True)
+
+
+def abrir_ultima_carteira_enriquecida(caminho_csv: str = "data/carteira.csv") -> Optional[pd.DataFrame]:
+    """
+    Abre o artefato mais recente da carteira em caminho_csv, qualquer que seja o snapshot
+    de mercado (mas com a classificação atual do catálogo)
+    Útil para processos que não buscam mercado (ex: worker.py)
+    """
+    from core.catalogo_fiis import carregar_catalogo  # importação tardia (o catálogo importa este módulo)
+
+    caminho = Path(caminho_csv)
+    if not caminho.exists():
+        return None
+
+    versao = versao_carteira(caminho.read_bytes())
+    candidatos = sorted(
+        DIRETORIO_CACHE.glob(f"carteira_{versao}_*-{carregar_catalogo().versao}.arrow"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for artefato in candidatos:
+        snapshot = artefato.stem.split("_", 2)[2]
+        df = abrir_carteira_enriquecida(versao, snapshot)
+        if df is not None:
+            return df
+    return None
+
+
+def _podar_artefatos(manter: int = MAX_ARTEFATOS):
+    """Remove os artefatos mais antigos, mantendo apenas os `manter` mais recentes"""
+    artefatos = sorted(
+        DIRETORIO_CACHE.glob("carteira_*.arrow"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for antigo in artefatos[manter:]:
+        try:
+            antigo.unlink()
+        except OSError:
+            continue
@@ -3,18 +3,112 @@ Módulo avançado para carregar carteira de múltiplas fontes
 Suporta: CSV, Google Sheets, e dados automáticos do mercado
 """
 import pandas as pd
-import yfinance as yf
 from typing import Optional, Dict
 from pathlib import Path
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from core.carteira_cache import (
+    versao_carteira, id_snapshot_mercado,
+    abrir_carteira_enriquecida, salvar_carteira_enriquecida
+)
+from core.portfolio_metrics import COLUNAS_OBRIGATORIAS, enriquecer_carteira
+from core.catalogo_fiis import carregar_catalogo
+from core.market_data import TTL_MERCADO
+from core.shared_cache import compartilhado
+
+COLUNAS_SIMPLIFICADAS = {"Ticker", "Quantidade"}
+
+# Tipos explícitos: evita inferência de tipos e garante colunas numéricas em float
+DTYPES_CARTEIRA = {
+    "Ticker": str,
+    "Quantidade": "float64",
+    "Preco_Medio": "float64",
+    "Dividendo_Mensal": "float64",
+}
 
 def carregar_carteira_csv(caminho: str = "data/carteira.csv") -> pd.DataFrame:
     """Carrega carteira de arquivo CSV"""
-    return pd.read_csv(caminho)
+    return pd.read_csv(caminho, dtype=DTYPES_CARTEIRA)
+
+
+def ler_carteira_csv(conteudo: bytes) -> pd.DataFrame:
+    """Carrega carteira direto do conteúdo em memória (ex: arquivo enviado no upload)"""
+    return pd.read_csv(io.BytesIO(conteudo), dtype=DTYPES_CARTEIRA)
+
+
+def colunas_csv(conteudo: bytes) -> list:
+    """Lê apenas o cabeçalho do CSV em memória"""
+    return pd.read_csv(io.BytesIO(conteudo), nrows=0).columns.tolist()
+
+
+@compartilhado("mercado", ttl=TTL_MERCADO, cachear_se=bool)
+def _dados_mercado_ticker(ticker: str, atualizar_precos: bool, atualizar_dividendos: bool) -> Dict:
+    """
+    Preço atual e dividendo mensal de um FII via Yahoo Finance
+
+    Erros de rede se propagam (e não são cacheados); campos não encontrados ficam ausentes
+    """
+    import yfinance as yf  # importação tardia: só quem atualiza mercado paga o custo
+
+    t = yf.Ticker(f"{ticker}.SA")
+    catalogo = carregar_catalogo()  # DY e cotação de referência sem a chamada lenta ao `.info`
+    dados = {}
+
+    # Obter preço atual
+    if atualizar_precos:
+        hist = t.history(period="1d")
+        if len(hist) > 0:
+            dados["preco"] = hist["Close"].iloc[-1]
+
+    # Obter dividend yield e calcular dividendo mensal
+    if atualizar_dividendos:
+        dy = catalogo.valor(ticker, "DY_Anual", 0)
+        if dy > 0:
+            preco_ref = dados.get("preco", catalogo.valor(ticker, "Preco", 0))
+            if preco_ref and preco_ref > 0:
+                # Dividendo mensal = (DY anual / 12) * preço
+                dados["dividendo"] = (dy / 12) * preco_ref
+
+        # Alternativa: buscar últimos dividendos pagos
+        try:
+            div_history = t.dividends
+            if len(div_history) > 0:
+                # Média dos últimos 3 dividendos pagos (geralmente mensais para FIIs)
+                div_recentes = div_history.tail(3).mean()
+                if div_recentes > 0:
+                    dados["dividendo"] = div_recentes
+        except:
+            pass
+
+    return dados
+
+
+def buscar_dados_mercado(tickers, atualizar_precos: bool = True, atualizar_dividendos: bool = True,
+                         threads: int = 1) -> Dict[str, Dict]:
+    """
+    Dados de mercado de vários tickers ({ticker: {"preco", "dividendo"}})
+
+    Tickers cuja busca falhou ficam com {}. Com threads > 1 as buscas (I/O) rodam em paralelo
+    """
+    def buscar(ticker: str) -> Dict:
+        try:
+            return _dados_mercado_ticker(ticker, atualizar_precos, atualizar_dividendos)
+        except Exception as e:
+            print(f"Erro ao atualizar {ticker}: {e}")
+            return {}
+
+    tickers = list(dict.fromkeys(tickers))
+    if threads <= 1 or len(tickers) <= 1:
+        return {ticker: buscar(ticker) for ticker in tickers}
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return dict(zip(tickers, executor.map(buscar, tickers)))
 
 
 def atualizar_dados_mercado(df_carteira: pd.DataFrame, atualizar_precos: bool = True, 
-                            atualizar_dividendos: bool = True) -> pd.DataFrame:
+                            atualizar_dividendos: bool = True,
+                            dados_mercado: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
     """
     Atualiza preços atuais e dividendos dos FIIs via Yahoo Finance
     
@@ -22,6 +116,8 @@ def atualizar_dados_mercado(df_carteira: pd.DataFrame, atualizar_precos: bool =
         df_carteira: DataFrame com colunas: Ticker, Quantidade, Preco_Medio (opcional), Dividendo_Mensal (opcional)
         atualizar_precos: Se True, atualiza preços atuais
         atualizar_dividendos: Se True, busca dividendos recentes
+        dados_mercado: Dados já buscados por ticker (ex: processamento em lote);
+            tickers ausentes são buscados normalmente
     
     Returns:
         DataFrame atualizado
@@ -35,42 +131,18 @@ def atualizar_dados_mercado(df_carteira: pd.DataFrame, atualizar_precos: bool =
     precos_atuais = {}
     dividendos_mensais = {}
     
-    for ticker in df["Ticker"].unique():
-        try:
-            t = yf.Ticker(f"{ticker}.SA")
-            info = t.info
-            
-            # Obter preço atual
-            if atualizar_precos:
-                hist = t.history(period="1d")
-                if len(hist) > 0:
-                    preco_atual = hist["Close"].iloc[-1]
-                    precos_atuais[ticker] = preco_atual
-            
-            # Obter dividend yield e calcular dividendo mensal
-            if atualizar_dividendos:
-                dy = info.get("dividendYield", 0)
-                if dy and dy > 0:
-                    preco_ref = precos_atuais.get(ticker, info.get("regularMarketPrice", 0))
-                    if preco_ref and preco_ref > 0:
-                        # Dividendo mensal = (DY anual / 12) * preço
-                        dividendo_mensal = (dy / 12) * preco_ref
-                        dividendos_mensais[ticker] = dividendo_mensal
-                
-                # Alternativa: buscar últimos dividendos pagos
-                try:
-                    div_history = t.dividends
-                    if len(div_history) > 0:
-                        # Média dos últimos 3 dividendos pagos (geralmente mensais para FIIs)
-                        div_recentes = div_history.tail(3).mean()
-                        if div_recentes > 0:
-                            dividendos_mensais[ticker] = div_recentes
-                except:
-                    pass
-                    
-        except Exception as e:
-            print(f"Erro ao atualizar {ticker}: {e}")
-            continue
+    tickers = df["Ticker"].unique()
+    conhecidos = dados_mercado or {}
+    buscados = buscar_dados_mercado(
+        [t for t in tickers if t not in conhecidos], atualizar_precos, atualizar_dividendos
+    )
+    
+    for ticker in tickers:
+        dados = conhecidos[ticker] if ticker in conhecidos else buscados[ticker]
+        if "preco" in dados:
+            precos_atuais[ticker] = dados["preco"]
+        if "dividendo" in dados:
+            dividendos_mensais[ticker] = dados["dividendo"]
     
     # Atualizar DataFrame
     if atualizar_precos and precos_atuais:
@@ -107,13 +179,20 @@ def carregar_carteira_completa(caminho_csv: Optional[str] = None,
     
     # Carregar CSV base
     df = carregar_carteira_csv(caminho_csv)
-    
+    return _preparar_carteira(df, atualizar_dados, usar_preco_medio)
+
+
+def _preparar_carteira(df: pd.DataFrame, atualizar_dados: bool,
+                       usar_preco_medio: bool,
+                       dados_mercado: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
+    """Atualiza dados de mercado (se solicitado) e garante as colunas necessárias"""
     # Atualizar dados do mercado se solicitado
     if atualizar_dados:
         df = atualizar_dados_mercado(
             df, 
             atualizar_precos=not usar_preco_medio,
-            atualizar_dividendos=True
+            atualizar_dividendos=True,
+            dados_mercado=dados_mercado
         )
     
     # Garantir colunas necessárias
@@ -132,6 +211,59 @@ def carregar_carteira_completa(caminho_csv: Optional[str] = None,
     return df
 
 
+def carteira_simplificada(colunas) -> bool:
+    """True se o CSV tem apenas Ticker e Quantidade (precisa de dados de mercado)"""
+    return set(colunas) <= COLUNAS_SIMPLIFICADAS
+
+
+def carregar_carteira_enriquecida(caminho_csv: Optional[str] = None,
+                                  atualizar_dados: bool = False,
+                                  forcar_atualizacao: bool = False,
+                                  conteudo: Optional[bytes] = None,
+                                  dados_mercado: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
+    """
+    Carrega a carteira já enriquecida, reutilizando o artefato Arrow em data/cache
+    
+    O artefato é chaveado por (versão do CSV, snapshot de mercado + versão da
+    classificação do catálogo, já que Segmento e Tipo ficam gravados nele).
+    CSVs simplificados (apenas Ticker e Quantidade) sempre usam dados de mercado.
+    
+    Args:
+        caminho_csv: Caminho para arquivo CSV. Se None, usa data/carteira.csv
+        atualizar_dados: Se True, busca preços e dividendos atuais do mercado
+        forcar_atualizacao: Se True, ignora o artefato existente e recalcula
+        conteudo: Bytes do CSV já em memória (ex: upload). Se informado, caminho_csv é ignorado
+        dados_mercado: Dados de mercado já buscados por ticker (ver atualizar_dados_mercado)
+    
+    Returns:
+        DataFrame da carteira com todas as colunas derivadas
+    """
+    if conteudo is None:
+        conteudo = Path(caminho_csv or "data/carteira.csv").read_bytes()
+    
+    df = ler_carteira_csv(conteudo)
+    usa_mercado = atualizar_dados or carteira_simplificada(df.columns)
+    
+    versao = versao_carteira(conteudo)
+    snapshot = f"{id_snapshot_mercado(usa_mercado)}-{carregar_catalogo().versao}"
+    
+    if not forcar_atualizacao:
+        df_cache = abrir_carteira_enriquecida(versao, snapshot)
+        if df_cache is not None:
+            return df_cache
+    
+    df = _preparar_carteira(df, atualizar_dados=usa_mercado, usar_preco_medio=False,
+                            dados_mercado=dados_mercado)
+    
+    for c in COLUNAS_OBRIGATORIAS:
+        if c not in df.columns:
+            raise ValueError(f"Coluna obrigatória ausente: {c}")
+    
+    df = enriquecer_carteira(df)
+    salvar_carteira_enriquecida(df, versao, snapshot)
+    return df
+
+
 def carregar_carteira_minima(tickers_quantidades: Dict[str, float], 
                              atualizar_dados: bool = True) -> pd.DataFrame:
     """
@@ -0,0 +1,249 @@
+"""
+Catálogo local de metadados dos FIIs
+Classificação (segmento, tijolo/papel/híbrido, gestor) vem de config/catalogo_fiis.csv;
+dados que mudam (cotas emitidas, VP por cota, DY, cotação) vêm do Yahoo Finance
+(`.info`, o endpoint mais lento) e são atualizados periodicamente, não a cada consulta
+
+O catálogo completo fica em um Parquet com colunas categóricas, é lido uma vez por
+processo (relido só quando o arquivo muda) e responde consultas por ticker em O(1)
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.carteira_cache import DIRETORIO_CACHE
+
+ARQUIVO_BASE = Path("config/catalogo_fiis.csv")
+ARQUIVO_CATALOGO = DIRETORIO_CACHE / "catalogo_fiis.parquet"
+IDADE_MAXIMA = timedelta(days=7)  # tickers buscados há mais tempo que isso são rebuscados
+
+SEM_CLASSIFICACAO = "Não classificado"
+COLUNAS_CLASSIFICACAO = ("Segmento", "Tipo", "Gestor")
+COLUNAS_MERCADO = ("Cotas_Emitidas", "VP_Cota", "DY_Anual", "Preco")
+# Última busca com sucesso / última tentativa (falhas também esperam IDADE_MAXIMA)
+COLUNAS_DATA = ("Atualizado_Em", "Buscado_Em")
+
+# Campo do Yahoo Finance (.info) de cada coluna de mercado
+_CAMPOS_INFO = {
+    "Cotas_Emitidas": "sharesOutstanding",
+    "VP_Cota": "bookValue",
+    "DY_Anual": "dividendYield",  # fração anual, como em carteira_loader
+    "Preco": "regularMarketPrice",
+}
+
+
+class Catalogo:
+    """Tabela de metadados indexada por ticker, com cada coluna em uma lista para consulta direta"""
+
+    def __init__(self, tabela: pd.DataFrame):
+        self.tabela = tabela
+        self._linha = {ticker: i for i, ticker in enumerate(tabela.index)}
+        self._colunas = {coluna: tabela[coluna].tolist() for coluna in tabela.columns}  # tipos Python
+        # Classificação com SEM_CLASSIFICACAO no fim: a posição -1 (ticker ausente) cai nele
+        self._classificacao = {
+            coluna: np.append(tabela[coluna].to_numpy(dtype=object), SEM_CLASSIFICACAO)
+            for coluna in COLUNAS_CLASSIFICACAO
+        }
+        self.versao = self._versao_classificacao()
+
+    def _versao_classificacao(self) -> str:
+        """
+        Hash do Segmento/Tipo dos fundos classificados
+
+        Vai na chave de quem guarda a classificação já aplicada (artefato da carteira,
+        caches do dashboard); atualizar só os dados de mercado não muda a versão
+        """
+        if not len(self.tabela):
+            return "vazio"
+        colunas = self.tabela.reindex(columns=["Segmento", "Tipo"]).astype(object)
+        classificados = colunas[(colunas != SEM_CLASSIFICACAO).any(axis=1)].sort_index()
+        return hashlib.sha256(classificados.to_csv().encode()).hexdigest()[:8]
+
+    def __len__(self) -> int:
+        return len(self._linha)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._linha
+
+    def valor(self, ticker: str, coluna: str, padrao: Any = None) -> Any:
+        """Um campo de `ticker` (padrão se o ticker não existir ou o campo estiver vazio)"""
+        i = self._linha.get(ticker)
+        if i is None:
+            return padrao
+        valor = self._colunas[coluna][i]
+        return padrao if pd.isna(valor) else valor
+
+    def obter(self, ticker: str) -> Optional[Dict]:
+        """Todos os campos de `ticker` (None se não estiver no catálogo)"""
+        if ticker not in self._linha:
+            return None
+        return {coluna: self.valor(ticker, coluna) for coluna in self._colunas}
+
+    def classificar(self, tickers: Iterable[str]) -> pd.DataFrame:
+        """
+        Segmento, Tipo e Gestor de vários tickers de uma vez (mesma ordem de `tickers`)
+
+        Tickers fora do catálogo ficam como SEM_CLASSIFICACAO
+        """
+        tickers = pd.Index(list(tickers), name="Ticker")
+        posicoes = self.tabela.index.get_indexer(tickers)
+        return pd.DataFrame(
+            {coluna: valores[posicoes] for coluna, valores in self._classificacao.items()},
+            index=tickers
+        )
+
+    def desatualizados(self, tickers: Iterable[str], agora: Optional[datetime] = None) -> List[str]:
+        """Tickers ausentes do catálogo ou cuja última busca (mesmo falha) é mais velha que IDADE_MAXIMA"""
+        limite = (agora or datetime.now()) - IDADE_MAXIMA
+        return [
+            ticker for ticker in dict.fromkeys(tickers)
+            if (buscado := self.valor(ticker, "Buscado_Em")) is None or buscado < limite
+        ]
+
+
+# -------------------------------------------------
+# Leitura
+# -------------------------------------------------
+def _tabela_base() -> pd.DataFrame:
+    """Classificação mantida à mão (config/catalogo_fiis.csv)"""
+    try:
+        base = pd.read_csv(ARQUIVO_BASE, dtype=str)
+    except OSError:
+        base = pd.DataFrame(columns=["Ticker", "Nome", *COLUNAS_CLASSIFICACAO])
+    return base.drop_duplicates("Ticker", keep="last").set_index("Ticker")
+
+
+def _montar(base: pd.DataFrame, gravado: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Catálogo = classificação da base + dados de mercado gravados
+
+    A base prevalece na classificação (edições no CSV valem sem esperar a atualização);
+    tickers só do arquivo gravado (ex: fora da base, vindos da carteira) são mantidos
+    """
+    tabela = base.reindex(columns=["Nome", *COLUNAS_CLASSIFICACAO])
+    if gravado is not None and len(gravado):
+        extras = gravado.index.difference(tabela.index)
+        tabela = pd.concat([tabela, gravado.loc[extras, tabela.columns]])
+        mercado = gravado.reindex(tabela.index)
+        tabela["Nome"] = tabela["Nome"].fillna(mercado["Nome"])
+    else:
+        mercado = pd.DataFrame(index=tabela.index)
+
+    for coluna in COLUNAS_MERCADO:
+        tabela[coluna] = pd.to_numeric(mercado[coluna], errors="coerce") if coluna in mercado else np.nan
+    for coluna in COLUNAS_DATA:
+        tabela[coluna] = pd.to_datetime(mercado[coluna]) if coluna in mercado else pd.NaT
+    # Arquivos gravados antes de Buscado_Em: a última busca é a última atualização
+    tabela["Buscado_Em"] = tabela["Buscado_Em"].fillna(tabela["Atualizado_Em"])
+
+    tabela.index.name = "Ticker"
+    for coluna in COLUNAS_CLASSIFICACAO:
+        tabela[coluna] = tabela[coluna].fillna(SEM_CLASSIFICACAO).astype("category")
+    return tabela.sort_index()
+
+
+def _mtime(caminho: Path) -> float:
+    try:
+        return caminho.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+# Catálogo carregado neste processo e as datas de modificação dos arquivos de origem
+_carregado: Optional[Tuple[Tuple[float, float], Catalogo]] = None
+
+
+def carregar_catalogo() -> Catalogo:
+    """Catálogo do processo (lido de novo só quando a base ou o Parquet mudam)"""
+    global _carregado
+    marca = (_mtime(ARQUIVO_BASE), _mtime(ARQUIVO_CATALOGO))
+    if _carregado is not None and _carregado[0] == marca:
+        return _carregado[1]
+
+    try:
+        gravado = pd.read_parquet(ARQUIVO_CATALOGO)
+    except (OSError, ValueError):
+        gravado = None
+    catalogo = Catalogo(_montar(_tabela_base(), gravado))
+    _carregado = (marca, catalogo)
+    return catalogo
+
+
+# -------------------------------------------------
+# Atualização periódica
+# -------------------------------------------------
+def _buscar_metadados(ticker: str) -> Dict:
+    """Campos de mercado de `ticker` via Yahoo Finance (erros de rede se propagam)"""
+    import yfinance as yf  # importação tardia
+
+    info = yf.Ticker(f"{ticker}.SA").info
+    dados = {coluna: info.get(campo) for coluna, campo in _CAMPOS_INFO.items()}
+    if dados["Preco"] is None:
+        dados["Preco"] = info.get("previousClose")
+    dados["Nome"] = info.get("longName") or info.get("shortName")
+    return dados
+
+
+def _gravar(tabela: pd.DataFrame):
+    """Escrita atômica (arquivo temporário + rename)"""
+    ARQUIVO_CATALOGO.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ARQUIVO_CATALOGO.with_suffix(f".{os.getpid()}.tmp")
+    tabela.to_parquet(tmp)
+    os.replace(tmp, ARQUIVO_CATALOGO)
+
+
+def atualizar_catalogo(tickers: Optional[Iterable[str]] = None, forcar: bool = False,
+                       threads: int = 4) -> int:
+    """
+    Rebusca os dados de mercado dos tickers desatualizados e grava o catálogo
+
+    Args:
+        tickers: tickers a manter em dia (padrão: todos do catálogo); tickers
+            novos entram no catálogo como SEM_CLASSIFICACAO
+        forcar: rebusca mesmo os que ainda estão dentro de IDADE_MAXIMA
+        threads: buscas simultâneas (I/O)
+
+    Returns:
+        Quantidade de tickers atualizados (buscas que falham mantêm os dados anteriores
+        e só são tentadas de novo depois de IDADE_MAXIMA)
+    """
+    catalogo = carregar_catalogo()
+    tickers = list(dict.fromkeys(catalogo.tabela.index if tickers is None else tickers))
+    pendentes = tickers if forcar else catalogo.desatualizados(tickers)
+    if not pendentes:
+        return 0
+
+    def buscar(ticker: str) -> Optional[Dict]:
+        try:
+            return _buscar_metadados(ticker)
+        except Exception as e:
+            print(f"Erro ao atualizar catálogo de {ticker}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(pendentes)))) as executor:
+        buscados = dict(zip(pendentes, executor.map(buscar, pendentes)))
+
+    agora = pd.Timestamp(datetime.now())
+    tabela = catalogo.tabela.copy()
+    for coluna in COLUNAS_CLASSIFICACAO:
+        tabela[coluna] = tabela[coluna].astype(str)
+    for ticker, dados in buscados.items():
+        if ticker not in tabela.index:
+            tabela.loc[ticker, list(COLUNAS_CLASSIFICACAO)] = SEM_CLASSIFICACAO
+        tabela.loc[ticker, "Buscado_Em"] = agora
+        if dados is None:
+            continue
+        for coluna in COLUNAS_MERCADO:
+            tabela.loc[ticker, coluna] = pd.to_numeric(dados.get(coluna), errors="coerce")
+        if pd.isna(tabela.loc[ticker, "Nome"]) and dados.get("Nome"):
+            tabela.loc[ticker, "Nome"] = dados["Nome"]
+        tabela.loc[ticker, "Atualizado_Em"] = agora
+
+    _gravar(_montar(_tabela_base(), tabela))
+    return sum(dados is not None for dados in buscados.values())
@@ -0,0 +1,100 @@
+"""
+Histórico local de preços diários (fechamento)
+Um Parquet por ticker em data/cache/precos/. A atualização busca no Yahoo Finance
+só os pregões posteriores ao último já gravado; a leitura é sempre local, então
+o cálculo de risco funciona offline com o que já foi baixado
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable
+
+import pandas as pd
+
+from core.carteira_cache import DIRETORIO_CACHE
+
+DIRETORIO_PRECOS = DIRETORIO_CACHE / "precos"
+DIAS_INICIAIS = 365  # janela baixada na primeira vez
+
+
+def _arquivo(ticker: str) -> Path:
+    return DIRETORIO_PRECOS / f"{ticker}.parquet"
+
+
+def precos_locais(ticker: str) -> pd.Series:
+    """Fechamentos gravados de `ticker` (Series indexada por data; vazia se não houver)"""
+    try:
+        return pd.read_parquet(_arquivo(ticker))["Close"]
+    except (OSError, KeyError, ValueError):
+        return pd.Series(dtype=float, name="Close", index=pd.DatetimeIndex([], name="Date"))
+
+
+def _gravar(ticker: str, fechamentos: pd.Series):
+    """Escrita atômica (arquivo temporário + rename)"""
+    DIRETORIO_PRECOS.mkdir(parents=True, exist_ok=True)
+    destino = _arquivo(ticker)
+    tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+    fechamentos.rename("Close").to_frame().to_parquet(tmp)
+    os.replace(tmp, destino)
+
+
+def atualizar_ticker(ticker: str, dias_iniciais: int = DIAS_INICIAIS) -> int:
+    """
+    Baixa os pregões que faltam de `ticker` e anexa ao arquivo local
+
+    Returns:
+        Quantidade de pregões novos (0 se já estava em dia ou a busca falhou)
+    """
+    import yfinance as yf  # importação tardia
+
+    locais = precos_locais(ticker)
+    if len(locais):
+        inicio = locais.index.max().date() + timedelta(days=1)
+    else:
+        inicio = datetime.now().date() - timedelta(days=dias_iniciais)
+    if inicio > datetime.now().date():
+        return 0
+
+    try:
+        novos = yf.Ticker(f"{ticker}.SA").history(start=inicio.isoformat())["Close"]
+    except Exception as e:
+        print(f"Erro ao atualizar histórico de {ticker}: {e}")
+        return 0
+
+    # Datas sem fuso (o Yahoo devolve no fuso da bolsa) e só o que é de fato novo
+    novos.index = pd.DatetimeIndex(novos.index).tz_localize(None).normalize()
+    novos.index.name = "Date"
+    if len(locais):
+        novos = novos[novos.index > locais.index.max()]
+    novos = novos.dropna()
+    if novos.empty:
+        return 0
+
+    _gravar(ticker, pd.concat([locais, novos]))
+    return len(novos)
+
+
+def atualizar_historico(tickers: Iterable[str], dias_iniciais: int = DIAS_INICIAIS) -> Dict[str, int]:
+    """Atualiza o histórico local de vários tickers ({ticker: pregões novos})"""
+    return {ticker: atualizar_ticker(ticker, dias_iniciais) for ticker in dict.fromkeys(tickers)}
+
+
+def versao_historico(tickers: Iterable[str]) -> str:
+    """Hash das datas de modificação dos arquivos locais (muda quando chegam pregões novos)"""
+    marcas = []
+    for ticker in sorted(set(tickers)):
+        try:
+            marcas.append(f"{ticker}:{_arquivo(ticker).stat().st_mtime_ns}")
+        except OSError:
+            marcas.append(f"{ticker}:-")
+    return hashlib.sha256("|".join(marcas).encode()).hexdigest()[:16]
+
+
+def carregar_precos(tickers: Iterable[str]) -> pd.DataFrame:
+    """Fechamentos locais em formato largo (datas x tickers); tickers sem histórico ficam de fora"""
+    series = {ticker: precos_locais(ticker) for ticker in dict.fromkeys(tickers)}
+    series = {ticker: s for ticker, s in series.items() if len(s)}
+    if not series:
+        return pd.DataFrame()
+    return pd.DataFrame(series).sort_index()
@@ -0,0 +1,383 @@
+"""
+Índice invertido das notícias locais (SQLite)
+Para cada ticker, uma lista de postings (data, id da notícia) ordenada por data
+(chave primária da tabela), então "notícias de HGLG11 nos últimos 30 dias" é uma
+busca na árvore + leitura dos k resultados, sem percorrer o arquivo de notícias.
+Cada id aponta para o byte da notícia em noticias.jsonl, lida direto com seek
+
+O índice acompanha o arquivo de notícias: antes de cada consulta, as linhas
+anexadas desde a última indexação são lidas e indexadas (só elas). Na mesma
+passada cada notícia nova é pontuada (pontuação guardada pelo id, que é o hash
+do conteúdo) e somada ao agregado de sentimento dos tickers que cita: média com
+peso que cai pela metade a cada MEIA_VIDA. O sentimento da carteira é então uma
+leitura de uma linha por ativo
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.ingestao_noticias import ARQUIVO_NOTICIAS, DIRETORIO_NOTICIAS
+from core.news_analyzer import LEXICO, contar_termos_noticia
+
+ARQUIVO_INDICE = DIRETORIO_NOTICIAS / "indice.sqlite"
+MEIA_VIDA = timedelta(days=30)  # uma notícia de 30 dias pesa metade de uma de hoje
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS artigos (
+    id      TEXT PRIMARY KEY,
+    data    TEXT NOT NULL,
+    posicao INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_artigos_data ON artigos (data);
+CREATE TABLE IF NOT EXISTS postings (
+    ticker TEXT NOT NULL,
+    data   TEXT NOT NULL,
+    id     TEXT NOT NULL,
+    PRIMARY KEY (ticker, data, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sentimentos (
+    id        TEXT PRIMARY KEY,
+    positivas INTEGER NOT NULL,
+    negativas INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agregados (
+    ticker     TEXT PRIMARY KEY,
+    soma       REAL NOT NULL,
+    peso       REAL NOT NULL,
+    referencia TEXT NOT NULL,
+    quantidade INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _iso(data) -> Optional[str]:
+    """Limite de consulta no formato das datas gravadas (ISO, UTC sem fuso)"""
+    if data is None or isinstance(data, str):
+        return data
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data.isoformat(timespec="seconds")
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _decaimento(intervalo: timedelta) -> float:
+    """Peso relativo de uma notícia `intervalo` mais velha que a referência"""
+    return 0.5 ** (intervalo.total_seconds() / MEIA_VIDA.total_seconds())
+
+
+def _acumular(agregado: Optional[list], data: datetime, score: int) -> list:
+    """
+    Soma uma notícia ao agregado [soma, peso, referência, quantidade] de um ticker
+
+    Soma e peso ficam na escala da notícia mais recente (referência): uma notícia
+    mais nova desconta o que já havia; uma mais velha entra com peso reduzido.
+    A ordem de chegada não altera o resultado
+    """
+    if agregado is None:
+        return [float(score), 1.0, data, 1]
+    soma, peso, referencia, quantidade = agregado
+    if data > referencia:
+        fator = _decaimento(data - referencia)
+        return [soma * fator + score, peso * fator + 1.0, data, quantidade + 1]
+    fator = _decaimento(referencia - data)
+    return [soma + score * fator, peso + fator, referencia, quantidade + 1]
+
+
+class IndiceNoticias:
+    """
+    Índice ticker -> (data, id) sobre o arquivo de notícias
+
+    Cada thread de cada processo usa a própria conexão; a indexação incremental
+    roda em uma transação IMMEDIATE, então processos simultâneos não indexam a
+    mesma linha duas vezes
+    """
+
+    def __init__(self, caminho: Path = ARQUIVO_INDICE, arquivo_noticias: Path = ARQUIVO_NOTICIAS):
+        self.caminho = Path(caminho)
+        self.arquivo_noticias = Path(arquivo_noticias)
+        self._local = threading.local()
+
+    # -------------------------------------------------
+    # Conexão
+    # -------------------------------------------------
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, "conexao", None)
+        # Conexões não sobrevivem a fork: recria se o processo mudou
+        if conexao is None or self._local.pid != os.getpid():
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.executescript(_ESQUEMA)
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def _meta(self, conexao: sqlite3.Connection, chave: str, padrao: Optional[int] = 0) -> Optional[int]:
+        linha = conexao.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+
+    def _tamanho(self) -> int:
+        try:
+            return self.arquivo_noticias.stat().st_size
+        except OSError:
+            return 0
+
+    # -------------------------------------------------
+    # Indexação
+    # -------------------------------------------------
+    def _limpar(self, conexao: sqlite3.Connection, pontuacoes: bool = False):
+        """Esvazia o índice (e as pontuações guardadas, se o léxico mudou)"""
+        for tabela in ("artigos", "postings", "agregados") + (("sentimentos",) if pontuacoes else ()):
+            conexao.execute(f"DELETE FROM {tabela}")
+        conexao.executemany("INSERT OR REPLACE INTO meta VALUES (?, 0)", [("posicao",), ("pontuado_ate",)])
+
+    def _preparar(self, conexao: sqlite3.Connection, tamanho: int) -> int:
+        """
+        Dentro de uma transação: descarta o que deixou de valer e devolve a posição indexada
+
+        Léxico de sentimento diferente refaz pontuações e índice; arquivo de notícias
+        menor que a posição indexada (apagado ou recriado) refaz o índice
+        """
+        if self._meta(conexao, "lexico", None) != LEXICO.versao:
+            self._limpar(conexao, pontuacoes=True)
+            conexao.execute("INSERT OR REPLACE INTO meta VALUES ('lexico', ?)", (LEXICO.versao,))
+        posicao = self._meta(conexao, "posicao")
+        if posicao > tamanho:
+            self._limpar(conexao)
+            posicao = 0
+        return posicao
+
+    def _pontuar(self, conexao: sqlite3.Connection, noticia: Dict) -> int:
+        """positivas - negativas da notícia, da tabela de pontuações ou calculado e guardado"""
+        linha = conexao.execute(
+            "SELECT positivas, negativas FROM sentimentos WHERE id = ?", (noticia["id"],)
+        ).fetchone()
+        if linha is None:
+            linha = contar_termos_noticia(noticia)
+            conexao.execute("INSERT OR REPLACE INTO sentimentos VALUES (?, ?, ?)", (noticia["id"], *linha))
+        return linha[0] - linha[1]
+
+    def atualizar(self) -> int:
+        """
+        Indexa, pontua e agrega as notícias anexadas desde a última chamada
+
+        Se o arquivo de notícias encolheu (foi apagado ou recriado) o índice é refeito;
+        se o léxico de sentimento mudou, as pontuações também
+
+        Returns:
+            Quantidade de notícias novas no índice
+        """
+        tamanho = self._tamanho()
+        conexao = self._conexao()
+        if self._meta(conexao, "posicao") == tamanho and self._meta(conexao, "lexico", None) == LEXICO.versao:
+            return 0
+
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            posicao = self._preparar(conexao, tamanho)  # relido: outro processo pode ter indexado antes
+            if posicao == tamanho:
+                return 0
+
+            novos = 0
+            agregados: Dict[str, list] = {}
+            with open(self.arquivo_noticias, "rb") as arquivo:
+                arquivo.seek(posicao)
+                for linha in arquivo:
+                    if not linha.endswith(b"\n"):
+                        break  # gravação em andamento: fica para a próxima
+                    inicio, posicao = posicao, posicao + len(linha)
+                    try:
+                        noticia = json.loads(linha)
+                        id_, data, tickers = noticia["id"], noticia["data"], noticia["tickers"]
+                    except (ValueError, KeyError):
+                        continue
+                    if not conexao.execute("INSERT OR IGNORE INTO artigos VALUES (?, ?, ?)",
+                                           (id_, data, inicio)).rowcount:
+                        continue  # duplicata de uma ingestão simultânea
+                    novos += 1
+                    conexao.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)",
+                                        [(ticker, data, id_) for ticker in tickers])
+                    if tickers:
+                        score = self._pontuar(conexao, noticia)
+                        quando = datetime.fromisoformat(data)
+                        for ticker in tickers:
+                            if ticker not in agregados:
+                                agregados[ticker] = self._agregado(conexao, ticker)
+                            agregados[ticker] = _acumular(agregados[ticker], quando, score)
+
+            conexao.executemany(
+                "INSERT OR REPLACE INTO agregados VALUES (?, ?, ?, ?, ?)",
+                [(ticker, soma, peso, referencia.isoformat(timespec="seconds"), quantidade)
+                 for ticker, (soma, peso, referencia, quantidade) in agregados.items()]
+            )
+            conexao.execute("INSERT OR REPLACE INTO meta VALUES ('posicao', ?)", (posicao,))
+        return novos
+
+    def pendente_pontuacao(self) -> Tuple[int, int]:
+        """
+        Trecho [início, fim) do arquivo de notícias cujas notícias ainda não têm pontuação
+
+        Começa no que for maior: a posição já indexada (a indexação pontua o que indexa)
+        ou o ponto de retomada gravado por gravar_pontuacoes
+        """
+        tamanho = self._tamanho()
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            posicao = self._preparar(conexao, tamanho)
+            pontuado = self._meta(conexao, "pontuado_ate")
+        return max(posicao, pontuado if pontuado <= tamanho else 0), tamanho
+
+    def gravar_pontuacoes(self, pontuacoes: Iterable[Tuple[str, int, int]], ate: Optional[int] = None):
+        """
+        Guarda pontuações (id, positivas, negativas) calculadas fora do índice
+
+        Args:
+            ate: tudo antes deste byte do arquivo de notícias já está pontuado
+                (ponto de retomada de pendente_pontuacao)
+        """
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            conexao.executemany("INSERT OR REPLACE INTO sentimentos VALUES (?, ?, ?)", pontuacoes)
+            if ate is not None:
+                conexao.execute("INSERT OR REPLACE INTO meta VALUES ('pontuado_ate', ?)", (ate,))
+
+    def _agregado(self, conexao: sqlite3.Connection, ticker: str) -> Optional[list]:
+        linha = conexao.execute(
+            "SELECT soma, peso, referencia, quantidade FROM agregados WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        if linha is None:
+            return None
+        return [linha[0], linha[1], datetime.fromisoformat(linha[2]), linha[3]]
+
+    # -------------------------------------------------
+    # Consultas
+    # -------------------------------------------------
+    def indexado_ate(self) -> int:
+        """Byte do arquivo de notícias até onde o índice chega, sem indexar nada (0 se o arquivo foi recriado)"""
+        posicao = self._meta(self._conexao(), "posicao")
+        return posicao if posicao <= self._tamanho() else 0
+
+    def contem(self, id_: str) -> bool:
+        """True se a notícia `id_` já está indexada (não atualiza o índice antes)"""
+        return self._conexao().execute("SELECT 1 FROM artigos WHERE id = ?", (id_,)).fetchone() is not None
+
+    def postings(self, ticker: str, desde=None, ate=None, limite: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        (data, id) das notícias que citam `ticker`, da mais recente para a mais antiga
+
+        Args:
+            desde, ate: intervalo [desde, ate) em datetime ou ISO (None = sem limite)
+            limite: no máximo esta quantidade (as mais recentes)
+        """
+        self.atualizar()
+        return self._conexao().execute(
+            "SELECT data, id FROM postings WHERE ticker = ? AND data >= ? AND data < ? "
+            "ORDER BY data DESC, id LIMIT ?",
+            (ticker, _iso(desde) or "", _iso(ate) or "9999", -1 if limite is None else limite)
+        ).fetchall()
+
+    def artigos(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """Notícias completas por id, lidas do arquivo pela posição indexada"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        posicoes = []
+        conexao = self._conexao()
+        for i in range(0, len(ids), 500):  # limite de parâmetros do SQLite
+            lote = ids[i:i + 500]
+            posicoes += conexao.execute(
+                f"SELECT id, posicao FROM artigos WHERE id IN ({','.join('?' * len(lote))})", lote
+            ).fetchall()
+
+        noticias = {}
+        with open(self.arquivo_noticias, "rb") as arquivo:
+            for id_, posicao in sorted(posicoes, key=lambda p: p[1]):
+                arquivo.seek(posicao)
+                noticias[id_] = json.loads(arquivo.readline())
+        return noticias
+
+    def noticias(self, ticker: str, desde=None, ate=None, limite: Optional[int] = None) -> List[Dict]:
+        """Notícias de `ticker` no intervalo, da mais recente para a mais antiga"""
+        ids = [id_ for _, id_ in self.postings(ticker, desde, ate, limite)]
+        artigos = self.artigos(ids)
+        return [artigos[id_] for id_ in ids if id_ in artigos]
+
+    def sentimento(self, tickers: Iterable[str], agora: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Sentimento agregado de cada ticker (uma linha por ticker, nada é recalculado)
+
+        score é a média das pontuações das notícias (positivas - negativas, dividida
+        por 2 como em analisar_noticias_fii) ponderada pelo decaimento até `agora`,
+        entre -1 e 1. Enquanto o peso somado das notícias for menor que o de uma
+        notícia de hoje, ele é completado com neutro: sem notícias recentes o score
+        tende a 0
+        """
+        tickers = list(dict.fromkeys(tickers))
+        agora = _agora() if agora is None else datetime.fromisoformat(_iso(agora))
+        self.atualizar()
+        linhas = {}
+        conexao = self._conexao()
+        for i in range(0, len(tickers), 500):  # limite de parâmetros do SQLite
+            lote = tickers[i:i + 500]
+            for ticker, soma, peso, referencia, quantidade in conexao.execute(
+                "SELECT ticker, soma, peso, referencia, quantidade FROM agregados "
+                f"WHERE ticker IN ({','.join('?' * len(lote))})", lote
+            ):
+                linhas[ticker] = (soma, peso, datetime.fromisoformat(referencia), quantidade)
+
+        resultado = {}
+        for ticker in tickers:
+            if ticker not in linhas:
+                resultado[ticker] = {"score": 0.0, "peso": 0.0, "noticias": 0, "ultima": None}
+                continue
+            soma, peso, referencia, quantidade = linhas[ticker]
+            fator = _decaimento(agora - referencia) if agora > referencia else 1.0
+            score = soma * fator / (2 * max(peso * fator, 1.0))
+            resultado[ticker] = {
+                "score": max(-1.0, min(1.0, score)),
+                "peso": peso * fator,
+                "noticias": quantidade,
+                "ultima": referencia.isoformat(timespec="seconds"),
+            }
+        return resultado
+
+    def recentes(self, quantidade: int = 10) -> List[Dict]:
+        """As `quantidade` notícias mais recentes de todo o arquivo"""
+        self.atualizar()
+        ids = [linha[0] for linha in self._conexao().execute(
+            "SELECT id FROM artigos ORDER BY data DESC, id LIMIT ?", (quantidade,)
+        )]
+        artigos = self.artigos(ids)
+        return [artigos[id_] for id_ in ids if id_ in artigos]
+
+
+indice_noticias = IndiceNoticias()
+
+
+def noticias_recentes(quantidade: int = 10) -> List[Dict]:
+    """As `quantidade` notícias mais recentes (data decrescente)"""
+    return indice_noticias.recentes(quantidade)
+
+
+def noticias_por_ticker(tickers: Iterable[str], limite: int = 20, desde=None, ate=None) -> Dict[str, List[Dict]]:
+    """Até `limite` notícias mais recentes que citam cada ticker, no intervalo [desde, ate)"""
+    return {ticker: indice_noticias.noticias(ticker, desde, ate, limite) for ticker in dict.fromkeys(tickers)}
+
+
+def sentimento_por_ticker(tickers: Iterable[str], agora: Optional[datetime] = None) -> Dict[str, Dict]:
+    """Sentimento agregado (score, peso, noticias, ultima) de cada ticker"""
+    return indice_noticias.sentimento(tickers, agora)
@@ -0,0 +1,344 @@
+"""
+Ingestão de notícias a partir de arquivos locais
+Dumps RSS, Atom ou JSONL colocados em data/noticias/ são lidos em fluxo (um item
+por vez, sem carregar o arquivo inteiro), normalizados, identificados por um hash
+do conteúdo (duplicatas entre arquivos e execuções são descartadas), marcados com
+os tickers citados e anexados ao arquivo local data/cache/noticias/noticias.jsonl
+
+Reexecutar em um dump que cresceu processa só o que é novo: arquivos JSONL
+continuam do byte onde pararam e arquivos XML inalterados nem são abertos.
+Duplicatas são procuradas no índice (core/indice_noticias.py, onde também ficam as
+consultas por ticker e por data); do arquivo local só é lido o trecho ainda não indexado
+"""
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.carteira_cache import DIRETORIO_CACHE
+from core.news_analyzer import normalizar_termo
+
+DIRETORIO_FONTES = Path("data/noticias")
+DIRETORIO_NOTICIAS = DIRETORIO_CACHE / "noticias"
+ARQUIVO_NOTICIAS = DIRETORIO_NOTICIAS / "noticias.jsonl"
+ARQUIVO_ESTADO = DIRETORIO_NOTICIAS / "estado.json"
+
+EXTENSOES_JSONL = (".jsonl", ".ndjson")
+EXTENSOES_XML = (".xml", ".rss", ".atom")
+
+# Códigos de FII citados no texto (ex: "HGLG11", "hglg11.SA")
+_TICKER = re.compile(r"\b([A-Z]{4}11)\b")
+_TAGS_HTML = re.compile(r"<[^>]+>")
+# Cada linha do arquivo de notícias começa pelo id (json.dumps mantém a ordem das chaves)
+_PREFIXO_ID = '{"id": "'
+_TAMANHO_ID = 16
+
+# Campos aceitos em cada formato, em ordem de preferência
+_CAMPOS_JSON = {
+    "titulo": ("titulo", "title", "headline"),
+    "conteudo": ("conteudo", "content", "summary", "description", "texto", "text"),
+    "fonte": ("fonte", "source"),
+    "link": ("link", "url"),
+    "data": ("data", "date", "published", "pubDate", "updated"),
+}
+_CAMPOS_XML = {
+    "titulo": ("title",),
+    "conteudo": ("encoded", "content", "description", "summary"),
+    "link": ("link",),
+    "data": ("pubDate", "published", "updated", "date"),
+}
+
+# Uma ingestão por vez neste processo (notícias e sentimento são buscados em threads)
+_trava = threading.Lock()
+
+
+# -------------------------------------------------
+# Leitura das fontes (geradores)
+# -------------------------------------------------
+def _abrir(caminho: Path, inicio: int = 0):
+    if caminho.suffix == ".gz":
+        return gzip.open(caminho, "rb")
+    arquivo = open(caminho, "rb")
+    arquivo.seek(inicio)
+    return arquivo
+
+
+def _formato(caminho: Path) -> Optional[str]:
+    sufixo = caminho.suffixes[-2] if caminho.suffix == ".gz" and len(caminho.suffixes) > 1 else caminho.suffix
+    if sufixo in EXTENSOES_JSONL:
+        return "jsonl"
+    if sufixo in EXTENSOES_XML:
+        return "xml"
+    return None
+
+
+def ler_jsonl(caminho: Path, inicio: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """
+    (item bruto, posição logo após ele) de cada linha JSON completa a partir de `inicio`
+
+    Uma última linha sem quebra (dump ainda sendo escrito) fica para a próxima leitura;
+    linhas inválidas são ignoradas
+    """
+    posicao = inicio
+    with _abrir(caminho, inicio) as arquivo:
+        for linha in arquivo:
+            if not linha.endswith(b"\n"):
+                break
+            posicao += len(linha)
+            try:
+                bruto = json.loads(linha)
+            except ValueError:
+                continue
+            if isinstance(bruto, dict):
+                yield bruto, posicao
+
+
+def _local(tag: str) -> str:
+    """Nome da tag sem namespace ("{http://www.w3.org/2005/Atom}entry" -> "entry")"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def ler_xml(caminho: Path) -> Iterator[Dict]:
+    """
+    Itens (<item> do RSS, <entry> do Atom) como dicionários de texto, em fluxo
+
+    Cada item é descartado da árvore depois de lido, então a memória não cresce
+    com o tamanho do dump. A fonte é o título do canal/feed
+    """
+    fonte = None
+    profundidade = 0
+    try:
+        with _abrir(caminho) as arquivo:
+            for evento, elemento in ET.iterparse(arquivo, events=("start", "end")):
+                tag = _local(elemento.tag)
+                if evento == "start":
+                    profundidade += tag in ("item", "entry")
+                    continue
+                if tag == "title" and profundidade == 0 and fonte is None:
+                    fonte = (elemento.text or "").strip()
+                elif tag in ("item", "entry"):
+                    profundidade -= 1
+                    bruto = {"fonte": fonte or caminho.stem}
+                    for filho in elemento:
+                        nome = _local(filho.tag)
+                        if nome == "link" and filho.get("href"):
+                            bruto.setdefault("link", filho.get("href"))
+                        elif filho.text and filho.text.strip():
+                            bruto.setdefault(nome, filho.text.strip())
+                    yield bruto
+                    elemento.clear()
+    except ET.ParseError as e:
+        print(f"Erro ao ler notícias de {caminho}: {e}")
+
+
+# -------------------------------------------------
+# Normalização
+# -------------------------------------------------
+def _primeiro(bruto: Dict, campos: Iterable[str]) -> str:
+    for campo in campos:
+        valor = bruto.get(campo)
+        if isinstance(valor, dict):  # ex: {"source": {"name": ...}}
+            valor = valor.get("name") or valor.get("title")
+        if valor:
+            return str(valor)
+    return ""
+
+
+def _texto(valor: str) -> str:
+    """Sem tags HTML, entidades decodificadas e espaços simples"""
+    return " ".join(html.unescape(_TAGS_HTML.sub(" ", valor)).split())
+
+
+def _data_iso(valor: str) -> Optional[str]:
+    """Data em ISO (UTC, sem fuso) a partir de RFC 822 (RSS) ou ISO 8601 (Atom/JSON)"""
+    if not valor:
+        return None
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        try:
+            data = datetime.fromisoformat(valor.strip())
+        except ValueError:
+            return None
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data.isoformat(timespec="seconds")
+
+
+def id_noticia(titulo: str, conteudo: str) -> str:
+    """Hash do título + conteúdo normalizados (mesma notícia em fontes diferentes = mesmo id)"""
+    chave = f"{normalizar_termo(titulo)}\x1f{normalizar_termo(conteudo)}"
+    return hashlib.sha1(chave.encode("utf-8")).hexdigest()[:_TAMANHO_ID]
+
+
+def tickers_citados(texto: str) -> List[str]:
+    """Códigos de FII citados em `texto`, sem repetição, na ordem em que aparecem"""
+    return list(dict.fromkeys(_TICKER.findall(texto.upper())))
+
+
+def normalizar_noticia(bruto: Dict, campos: Dict = _CAMPOS_JSON, fonte: str = "") -> Optional[Dict]:
+    """Item bruto -> notícia do arquivo local (None se não tiver título nem conteúdo)"""
+    titulo = _texto(_primeiro(bruto, campos["titulo"]))
+    conteudo = _texto(_primeiro(bruto, campos["conteudo"]))
+    if not titulo and not conteudo:
+        return None
+    return {
+        "id": id_noticia(titulo, conteudo),
+        "data": (_data_iso(_primeiro(bruto, campos["data"]))
+                 or datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")),
+        "titulo": titulo,
+        "conteudo": conteudo,
+        "fonte": _texto(_primeiro(bruto, _CAMPOS_JSON["fonte"])) or fonte,
+        "link": _primeiro(bruto, campos["link"]).strip(),
+        "tickers": tickers_citados(f"{titulo} {conteudo}"),
+    }
+
+
+# -------------------------------------------------
+# Arquivo local de notícias
+# -------------------------------------------------
+def ler_noticias(caminho: Path = ARQUIVO_NOTICIAS) -> Iterator[Dict]:
+    """Notícias gravadas, na ordem de ingestão (ids repetidos por ingestões simultâneas são pulados)"""
+    vistos = set()
+    try:
+        arquivo = open(caminho, encoding="utf-8")
+    except OSError:
+        return
+    with arquivo:
+        for linha in arquivo:
+            try:
+                noticia = json.loads(linha)
+            except ValueError:
+                continue  # linha incompleta de uma gravação interrompida
+            if noticia["id"] not in vistos:
+                vistos.add(noticia["id"])
+                yield noticia
+
+
+def _ids_gravados(caminho: Path = ARQUIVO_NOTICIAS, inicio: int = 0) -> Set[str]:
+    """Ids gravados a partir do byte `inicio`, lidos do início de cada linha (sem decodificar o JSON)"""
+    prefixo = _PREFIXO_ID.encode()
+    ids = set()
+    try:
+        arquivo = open(caminho, "rb")
+    except OSError:
+        return ids
+    with arquivo:
+        arquivo.seek(inicio)
+        for linha in arquivo:
+            if linha.startswith(prefixo):
+                ids.add(linha[len(prefixo):len(prefixo) + _TAMANHO_ID].decode("ascii", "replace"))
+    return ids
+
+
+def versao_noticias(caminho: Path = ARQUIVO_NOTICIAS) -> int:
+    """Tamanho do arquivo local (só cresce com notícias novas); usado na chave de caches derivados"""
+    try:
+        return caminho.stat().st_size
+    except OSError:
+        return 0
+
+
+def _ler_estado() -> Dict[str, Dict]:
+    try:
+        with open(ARQUIVO_ESTADO, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_estado(estado: Dict[str, Dict]):
+    """Escrita atômica (arquivo temporário + rename)"""
+    tmp = ARQUIVO_ESTADO.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ARQUIVO_ESTADO)
+
+
+def _itens_novos(caminho: Path, estado: Dict) -> Iterator[Dict]:
+    """
+    Notícias normalizadas de `caminho` ainda não lidas segundo `estado` (atualizado ao consumir)
+
+    JSONL sem compressão continua do byte onde parou (recomeça se o arquivo encolheu);
+    os demais formatos são relidos só quando tamanho ou data de modificação mudam
+    """
+    info = caminho.stat()
+    anterior = estado.get(str(caminho), {})
+    formato = _formato(caminho)
+    if formato == "jsonl" and caminho.suffix != ".gz":
+        inicio = anterior.get("posicao", 0)
+        if inicio > info.st_size:
+            inicio = 0
+        for bruto, posicao in ler_jsonl(caminho, inicio):
+            noticia = normalizar_noticia(bruto, fonte=caminho.stem)
+            estado[str(caminho)] = {"posicao": posicao}
+            if noticia:
+                yield noticia
+        return
+
+    marca = {"tamanho": info.st_size, "mtime": info.st_mtime}
+    if anterior == marca:
+        return
+    itens = ler_jsonl(caminho) if formato == "jsonl" else ((bruto, None) for bruto in ler_xml(caminho))
+    campos = _CAMPOS_JSON if formato == "jsonl" else _CAMPOS_XML
+    for bruto, _ in itens:
+        noticia = normalizar_noticia(bruto, campos, fonte=caminho.stem)
+        if noticia:
+            yield noticia
+    estado[str(caminho)] = marca
+
+
+def arquivos_fonte(diretorio: Path = DIRETORIO_FONTES) -> List[Path]:
+    """Dumps reconhecidos em `diretorio` (e subpastas), em ordem de nome"""
+    if not diretorio.is_dir():
+        return []
+    return sorted(p for p in diretorio.rglob("*") if p.is_file() and _formato(p))
+
+
+def ingerir_noticias(fontes: Optional[Iterable[Path]] = None) -> int:
+    """
+    Anexa ao arquivo local as notícias novas dos dumps
+
+    Args:
+        fontes: arquivos a ler (padrão: tudo em DIRETORIO_FONTES)
+
+    Returns:
+        Quantidade de notícias gravadas (duplicatas não contam)
+    """
+    with _trava:
+        fontes = arquivos_fonte() if fontes is None else [Path(f) for f in fontes]
+        if not fontes:
+            return 0
+        DIRETORIO_NOTICIAS.mkdir(parents=True, exist_ok=True)
+        estado = _ler_estado()
+
+        # Já gravadas: as indexadas são consultadas no índice; só o trecho do arquivo
+        # ainda não indexado é lido (sem percorrer o arquivo inteiro a cada chamada)
+        from core.indice_noticias import indice_noticias  # importação tardia (o índice importa este módulo)
+        indexado_ate = indice_noticias.indexado_ate()
+        vistos = _ids_gravados(inicio=indexado_ate)
+
+        gravadas = 0
+        with open(ARQUIVO_NOTICIAS, "a", encoding="utf-8") as destino:
+            for caminho in fontes:
+                try:
+                    for noticia in _itens_novos(caminho, estado):
+                        if noticia["id"] in vistos or (indexado_ate and indice_noticias.contem(noticia["id"])):
+                            continue
+                        vistos.add(noticia["id"])
+                        destino.write(json.dumps(noticia, ensure_ascii=False) + "\n")
+                        gravadas += 1
+                except OSError as e:
+                    print(f"Erro ao ler notícias de {caminho}: {e}")
+                destino.flush()  # estado só avança depois que as notícias estão no disco
+        _gravar_estado(estado)
+        return gravadas
+
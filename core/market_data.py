@@ -1,22 +1,61 @@
 """
 Módulo para coletar e processar dados de mercado
 Índices: IBOV, IFIX, SELIC, IPCA
+yfinance é importado dentro das funções: importar o módulo não paga o custo dele
+Resultados ficam no cache compartilhado entre processos (core/shared_cache.py);
+históricos brutos ficam no cache em memória do processo (core/memory_cache.py)
 """
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
 
+from core.catalogo_fiis import carregar_catalogo
+from core.memory_cache import em_memoria
+from core.shared_cache import compartilhado
+
+TTL_MERCADO = 15 * 60     # cotações e históricos intradiários
+TTL_DIARIO = 6 * 60 * 60  # SELIC muda no máximo 1x/dia
+TAXA_SELIC_PADRAO = 10.5
+# Maior janela usada pelas funções abaixo: cada símbolo é buscado uma vez com ela
+JANELA_HISTORICO = 60
+
+
+@em_memoria("historicos", ttl=TTL_MERCADO, cachear_se=lambda hist: len(hist) > 0)
+def _historico_completo(simbolo, dias=JANELA_HISTORICO):
+    """Histórico diário (OHLCV) de `simbolo` no Yahoo Finance, na janela máxima"""
+    import yfinance as yf
+
+    return yf.Ticker(simbolo).history(period=f"{dias}d")
+
+
+def _historico(simbolo, dias):
+    """
+    Últimos `dias` dias corridos do histórico de `simbolo`
+
+    Índices, correlação e cotação usam janelas diferentes do mesmo símbolo: todas são
+    recortes de um único histórico em cache (uma busca por símbolo)
+    """
+    if dias > JANELA_HISTORICO:
+        return _historico_completo(simbolo, dias)
+    hist = _historico_completo(simbolo)
+    if len(hist) == 0:
+        return hist
+    return hist[hist.index > hist.index[-1] - pd.Timedelta(days=dias)]
+
+
+def _indices_validos(indices):
+    return any(i.get("valor") is not None for i in indices.values())
+
+
+@compartilhado("mercado", ttl=TTL_MERCADO, cachear_se=_indices_validos)
 def obter_indices(dias=30):
     """Obtém dados dos principais índices do mercado brasileiro"""
     try:
         # IBOVESPA
-        ibov = yf.Ticker("^BVSP")
-        hist_ibov = ibov.history(period=f"{dias}d")
+        hist_ibov = _historico("^BVSP", dias)
         
         # IFIX (índice de fundos imobiliários)
-        ifix = yf.Ticker("IFIX.SA")
-        hist_ifix = ifix.history(period=f"{dias}d")
+        hist_ifix = _historico("IFIX.SA", dias)
         
         ibov_atual = hist_ibov["Close"].iloc[-1] if len(hist_ibov) > 0 else None
         ibov_anterior = hist_ibov["Close"].iloc[-30] if len(hist_ibov) > 30 else hist_ibov["Close"].iloc[0] if len(hist_ibov) > 0 else None
@@ -47,30 +86,26 @@ def obter_indices(dias=30):
         }
 
 
+@compartilhado("mercado", ttl=TTL_DIARIO)
 def obter_taxa_selic():
     """Obtém a taxa SELIC atual (proxy usando taxa CDI)"""
-    try:
-        # Usando ETF que acompanha SELIC/CDI
-        selic = yf.Ticker("SELIC11.SA")
-        info = selic.info
-        # Se não conseguir, retorna um valor padrão recente
-        return 10.5  # Taxa aproximada - idealmente buscar de API do BCB
-    except:
-        return 10.5
+    # Taxa aproximada - idealmente buscar de API do BCB. A consulta ao `.info` de um ETF
+    # de SELIC que existia aqui era descartada e custava uma chamada lenta ao Yahoo
+    return TAXA_SELIC_PADRAO
 
 
+# 0.0 é o valor de falha (sem históricos); não é gravado
+@compartilhado("mercado", ttl=TTL_MERCADO, cachear_se=lambda correlacao: correlacao != 0.0)
 def calcular_correlacao_carteira_mercado(tickers_carteira, dias=60):
     """Calcula correlação da carteira com IFIX"""
     try:
-        ifix = yf.Ticker("IFIX.SA")
-        hist_ifix = ifix.history(period=f"{dias}d")["Close"].pct_change().dropna()
+        hist_ifix = _historico("IFIX.SA", dias)["Close"].pct_change().dropna()
         
         retornos_carteira = []
         
         for ticker in tickers_carteira:
             try:
-                t = yf.Ticker(f"{ticker}.SA")
-                hist = t.history(period=f"{dias}d")["Close"].pct_change().dropna()
+                hist = _historico(f"{ticker}.SA", dias)["Close"].pct_change().dropna()
                 retornos_carteira.append(hist)
             except:
                 continue
@@ -88,11 +123,11 @@ def calcular_correlacao_carteira_mercado(tickers_carteira, dias=60):
         return 0.0
 
 
+@compartilhado("mercado", ttl=TTL_MERCADO, cachear_se=lambda preco: preco is not None)
 def obter_preco_atual(ticker):
     """Obtém preço atual de um ticker"""
     try:
-        t = yf.Ticker(f"{ticker}.SA")
-        hist = t.history(period="1d")
+        hist = _historico(f"{ticker}.SA", 1)
         if len(hist) > 0:
             return hist["Close"].iloc[-1]
         return None
@@ -101,14 +136,13 @@ def obter_preco_atual(ticker):
 
 
 def calcular_dy_atual(ticker):
-    """Calcula dividend yield atual de um FII"""
-    try:
-        t = yf.Ticker(f"{ticker}.SA")
-        info = t.info
-        dy = info.get("dividendYield", 0)
-        if dy and dy > 0:
-            return dy * 100  # Retorna em percentual
-        return None
-    except:
-        return None
+    """
+    Dividend yield atual de um FII (%), pelo catálogo local (core/catalogo_fiis.py)
+
+    Só lê: a atualização do catálogo fica com a etapa em lote do dashboard e com o worker
+    """
+    dy = carregar_catalogo().valor(ticker, "DY_Anual", 0)
+    if dy > 0:
+        return dy * 100  # Retorna em percentual
+    return None
 
@@ -0,0 +1,154 @@
+"""
+Cache em memória limitado por bytes (LRU)
+Para históricos, arrays e DataFrames calculados dentro do processo: o tamanho
+de cada valor é medido (memory_usage(deep=True), nbytes) e o total nunca passa
+do orçamento global, então a memória fica estável em servidores de longa duração
+
+Os valores devolvidos são compartilhados entre chamadas: quem precisar alterar
+deve copiar antes
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.shared_cache import chave_chamada
+
+MAX_BYTES = int(os.getenv("FII_CACHE_MEMORIA_MB", "128")) * 1024 * 1024
+
+_AUSENTE = object()
+
+
+def tamanho_em_bytes(valor: Any) -> int:
+    """Estimativa do tamanho de `valor` em memória (inclui strings de colunas object)"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True, index=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (bytes, bytearray, str)):
+        return sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            tamanho_em_bytes(k) + tamanho_em_bytes(v) for k, v in valor.items()
+        )
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(v) for v in valor)
+    if hasattr(valor, "to_plotly_json"):  # Figuras plotly
+        return tamanho_em_bytes(valor.to_plotly_json())
+    return sys.getsizeof(valor)
+
+
+class CacheMemoria:
+    """
+    LRU global com orçamento em bytes e estatísticas por namespace
+
+    Thread-safe (as buscas de mercado rodam em threads de fundo)
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas: "OrderedDict[tuple, tuple]" = OrderedDict()  # (ns, chave) -> (valor, bytes, expira_em)
+        self._trava = threading.Lock()
+        self.acertos: Counter = Counter()
+        self.falhas: Counter = Counter()
+        self.despejos: Counter = Counter()
+
+    def obter(self, namespace: str, chave: str, padrao: Any = None) -> Any:
+        with self._trava:
+            item = self._entradas.get((namespace, chave))
+            if item is None or (item[2] is not None and item[2] <= time.monotonic()):
+                if item is not None:
+                    self._remover((namespace, chave))
+                self.falhas[namespace] += 1
+                return padrao
+            self._entradas.move_to_end((namespace, chave))
+            self.acertos[namespace] += 1
+            return item[0]
+
+    def gravar(self, namespace: str, chave: str, valor: Any, ttl: Optional[float] = None) -> bool:
+        """Guarda `valor`; valores maiores que o orçamento inteiro não são guardados"""
+        tamanho = tamanho_em_bytes(valor)
+        if tamanho > self.max_bytes:
+            return False
+        expira_em = time.monotonic() + ttl if ttl is not None else None
+
+        with self._trava:
+            if (namespace, chave) in self._entradas:
+                self._remover((namespace, chave))
+            self._entradas[(namespace, chave)] = (valor, tamanho, expira_em)
+            self.bytes += tamanho
+
+            # Despejo LRU até caber no orçamento
+            while self.bytes > self.max_bytes:
+                mais_antiga = next(iter(self._entradas))
+                self._remover(mais_antiga)
+                self.despejos[mais_antiga[0]] += 1
+        return True
+
+    def _remover(self, chave: tuple):
+        _, tamanho, _ = self._entradas.pop(chave)
+        self.bytes -= tamanho
+
+    def limpar(self, namespace: Optional[str] = None):
+        with self._trava:
+            for chave in [c for c in self._entradas if namespace is None or c[0] == namespace]:
+                self._remover(chave)
+            self.acertos.clear()
+            self.falhas.clear()
+            self.despejos.clear()
+
+    def estatisticas(self) -> pd.DataFrame:
+        """Entradas, KB, acertos, falhas e despejos por namespace"""
+        with self._trava:
+            entradas = Counter(ns for ns, _ in self._entradas)
+            bytes_ns = Counter()
+            for (ns, _), (_, tamanho, _) in self._entradas.items():
+                bytes_ns[ns] += tamanho
+            nomes = sorted(set(entradas) | set(self.acertos) | set(self.falhas))
+            return pd.DataFrame([{
+                "Namespace": ns,
+                "Entradas": entradas[ns],
+                "KB": bytes_ns[ns] / 1024,
+                "Acertos": self.acertos[ns],
+                "Falhas": self.falhas[ns],
+                "Despejos": self.despejos[ns],
+            } for ns in nomes], columns=["Namespace", "Entradas", "KB", "Acertos", "Falhas", "Despejos"])
+
+
+# Instância global do processo
+cache_memoria = CacheMemoria()
+
+
+def em_memoria(namespace: str, ttl: Optional[float] = None,
+               cachear_se: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorador: resultado da função no cache em memória do processo
+
+    Args:
+        namespace: grupo das entradas (ex: "historicos")
+        ttl: validade em segundos (None = até ser despejado)
+        cachear_se: predicado sobre o resultado; resultados rejeitados não são guardados
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def chamar(*args, **kwargs):
+            chave = chave_chamada(func, args, kwargs)
+            valor = cache_memoria.obter(namespace, chave, _AUSENTE)
+            if valor is not _AUSENTE:
+                return valor
+
+            valor = func(*args, **kwargs)
+            if cachear_se is None or cachear_se(valor):
+                cache_memoria.gravar(namespace, chave, valor, ttl)
+            return valor
+        return chamar
+    return decorador
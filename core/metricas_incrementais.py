@@ -0,0 +1,179 @@
+"""
+Métricas da carteira atualizadas incrementalmente (simulações "e se")
+Em vez de recalcular tudo a cada posição alterada, mantém somas correntes
+(Σvalor, Σrenda, Σvalor², Σyield, Σyield², Σvalor por setor) e listas ordenadas
+de yields e valores (SortedList): alterar uma posição custa O(1) nas somas e
+O(log n) nas listas, e o vetor de métricas sai sem percorrer a carteira
+
+O vetor tem o mesmo formato de PortfolioMetrics.vetor(), então serve direto
+para as regras de saúde (carteira_health.analisar_saude_valores)
+"""
+import math
+from typing import Dict, Hashable, List, Tuple
+
+import pandas as pd
+from sortedcontainers import SortedList
+
+from core.catalogo_fiis import SEM_CLASSIFICACAO, carregar_catalogo
+
+
+class MetricasIncrementais:
+    """
+    Posições identificadas por uma chave qualquer (ex: índice da linha no CSV),
+    então tickers repetidos continuam sendo posições separadas, como no DataFrame
+    """
+
+    def __init__(self):
+        self._posicoes: Dict[Hashable, Tuple[str, float, float, int]] = {}  # chave -> (ticker, valor, yield, seq)
+        self._yields = SortedList()   # (yield, seq)
+        self._valores = SortedList()  # (valor, seq)
+        self._tickers: Dict[int, str] = {}
+        self._setores: Dict[str, List[float]] = {}   # setor -> [Σvalor, posições]
+        self._seq = 0
+        self._soma_valor = 0.0
+        self._soma_renda = 0.0
+        self._soma_valor2 = 0.0
+        self._soma_yield = 0.0
+        self._soma_yield2 = 0.0
+
+    @classmethod
+    def da_carteira(cls, df_carteira: pd.DataFrame) -> "MetricasIncrementais":
+        """Modelo a partir das colunas Ticker, Quantidade, Preco_Medio, Dividendo_Mensal (chave = índice)"""
+        modelo = cls()
+        colunas = ["Ticker", "Quantidade", "Preco_Medio", "Dividendo_Mensal"]
+        for chave, ticker, quantidade, preco, dividendo in df_carteira[colunas].itertuples():
+            modelo.definir(chave, ticker, quantidade, preco, dividendo)
+        return modelo
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._posicoes
+
+    # -------------------------------------------------
+    # Alterações
+    # -------------------------------------------------
+    def definir(self, chave: Hashable, ticker: str, quantidade: float, preco_medio: float,
+                dividendo_mensal: float):
+        """Inclui ou altera a posição `chave`; quantidade <= 0 remove a posição"""
+        if chave in self._posicoes:
+            self.remover(chave)
+        if quantidade <= 0:
+            return
+        if preco_medio <= 0:
+            raise ValueError(f"Preço médio deve ser positivo ({ticker}: {preco_medio})")
+
+        valor = float(quantidade) * float(preco_medio)
+        renda = float(quantidade) * float(dividendo_mensal)
+        yield_mensal = renda / valor
+
+        self._seq += 1
+        seq = self._seq
+        self._posicoes[chave] = (str(ticker), valor, yield_mensal, seq)
+        self._tickers[seq] = str(ticker)
+        setor = self._setores.setdefault(self._setor(ticker), [0.0, 0])
+        setor[0] += valor
+        setor[1] += 1
+        self._yields.add((yield_mensal, seq))
+        self._valores.add((valor, seq))
+
+        self._soma_valor += valor
+        self._soma_renda += renda
+        self._soma_valor2 += valor * valor
+        self._soma_yield += yield_mensal
+        self._soma_yield2 += yield_mensal * yield_mensal
+
+    def remover(self, chave: Hashable):
+        """Remove a posição `chave` (sem efeito se não existir)"""
+        item = self._posicoes.pop(chave, None)
+        if item is None:
+            return
+        ticker, valor, yield_mensal, seq = item
+        del self._tickers[seq]
+        nome_setor = self._setor(ticker)
+        setor = self._setores[nome_setor]
+        setor[0] -= valor
+        setor[1] -= 1
+        if not setor[1]:
+            del self._setores[nome_setor]
+        self._yields.remove((yield_mensal, seq))
+        self._valores.remove((valor, seq))
+
+        self._soma_valor -= valor
+        self._soma_renda -= valor * yield_mensal
+        self._soma_valor2 -= valor * valor
+        self._soma_yield -= yield_mensal
+        self._soma_yield2 -= yield_mensal * yield_mensal
+
+        if not self._posicoes:
+            # Carteira vazia: zera as somas (evita resíduo de arredondamento)
+            self._soma_valor = self._soma_renda = self._soma_valor2 = 0.0
+            self._soma_yield = self._soma_yield2 = 0.0
+
+    @staticmethod
+    def _setor(ticker: str) -> str:
+        return carregar_catalogo().valor(ticker, "Segmento", SEM_CLASSIFICACAO)
+
+    # -------------------------------------------------
+    # Leitura
+    # -------------------------------------------------
+    def _valores_setores(self) -> Dict[str, float]:
+        """Σvalor dos setores classificados (como em PortfolioMetrics.setores)"""
+        return {
+            nome: soma for nome, (soma, _) in self._setores.items()
+            if nome != SEM_CLASSIFICACAO and soma > 0
+        }
+
+    @property
+    def maior_setor(self) -> str:
+        setores = self._valores_setores()
+        return max(setores, key=setores.get) if setores else ""
+
+    def _limite_subperformante(self) -> int:
+        """Quantidade de posições com yield < 70% da média simples (prefixo da lista ordenada)"""
+        if not self._posicoes:
+            return 0
+        media = self._soma_yield / len(self._posicoes)
+        return self._yields.bisect_left((media * 0.7,))
+
+    @property
+    def tickers_subperformantes(self) -> Tuple[str, ...]:
+        """Tickers subperformantes na ordem em que as posições foram incluídas"""
+        seqs = sorted(seq for _, seq in self._yields.islice(stop=self._limite_subperformante()))
+        return tuple(self._tickers[seq] for seq in seqs)
+
+    def vetor(self) -> Dict[str, float]:
+        """Agregados no formato de PortfolioMetrics.vetor()"""
+        n = len(self._posicoes)
+        patrimonio = self._soma_valor
+        renda_mensal = self._soma_renda
+        yield_medio = renda_mensal / patrimonio if patrimonio > 0 else 0.0
+        media_simples = self._soma_yield / n if n else 0.0
+
+        if n > 1:
+            variancia = (self._soma_yield2 - n * media_simples ** 2) / (n - 1)
+            desvio = math.sqrt(max(variancia, 0.0))
+        else:
+            desvio = 0.0
+
+        pct_setores = [soma / patrimonio * 100 for soma in self._valores_setores().values()]
+
+        return {
+            "patrimonio": patrimonio,
+            "renda_mensal": renda_mensal,
+            "yield_medio": yield_medio,
+            "yield_medio_ativos": media_simples * 100,
+            "yield_min": self._yields[0][0] * 100 if n else 0.0,
+            "yield_max": self._yields[-1][0] * 100 if n else 0.0,
+            "desvio_yield": desvio * 100,
+            "num_ativos": n,
+            "max_concentracao": self._valores[-1][0] / patrimonio * 100 if n else 0.0,
+            "hhi": self._soma_valor2 / patrimonio ** 2 * 10_000 if n else 0.0,
+            "meses_dobrar": math.log(2) / math.log1p(yield_medio) if yield_medio > 0 else 0.0,
+            "num_subperformantes": self._limite_subperformante(),
+            "num_setores": len(pct_setores),
+            "max_concentracao_setor": max(pct_setores, default=0.0),
+            "hhi_setor": sum(pct * pct for pct in pct_setores),
+            "pct_classificado": sum(pct_setores),
+        }
@@ -2,9 +2,126 @@
 Módulo para análise de notícias e sentimentos relacionados aos FIIs da carteira
 """
 import pandas as pd
-from typing import List, Dict
+from typing import Dict, Iterable, List, Set, Tuple
+import hashlib
 import re
 
+# Palavras-chave positivas e negativas (simplificado)
+PALAVRAS_POSITIVAS = (
+    "crescimento", "expansão", "aumento", "alta", "lucro", "receita",
+    "performance", "resultado positivo", "dividendo", "aluguel",
+    "vacância baixa", "novo contrato", "ocupação"
+)
+
+PALAVRAS_NEGATIVAS = (
+    "queda", "perda", "dificuldade", "risco", "incerteza", "vacância",
+    "inquilino", "cancelamento", "problema", "investigação", "suspensão"
+)
+
+# Variantes acentuadas de cada letra: a regex aceita qualquer uma, então o texto
+# não precisa ser normalizado (só os trechos encontrados)
+_VARIANTES = {"a": "aáàâãä", "e": "eéèêë", "i": "iíìîï", "o": "oóòôõö", "u": "uúùûü", "c": "cç"}
+_SEM_ACENTO = str.maketrans({
+    acentuada: letra for letra, variantes in _VARIANTES.items() for acentuada in variantes[1:]
+})
+
+
+def normalizar_termo(texto: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples ("Vacância  Baixa" -> "vacancia baixa")"""
+    return " ".join(texto.lower().translate(_SEM_ACENTO).split())
+
+
+def _padrao_trie(termos: Iterable[str]) -> str:
+    """
+    Alternância em forma de trie ("alta|aluguel" -> "al(?:ta|uguel)"): prefixos comuns
+    são testados uma vez só. Letras aceitam as variantes acentuadas; espaço aceita \s+
+    """
+    raiz: Dict = {}
+    for termo in termos:
+        no = raiz
+        for letra in termo:
+            no = no.setdefault(letra, {})
+        no[""] = {}
+
+    def gerar(no: Dict) -> str:
+        ramos = []
+        for letra, filho in sorted(no.items()):
+            if letra == "":
+                continue
+            if letra == " ":
+                atomo = r"\s+"
+            elif letra in _VARIANTES:
+                atomo = f"[{_VARIANTES[letra]}]"
+            else:
+                atomo = re.escape(letra)
+            ramos.append(atomo + gerar(filho))
+        if not ramos:
+            return ""
+        padrao = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        return f"(?:{padrao})?" if "" in no else padrao
+
+    return gerar(raiz)
+
+
+def _subtermos(termo: str) -> Set[str]:
+    """Sequências contíguas de palavras de `termo` ("a b c" -> a, b, c, a b, b c, a b c)"""
+    palavras = termo.split()
+    return {
+        " ".join(palavras[i:j]) for i in range(len(palavras)) for j in range(i + 1, len(palavras) + 1)
+    }
+
+
+class LexicoSentimento:
+    """
+    Termos positivos e negativos compilados uma vez em uma única regex
+
+    Uma passada por documento encontra todos os termos, com limite de palavra
+    ("alta" não casa com "altamente"), sem depender de acentos ("vacancia" =
+    "vacância") e aceitando plural ("dividendos"). Um termo composto que contém
+    outro inteiro ("vacância baixa" contém "vacância") conta os dois
+    """
+
+    def __init__(self, positivas: Iterable[str], negativas: Iterable[str]):
+        self.polaridade = {normalizar_termo(t): 1 for t in positivas}
+        self.polaridade.update({normalizar_termo(t): -1 for t in negativas})
+        termos = sorted(self.polaridade)
+        self._regex = re.compile(r"\b(" + _padrao_trie(termos) + r")(?:e?s)?\b")
+        self._contidos = {termo: _subtermos(termo) & self.polaridade.keys() for termo in termos}
+        # Identifica o léxico: pontuações guardadas com outra versão precisam ser refeitas
+        assinatura = "\n".join(f"{termo}\t{self.polaridade[termo]}" for termo in termos)
+        self.versao = int(hashlib.sha1(assinatura.encode("utf-8")).hexdigest()[:15], 16)
+
+    def termos(self, texto: str) -> Set[str]:
+        """Termos (normalizados) presentes em `texto`"""
+        encontrados = set()
+        for trecho in set(self._regex.findall(texto.lower())):
+            encontrados |= self._contidos[normalizar_termo(trecho)]
+        return encontrados
+
+    def contar(self, texto: str) -> Tuple[int, int]:
+        """(termos positivos distintos, termos negativos distintos) em `texto`"""
+        termos = self.termos(texto)
+        positivas = sum(1 for termo in termos if self.polaridade[termo] > 0)
+        return positivas, len(termos) - positivas
+
+
+LEXICO = LexicoSentimento(PALAVRAS_POSITIVAS, PALAVRAS_NEGATIVAS)
+
+
+def contar_termos_noticia(noticia: Dict) -> Tuple[int, int]:
+    """(termos positivos, termos negativos) no título + conteúdo de uma notícia"""
+    return LEXICO.contar(f"{noticia.get('titulo', '')} {noticia.get('conteudo', '')}")
+
+
+def classificar_sentimento(score: float) -> str:
+    """positivo / negativo / neutro para um score entre -1 e 1"""
+    if score > 0.2:
+        return "positivo"
+    if score < -0.2:
+        return "negativo"
+    return "neutro"
+
+
 def analisar_noticias_fii(ticker: str, noticias: List[Dict] = None) -> Dict:
     """
     Analisa notícias de um FII específico e retorna sentimento
@@ -18,28 +135,11 @@ def analisar_noticias_fii(ticker: str, noticias: List[Dict] = None) -> Dict:
             "relevancia": []
         }
     
-    # Palavras-chave positivas e negativas (simplificado)
-    palavras_positivas = [
-        "crescimento", "expansão", "aumento", "alta", "lucro", "receita",
-        "performance", "resultado positivo", "dividendo", "aluguel",
-        "vacância baixa", "novo contrato", "ocupação"
-    ]
-    
-    palavras_negativas = [
-        "queda", "perda", "dificuldade", "risco", "incerteza", "vacância",
-        "inquilino", "cancelamento", "problema", "investigação", "suspensão"
-    ]
-    
     score_total = 0
     relevancias = []
     
     for noticia in noticias:
-        titulo = noticia.get("titulo", "").lower()
-        conteudo = noticia.get("conteudo", "").lower()
-        texto_completo = f"{titulo} {conteudo}"
-        
-        positivas = sum(1 for palavra in palavras_positivas if palavra in texto_completo)
-        negativas = sum(1 for palavra in palavras_negativas if palavra in texto_completo)
+        positivas, negativas = contar_termos_noticia(noticia)
         
         score_noticia = positivas - negativas
         score_total += score_noticia
@@ -59,12 +159,7 @@ def analisar_noticias_fii(ticker: str, noticias: List[Dict] = None) -> Dict:
         score_normalizado = 0
     
     # Determinar sentimento
-    if score_normalizado > 0.2:
-        sentimento = "positivo"
-    elif score_normalizado < -0.2:
-        sentimento = "negativo"
-    else:
-        sentimento = "neutro"
+    sentimento = classificar_sentimento(score_normalizado)
     
     # Gerar resumo
     if sentimento == "positivo":
@@ -82,49 +177,41 @@ def analisar_noticias_fii(ticker: str, noticias: List[Dict] = None) -> Dict:
     }
 
 
-def buscar_noticias_mercado() -> List[Dict]:
+def buscar_noticias_mercado(quantidade: int = 10) -> List[Dict]:
     """
-    Busca notícias gerais do mercado de FIIs
-    Retorna lista de notícias simuladas - idealmente usaria API de notícias real
+    Notícias mais recentes do mercado de FIIs
+    Lidas do arquivo local alimentado por core/ingestao_noticias.py (dumps RSS/Atom/JSONL)
     """
-    # Esta é uma implementação mock - idealmente usaria:
-    # - API do Google News
-    # - RSS feeds de sites financeiros
-    # - API do Yahoo Finance
-    # - Web scraping (com permissões)
-    
-    noticias_mock = [
-        {
-            "titulo": "Mercado de FIIs registra alta em 2024",
-            "fonte": "InfoMoney",
-            "data": "2024-01-15",
-            "relevancia": "alta"
-        },
-        {
-            "titulo": "Taxa SELIC impacta atratividade dos fundos imobiliários",
-            "fonte": "Valor Econômico",
-            "data": "2024-01-10",
-            "relevancia": "alta"
-        }
-    ]
-    
-    return noticias_mock
+    from core.indice_noticias import noticias_recentes  # importação tardia (evita ciclo)
+
+    return noticias_recentes(quantidade)
 
 
 def analisar_sentimento_carteira(tickers: List[str], noticias_por_ticker: Dict[str, List] = None) -> Dict:
     """
     Analisa sentimento geral da carteira baseado em notícias
+    Sem `noticias_por_ticker`, lê o sentimento já agregado de cada ticker no índice de
+    notícias locais (média com decaimento exponencial pela idade, uma consulta por carteira)
     """
     sentimentos = []
-    
-    for ticker in tickers:
-        noticias = noticias_por_ticker.get(ticker, []) if noticias_por_ticker else []
-        analise = analisar_noticias_fii(ticker, noticias)
-        sentimentos.append({
-            "ticker": ticker,
-            "sentimento": analise["sentimento"],
-            "score": analise["score"]
-        })
+
+    if noticias_por_ticker is None:
+        from core.indice_noticias import sentimento_por_ticker  # importação tardia (evita ciclo)
+
+        for ticker, agregado in sentimento_por_ticker(tickers).items():
+            sentimentos.append({
+                "ticker": ticker,
+                "sentimento": classificar_sentimento(agregado["score"]),
+                "score": agregado["score"]
+            })
+    else:
+        for ticker in tickers:
+            analise = analisar_noticias_fii(ticker, noticias_por_ticker.get(ticker, []))
+            sentimentos.append({
+                "ticker": ticker,
+                "sentimento": analise["sentimento"],
+                "score": analise["score"]
+            })
     
     if not sentimentos:
         return {
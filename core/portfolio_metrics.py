@@ -0,0 +1,315 @@
+"""
+Métricas da carteira calculadas uma única vez por execução
+Colunas derivadas e agregados compartilhados pelo dashboard, pela análise
+de saúde e pelo módulo de reinvestimento
+"""
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.catalogo_fiis import SEM_CLASSIFICACAO, carregar_catalogo
+
+COLUNAS_OBRIGATORIAS = ["Ticker", "Quantidade", "Preco_Medio", "Dividendo_Mensal"]
+COLUNAS_DERIVADAS = [
+    "Valor_Investido", "Renda_Mensal", "Yield_Mensal", "Pct_Patrimonio", "Yield (%)",
+    "Renda_Anual", "Dividendo_Anual", "Yield_vs_Media", "Prioridade_Reinvestimento",
+    "Segmento", "Tipo"
+]
+# Vetor de métricas por carteira (PortfolioMetrics.vetor / colunas de metricas_lote)
+METRICAS_VETOR = (
+    "patrimonio", "renda_mensal", "yield_medio", "yield_medio_ativos", "yield_min", "yield_max",
+    "desvio_yield", "num_ativos", "max_concentracao", "hhi", "meses_dobrar", "num_subperformantes",
+    "num_setores", "max_concentracao_setor", "hhi_setor", "pct_classificado"
+)
+
+
+def enriquecer_carteira(df_carteira: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula todas as colunas derivadas da carteira de forma vetorizada
+
+    Adiciona: Valor_Investido, Renda_Mensal, Yield_Mensal, Pct_Patrimonio,
+    Yield (%), Renda_Anual, Dividendo_Anual, Yield_vs_Media, Prioridade_Reinvestimento,
+    Segmento e Tipo (catálogo de FIIs)
+    """
+    df = df_carteira.copy()
+    df[COLUNAS_OBRIGATORIAS[1:]] = df[COLUNAS_OBRIGATORIAS[1:]].astype(float)
+
+    df["Valor_Investido"] = df["Quantidade"] * df["Preco_Medio"]
+    df["Renda_Mensal"] = df["Quantidade"] * df["Dividendo_Mensal"]
+    df["Yield_Mensal"] = df["Renda_Mensal"] / df["Valor_Investido"]
+
+    patrimonio = df["Valor_Investido"].sum()
+    df["Pct_Patrimonio"] = (df["Valor_Investido"] / patrimonio) * 100
+    df["Yield (%)"] = df["Yield_Mensal"] * 100
+    df["Renda_Anual"] = df["Renda_Mensal"] * 12
+    df["Dividendo_Anual"] = df["Dividendo_Mensal"] * 12
+
+    # Métricas comparativas
+    yield_medio_geral = df["Yield (%)"].mean()
+    df["Yield_vs_Media"] = df["Yield (%)"] - yield_medio_geral
+    df["Prioridade_Reinvestimento"] = np.select(
+        [df["Yield (%)"] > yield_medio_geral * 1.1, df["Yield (%)"] > yield_medio_geral * 0.9],
+        ["Alta", "Média"],
+        default="Baixa"
+    )
+
+    # Classificação do catálogo local: fica no artefato junto com a carteira
+    classificacao = carregar_catalogo().classificar(df["Ticker"])
+    df["Segmento"] = classificacao["Segmento"].to_numpy()
+    df["Tipo"] = classificacao["Tipo"].to_numpy()
+
+    return df
+
+
+def exposicao_setorial(df: pd.DataFrame, coluna: str = "Segmento") -> pd.DataFrame:
+    """
+    Patrimônio, renda e número de ativos por setor (um groupby sobre a carteira enriquecida)
+
+    Args:
+        coluna: "Segmento" (logística, shopping, papel...) ou "Tipo" (tijolo, papel...)
+
+    Returns:
+        DataFrame indexado pelo setor, do maior para o menor, com Valor_Investido,
+        Renda_Mensal, Num_Ativos, Pct_Patrimonio, Pct_Renda e Yield (%)
+    """
+    # factorize + bincount: mesmo resultado de groupby().sum(), sem o custo fixo do agg
+    codigos, nomes = pd.factorize(df[coluna], sort=False)
+    n = len(nomes)
+    valor = np.bincount(codigos, weights=df["Valor_Investido"].to_numpy(dtype=float), minlength=n)
+    renda = np.bincount(codigos, weights=df["Renda_Mensal"].to_numpy(dtype=float), minlength=n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        setores = pd.DataFrame({
+            "Valor_Investido": valor,
+            "Renda_Mensal": renda,
+            "Num_Ativos": np.bincount(codigos, minlength=n),
+            "Pct_Patrimonio": valor / valor.sum() * 100,
+            "Pct_Renda": renda / renda.sum() * 100,
+            "Yield (%)": renda / valor * 100,
+        }, index=pd.Index(nomes, name=coluna))
+    return setores.iloc[np.argsort(-valor, kind="stable")]
+
+
+@dataclass(frozen=True)
+class PortfolioMetrics:
+    """
+    Carteira enriquecida + agregados, imutável
+
+    `frame` é compartilhado por todas as seções: quem precisar de outra ordem
+    ou de colunas extras deve derivar um novo DataFrame (sort_values, assign),
+    nunca alterar o original
+    """
+    frame: pd.DataFrame
+    patrimonio: float
+    renda_mensal: float
+    yield_medio: float           # Yield mensal ponderado pelo valor (decimal)
+    yield_medio_ativos: float    # Média simples de "Yield (%)" entre os ativos (%)
+    yield_min: float             # %
+    yield_max: float             # %
+    desvio_yield: float          # %
+    num_ativos: int
+    max_concentracao: float      # % do patrimônio na maior posição
+    hhi: float                   # Índice de Herfindahl sobre % do patrimônio
+    meses_dobrar: float
+    tickers_subperformantes: Tuple[str, ...]  # Yield < 70% da média simples
+
+    @property
+    def renda_anual(self) -> float:
+        return self.renda_mensal * 12
+
+    # Setores: calculados na primeira leitura e guardados na instância
+    @cached_property
+    def setores(self) -> pd.DataFrame:
+        """Exposição por segmento (ver exposicao_setorial)"""
+        return exposicao_setorial(self.frame, "Segmento")
+
+    @cached_property
+    def tipos(self) -> pd.DataFrame:
+        """Exposição por tipo (tijolo, papel, híbrido, FoF)"""
+        return exposicao_setorial(self.frame, "Tipo")
+
+    @cached_property
+    def _pct_setores(self) -> pd.Series:
+        """% do patrimônio por setor classificado (fundos não classificados não contam como setor)"""
+        pct = self.setores["Pct_Patrimonio"].drop(index=SEM_CLASSIFICACAO, errors="ignore")
+        return pct[pct > 0]
+
+    @property
+    def num_setores(self) -> int:
+        return len(self._pct_setores)
+
+    @property
+    def max_concentracao_setor(self) -> float:
+        """% do patrimônio no maior setor"""
+        return float(self._pct_setores.max()) if self.num_setores else 0.0
+
+    @property
+    def hhi_setor(self) -> float:
+        """Índice de Herfindahl sobre % do patrimônio por setor"""
+        return float((self._pct_setores ** 2).sum())
+
+    @property
+    def maior_setor(self) -> str:
+        return str(self._pct_setores.idxmax()) if self.num_setores else ""
+
+    @property
+    def pct_classificado(self) -> float:
+        """% do patrimônio em fundos com segmento no catálogo (base das métricas de setor)"""
+        return float(self._pct_setores.sum())
+
+    @property
+    def tickers(self) -> Tuple[str, ...]:
+        return tuple(self.frame["Ticker"].tolist())
+
+    def vetor(self) -> Dict[str, float]:
+        """Agregados escalares no mesmo formato de uma linha de metricas_lote"""
+        valores = {nome: getattr(self, nome) for nome in METRICAS_VETOR if nome != "num_subperformantes"}
+        valores["num_subperformantes"] = len(self.tickers_subperformantes)
+        return valores
+
+    @classmethod
+    def calcular(cls, df_carteira: pd.DataFrame) -> "PortfolioMetrics":
+        """Calcula métricas a partir da carteira (enriquece se faltarem colunas derivadas)"""
+        if all(c in df_carteira.columns for c in COLUNAS_DERIVADAS):
+            df = df_carteira
+        else:
+            df = enriquecer_carteira(df_carteira)
+
+        valor = df["Valor_Investido"].to_numpy(dtype=float)
+        renda = df["Renda_Mensal"].to_numpy(dtype=float)
+        yield_mensal = df["Yield_Mensal"].to_numpy(dtype=float)
+        pct = df["Pct_Patrimonio"].to_numpy(dtype=float)
+
+        patrimonio = valor.sum()
+        renda_mensal = renda.sum()
+        yield_medio = renda_mensal / patrimonio if patrimonio else 0.0
+        num_ativos = len(df)
+
+        media_simples = yield_mensal.mean() if num_ativos else 0.0
+        desvio = yield_mensal.std(ddof=1) if num_ativos > 1 else 0.0
+        subperformantes = df["Ticker"].to_numpy()[yield_mensal < media_simples * 0.7]
+
+        meses_dobrar = np.log(2) / np.log(1 + yield_medio) if yield_medio > 0 else 0
+
+        return cls(
+            frame=df,
+            patrimonio=float(patrimonio),
+            renda_mensal=float(renda_mensal),
+            yield_medio=float(yield_medio),
+            yield_medio_ativos=float(media_simples * 100),
+            yield_min=float(yield_mensal.min() * 100) if num_ativos else 0.0,
+            yield_max=float(yield_mensal.max() * 100) if num_ativos else 0.0,
+            desvio_yield=float(desvio * 100),
+            num_ativos=num_ativos,
+            max_concentracao=float(pct.max()) if num_ativos else 0.0,
+            hhi=float((pct ** 2).sum()),
+            meses_dobrar=float(meses_dobrar),
+            tickers_subperformantes=tuple(subperformantes.tolist())
+        )
+
+
+# -------------------------------------------------
+# LOTE: muitas carteiras em uma tabela longa
+# -------------------------------------------------
+COLUNAS_LOTE = ["Carteira", "Ticker", "Valor_Investido", "Yield_Mensal", "Segmento"]
+
+
+def tabela_longa(carteiras: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Junta carteiras enriquecidas ({id: DataFrame}) em uma tabela longa
+    (Carteira, Ticker, Valor_Investido, Yield_Mensal, Segmento)
+    """
+    partes = [
+        df[COLUNAS_LOTE[1:]].assign(Carteira=carteira)
+        for carteira, df in carteiras.items()
+    ]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_LOTE)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_LOTE]
+
+
+def subperformantes_lote(tabela: pd.DataFrame) -> np.ndarray:
+    """Máscara por linha: yield abaixo de 70% da média simples da própria carteira"""
+    yield_mensal = tabela["Yield_Mensal"].to_numpy(dtype=float)
+    media = tabela.groupby("Carteira", sort=False)["Yield_Mensal"].transform("mean").to_numpy(dtype=float)
+    return yield_mensal < media * 0.7
+
+
+def metricas_lote(tabela: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agregados de PortfolioMetrics para todas as carteiras da tabela longa de uma vez
+
+    Args:
+        tabela: colunas Carteira, Ticker, Valor_Investido, Yield_Mensal (decimal)
+            e Segmento (se ausente, vem do catálogo de FIIs)
+
+    Returns:
+        DataFrame indexado por Carteira com as mesmas grandezas (e unidades) de
+        PortfolioMetrics, mais num_subperformantes
+    """
+    codigos, carteiras = pd.factorize(tabela["Carteira"], sort=False)
+    n_carteiras = len(carteiras)
+    valor = tabela["Valor_Investido"].to_numpy(dtype=float)
+    yield_mensal = tabela["Yield_Mensal"].to_numpy(dtype=float)
+
+    # Somas por carteira (bincount = um passe sobre as linhas)
+    num_ativos = np.bincount(codigos, minlength=n_carteiras)
+    patrimonio = np.bincount(codigos, weights=valor, minlength=n_carteiras)
+    renda_mensal = np.bincount(codigos, weights=valor * yield_mensal, minlength=n_carteiras)
+    soma_yield = np.bincount(codigos, weights=yield_mensal, minlength=n_carteiras)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yield_medio = np.where(patrimonio > 0, renda_mensal / patrimonio, 0.0)
+        media_simples = soma_yield / num_ativos
+        pct = valor / patrimonio[codigos] * 100
+
+    desvio_quad = np.bincount(codigos, weights=(yield_mensal - media_simples[codigos]) ** 2, minlength=n_carteiras)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        desvio = np.where(num_ativos > 1, np.sqrt(desvio_quad / (num_ativos - 1)), 0.0)
+    hhi = np.bincount(codigos, weights=pct ** 2, minlength=n_carteiras)
+    subperformantes = np.bincount(codigos, weights=yield_mensal < media_simples[codigos] * 0.7,
+                                  minlength=n_carteiras)
+
+    # Mínimos/máximos por grupo
+    extremos = pd.DataFrame({"g": codigos, "y": yield_mensal, "p": pct}).groupby("g").agg(
+        yield_min=("y", "min"), yield_max=("y", "max"), max_concentracao=("p", "max")
+    ).reindex(range(n_carteiras))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        meses_dobrar = np.where(yield_medio > 0, np.log(2) / np.log1p(yield_medio), 0.0)
+
+    # Setores: somas por (carteira, setor) em uma matriz carteiras x setores
+    if "Segmento" in tabela.columns:
+        segmentos = tabela["Segmento"]
+    else:
+        segmentos = carregar_catalogo().classificar(tabela["Ticker"])["Segmento"]
+    codigos_setor, setores = pd.factorize(segmentos, sort=False)
+    n_setores = len(setores)
+    por_setor = np.bincount(
+        codigos * n_setores + codigos_setor, weights=valor, minlength=n_carteiras * n_setores
+    ).reshape(n_carteiras, n_setores)[:, np.asarray(setores != SEM_CLASSIFICACAO)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_setor = por_setor / patrimonio[:, None] * 100
+    pct_setor = np.where(por_setor > 0, pct_setor, 0.0)
+
+    return pd.DataFrame({
+        "patrimonio": patrimonio,
+        "renda_mensal": renda_mensal,
+        "yield_medio": yield_medio,
+        "yield_medio_ativos": media_simples * 100,
+        "yield_min": extremos["yield_min"].to_numpy() * 100,
+        "yield_max": extremos["yield_max"].to_numpy() * 100,
+        "desvio_yield": desvio * 100,
+        "num_ativos": num_ativos,
+        "max_concentracao": extremos["max_concentracao"].to_numpy(),
+        "hhi": hhi,
+        "meses_dobrar": meses_dobrar,
+        "num_subperformantes": subperformantes.astype(int),
+        "num_setores": (por_setor > 0).sum(axis=1),
+        "max_concentracao_setor": pct_setor.max(axis=1, initial=0.0),
+        "hhi_setor": (pct_setor ** 2).sum(axis=1),
+        "pct_classificado": pct_setor.sum(axis=1),
+    }, index=pd.Index(carteiras, name="Carteira"), columns=list(METRICAS_VETOR))
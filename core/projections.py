@@ -1,6 +1,7 @@
-import streamlit as st
 import pandas as pd
-from charts import grafico_projecao
+import numpy as np
+
+from core.memory_cache import em_memoria
 
 
 def projetar_renda(carteira, meses=60, reinvestir=True):
@@ -23,3 +24,22 @@ def projetar_renda(carteira, meses=60, reinvestir=True):
             renda_mensal = patrimonio * dy_medio / 12
 
     return pd.DataFrame(historico)
+
+
+@em_memoria("projecoes")
+def projetar_crescimento(patrimonio, renda_mensal, yield_medio, meses=60):
+    """
+    Projeção de crescimento orgânico com reinvestimento total dos dividendos
+
+    Como a renda é reinvestida todo mês à taxa yield_medio, patrimônio e renda
+    crescem geometricamente: valor_k = valor_0 * (1 + yield)^k
+
+    O DataFrame retornado fica no cache em memória: não alterar
+    """
+    fator = (1 + yield_medio) ** np.arange(meses)
+
+    return pd.DataFrame({
+        "Mês": np.arange(1, meses + 1),
+        "Renda Mensal Projetada": renda_mensal * fator,
+        "Patrimônio Projetado": patrimonio * fator
+    })
@@ -0,0 +1,229 @@
+"""
+Motor de regras de saúde da carteira
+As regras e limites ficam em config/regras_saude.yaml. Cada condição é compilada
+uma vez em uma função sobre o vetor de métricas (PortfolioMetrics.vetor ou as
+colunas de metricas_lote), então a mesma regra serve para uma carteira (escalares)
+e para um lote inteiro (arrays NumPy). Mais regras não significam mais passes
+sobre as posições: todas leem o mesmo vetor já calculado
+"""
+import ast
+import functools
+import operator
+import string
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from core.portfolio_metrics import METRICAS_VETOR
+from core.risco import METRICAS_RISCO
+
+ARQUIVO_REGRAS = Path("config/regras_saude.yaml")
+GRUPOS = ("alertas", "insights", "recomendacoes")
+# Variáveis das condições: métricas da carteira + risco de preço (NaN sem histórico,
+# então regras de risco simplesmente não disparam)
+VARIAVEIS = METRICAS_VETOR + METRICAS_RISCO
+# Variáveis só de texto (não existem no lote): tickers subperformantes em uma string
+# e o nome do setor com maior exposição
+VARIAVEIS_TEXTO = ("subperformantes", "maior_setor")
+_SEM_RISCO = {nome: float("nan") for nome in METRICAS_RISCO}
+
+Avaliador = Callable[[Mapping[str, Any]], Any]
+
+_COMPARACOES = {
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt,
+    ast.GtE: operator.ge, ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+_ARITMETICA = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+}
+
+
+# -------------------------------------------------
+# Compilação de expressões
+# -------------------------------------------------
+def compilar_expressao(texto: str, nomes=VARIAVEIS) -> Avaliador:
+    """
+    Compila `texto` (ex: "yield_medio * 100 < 0.8 and num_ativos < 5") em uma função
+    valores -> resultado, que funciona com escalares ou arrays
+
+    Só aceita números, nomes de `nomes`, aritmética, comparações e and/or/not
+    (nada de chamadas ou atributos). Erros viram ValueError com a expressão
+    """
+    try:
+        arvore = ast.parse(texto, mode="eval").body
+        return _compilar_no(arvore, set(nomes))
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f"Expressão inválida '{texto}': {e}") from None
+
+
+def _compilar_no(no: ast.AST, nomes: set) -> Avaliador:
+    if isinstance(no, ast.Constant) and isinstance(no.value, (int, float, bool)):
+        valor = no.value
+        return lambda v: valor
+
+    if isinstance(no, ast.Name):
+        if no.id not in nomes:
+            raise ValueError(f"métrica desconhecida: {no.id}")
+        nome = no.id
+        return lambda v: v[nome]
+
+    if isinstance(no, ast.BinOp) and type(no.op) in _ARITMETICA:
+        op = _ARITMETICA[type(no.op)]
+        esquerda, direita = _compilar_no(no.left, nomes), _compilar_no(no.right, nomes)
+        return lambda v: op(esquerda(v), direita(v))
+
+    if isinstance(no, ast.UnaryOp) and isinstance(no.op, ast.USub):
+        operando = _compilar_no(no.operand, nomes)
+        return lambda v: -operando(v)
+
+    if isinstance(no, ast.UnaryOp) and isinstance(no.op, ast.Not):
+        operando = _compilar_no(no.operand, nomes)
+        return lambda v: np.logical_not(operando(v))
+
+    if isinstance(no, ast.BoolOp):
+        partes = [_compilar_no(p, nomes) for p in no.values]
+        combinar = np.logical_and if isinstance(no.op, ast.And) else np.logical_or
+        # Dois a dois: no lote um operando pode ser escalar (ex: risco NaN) e outro array
+        return lambda v: functools.reduce(combinar, [p(v) for p in partes])
+
+    if isinstance(no, ast.Compare) and all(type(op) in _COMPARACOES for op in no.ops):
+        # Comparações encadeadas (0 < x < 10) viram um "and" dos pares
+        termos = [_compilar_no(t, nomes) for t in [no.left, *no.comparators]]
+        ops = [_COMPARACOES[type(op)] for op in no.ops]
+
+        def comparar(v):
+            valores = [t(v) for t in termos]
+            resultado = ops[0](valores[0], valores[1])
+            for i in range(1, len(ops)):
+                resultado = np.logical_and(resultado, ops[i](valores[i], valores[i + 1]))
+            return resultado
+        return comparar
+
+    raise ValueError(f"construção não permitida: {ast.dump(no)[:60]}")
+
+
+def _compilar_texto(modelo: str) -> List[Tuple[str, Optional[Avaliador], str]]:
+    """Partes (literal, expressão, formato) de um texto com campos {expressão:formato}"""
+    partes = []
+    for literal, campo, formato, conversao in string.Formatter().parse(modelo):
+        if conversao:
+            raise ValueError(f"Conversão !{conversao} não suportada em '{modelo}'")
+        avaliador = None
+        if campo is not None:
+            avaliador = compilar_expressao(campo, VARIAVEIS + VARIAVEIS_TEXTO)
+        partes.append((literal, avaliador, formato or ""))
+    return partes
+
+
+# -------------------------------------------------
+# Regras
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Regra:
+    id: str
+    grupo: str
+    condicao: str
+    avaliar: Avaliador
+    penalidade: float
+    saida: Tuple[Tuple[str, list], ...]  # (campo, partes do texto compilado)
+
+    def renderizar(self, valores: Mapping[str, Any]) -> Dict[str, str]:
+        """Saída da regra (ex: tipo/titulo/mensagem) para uma carteira"""
+        return {
+            campo: "".join(
+                literal + (format(avaliador(valores), formato) if avaliador else "")
+                for literal, avaliador, formato in partes
+            )
+            for campo, partes in self.saida
+        }
+
+
+@dataclass(frozen=True)
+class ConjuntoRegras:
+    score_inicial: float
+    faixas: Tuple[Tuple[float, str, str], ...]  # (mínimo, status, cor), do melhor para o pior
+    regras: Tuple[Regra, ...]
+
+    def avaliar(self, valores: Mapping[str, Any]) -> Dict[str, Any]:
+        """{id da regra: disparou} para escalares (uma carteira) ou arrays (lote)"""
+        valores = {**_SEM_RISCO, **valores}
+        return {regra.id: regra.avaliar(valores) for regra in self.regras}
+
+    def pontuar(self, disparos: Mapping[str, Any]) -> Any:
+        """Score (0 a 100) a partir dos disparos"""
+        penalidades = sum(
+            regra.penalidade * np.asarray(disparos[regra.id], dtype=float)
+            for regra in self.regras if regra.penalidade
+        )
+        return np.clip(self.score_inicial - penalidades, 0, 100)
+
+    def classificar(self, score: Any) -> Tuple[Any, Any]:
+        """(status, cor) para um score ou um array de scores"""
+        score = np.asarray(score)
+        faixas = [score >= minimo for minimo, _, _ in self.faixas]
+        ultima = self.faixas[-1]
+        status = np.select(faixas, [f[1] for f in self.faixas], default=ultima[1])
+        cor = np.select(faixas, [f[2] for f in self.faixas], default=ultima[2])
+        if score.ndim == 0:
+            return str(status), str(cor)
+        return status, cor
+
+    def do_grupo(self, grupo: str) -> Tuple[Regra, ...]:
+        return tuple(regra for regra in self.regras if regra.grupo == grupo)
+
+
+def compilar_regras(configuracao: Dict) -> ConjuntoRegras:
+    """Valida e compila a configuração (conteúdo do YAML)"""
+    regras = []
+    for item in configuracao.get("regras", []):
+        identificador = item.get("id")
+        if not identificador:
+            raise ValueError(f"Regra sem id: {item}")
+        if identificador in {r.id for r in regras}:
+            raise ValueError(f"Regra duplicada: {identificador}")
+        if item.get("grupo") not in GRUPOS:
+            raise ValueError(f"Regra {identificador}: grupo deve ser um de {', '.join(GRUPOS)}")
+
+        condicao = str(item.get("condicao", "True"))
+        regras.append(Regra(
+            id=identificador,
+            grupo=item["grupo"],
+            condicao=condicao,
+            avaliar=compilar_expressao(condicao),
+            penalidade=float(item.get("penalidade", 0)),
+            saida=tuple((campo, _compilar_texto(str(texto))) for campo, texto in item.get("saida", {}).items()),
+        ))
+
+    faixas = tuple(
+        (float(f["minimo"]), str(f["status"]), str(f["cor"]))
+        for f in sorted(configuracao.get("faixas", []), key=lambda f: f["minimo"], reverse=True)
+    )
+    if not faixas:
+        raise ValueError("Configuração de regras sem faixas de status")
+
+    return ConjuntoRegras(
+        score_inicial=float(configuracao.get("score_inicial", 100)),
+        faixas=faixas,
+        regras=tuple(regras),
+    )
+
+
+# Regras compiladas por arquivo, recompiladas só quando o arquivo muda
+_compiladas: Dict[Path, Tuple[float, ConjuntoRegras]] = {}
+
+
+def carregar_regras(caminho: Path = ARQUIVO_REGRAS) -> ConjuntoRegras:
+    """Regras compiladas de `caminho` (cache pelo mtime do arquivo)"""
+    caminho = Path(caminho)
+    mtime = caminho.stat().st_mtime
+    em_cache = _compiladas.get(caminho)
+    if em_cache is not None and em_cache[0] == mtime:
+        return em_cache[1]
+
+    with open(caminho, encoding="utf-8") as f:
+        conjunto = compilar_regras(yaml.safe_load(f) or {})
+    _compiladas[caminho] = (mtime, conjunto)
+    return conjunto
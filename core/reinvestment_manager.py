@@ -22,77 +22,67 @@ def calcular_reinvestimento(df_carteira: pd.DataFrame,
     Returns:
         DataFrame com informações de reinvestimento: cotas compradas, nova quantidade, etc.
     """
-    df = df_carteira.copy()
-    
-    # Calcular renda mensal por fundo
-    if "Renda_Mensal" not in df.columns:
-        df["Renda_Mensal"] = df["Quantidade"] * df.get("Dividendo_Mensal", 0)
-    
-    renda_total = df["Renda_Mensal"].sum()
+    df = df_carteira
+    tickers = df["Ticker"]
+    quantidade_atual = df["Quantidade"].to_numpy(dtype=float)
+    preco_medio = df["Preco_Medio"].to_numpy(dtype=float)
+    
+    # Calcular renda mensal por fundo (sem alterar o DataFrame recebido)
+    if "Renda_Mensal" in df.columns:
+        renda_mensal = df["Renda_Mensal"].to_numpy(dtype=float)
+    else:
+        renda_mensal = quantidade_atual * np.asarray(df.get("Dividendo_Mensal", 0), dtype=float)
     
-    # Se não especificar valores, distribuir proporcionalmente pela renda de cada fundo
+    # Se não especificar valores, distribuir proporcionalmente à renda gerada por cada fundo
     if valores_reinvestir is None:
-        # Distribuir proporcionalmente à renda gerada por cada fundo
-        valores_reinvestir = {}
-        for _, row in df.iterrows():
-            valores_reinvestir[row["Ticker"]] = row["Renda_Mensal"]
+        valor_reinvestir = renda_mensal
+    else:
+        valor_reinvestir = tickers.map(valores_reinvestir).fillna(0).to_numpy(dtype=float)
     
     # Buscar preços atuais se necessário
     if usar_precos_atuais:
         precos_atuais = {}
-        for ticker in df["Ticker"].unique():
+        for ticker in tickers.unique():
             preco = obter_preco_atual(ticker)
             if preco:
                 precos_atuais[ticker] = preco
-            else:
-                # Se não conseguir preço atual, usar Preco_Medio
-                preco_medio = df[df["Ticker"] == ticker]["Preco_Medio"].iloc[0]
-                precos_atuais[ticker] = preco_medio
+        # Se não conseguir preço atual, usar Preco_Medio
+        preco_atual = tickers.map(precos_atuais).to_numpy(dtype=float)
+        preco_atual = np.where(np.isnan(preco_atual), preco_medio, preco_atual)
     else:
-        precos_atuais = {row["Ticker"]: row["Preco_Medio"] for _, row in df.iterrows()}
-    
-    # Calcular reinvestimentos
-    resultados = []
-    
-    for _, row in df.iterrows():
-        ticker = row["Ticker"]
-        valor_reinvestir = valores_reinvestir.get(ticker, 0)
-        preco_atual = precos_atuais.get(ticker, row["Preco_Medio"])
-        quantidade_atual = row["Quantidade"]
-        
-        # Calcular quantas cotas podem ser compradas
-        cotas_compradas = np.floor(valor_reinvestir / preco_atual) if preco_atual > 0 else 0
-        valor_utilizado = cotas_compradas * preco_atual
-        valor_nao_utilizado = valor_reinvestir - valor_utilizado
-        
-        # Nova quantidade total
-        nova_quantidade = quantidade_atual + cotas_compradas
-        
-        # Atualizar preço médio ponderado
-        valor_investido_atual = quantidade_atual * row["Preco_Medio"]
-        valor_investido_novo = cotas_compradas * preco_atual
-        valor_total = valor_investido_atual + valor_investido_novo
-        
-        if nova_quantidade > 0:
-            novo_preco_medio = valor_total / nova_quantidade
-        else:
-            novo_preco_medio = row["Preco_Medio"]
-        
-        resultados.append({
-            "Ticker": ticker,
-            "Quantidade_Atual": quantidade_atual,
-            "Valor_Reinvestir": valor_reinvestir,
-            "Preco_Atual": preco_atual,
-            "Cotas_Compradas": int(cotas_compradas),
-            "Valor_Utilizado": valor_utilizado,
-            "Valor_Nao_Utilizado": valor_nao_utilizado,
-            "Nova_Quantidade": nova_quantidade,
-            "Preco_Medio_Anterior": row["Preco_Medio"],
-            "Novo_Preco_Medio": novo_preco_medio,
-            "Renda_Mensal_Atual": row["Renda_Mensal"]
-        })
-    
-    return pd.DataFrame(resultados)
+        preco_atual = preco_medio
+    
+    # Calcular quantas cotas podem ser compradas
+    cotas_compradas = np.floor(np.divide(
+        valor_reinvestir, preco_atual,
+        out=np.zeros_like(valor_reinvestir), where=preco_atual > 0
+    ))
+    valor_utilizado = cotas_compradas * preco_atual
+    valor_nao_utilizado = valor_reinvestir - valor_utilizado
+    
+    # Nova quantidade total
+    nova_quantidade = quantidade_atual + cotas_compradas
+    
+    # Atualizar preço médio ponderado
+    valor_total = quantidade_atual * preco_medio + valor_utilizado
+    novo_preco_medio = np.divide(
+        valor_total, nova_quantidade,
+        out=preco_medio.copy(), where=nova_quantidade > 0
+    )
+    
+    return pd.DataFrame({
+        "Ticker": tickers.to_numpy(),
+        "Quantidade_Atual": quantidade_atual,
+        "Valor_Reinvestir": valor_reinvestir,
+        "Preco_Atual": preco_atual,
+        "Cotas_Compradas": cotas_compradas.astype(int),
+        "Valor_Utilizado": valor_utilizado,
+        "Valor_Nao_Utilizado": valor_nao_utilizado,
+        "Nova_Quantidade": nova_quantidade,
+        "Preco_Medio_Anterior": preco_medio,
+        "Novo_Preco_Medio": novo_preco_medio,
+        "Renda_Mensal_Atual": renda_mensal
+    })
 
 
 def gerar_carteira_atualizada(df_carteira: pd.DataFrame, 
@@ -215,35 +205,28 @@ def calcular_distribuicao_reinvestimento(df_carteira: pd.DataFrame,
         Dict com {ticker: valor_a_reinvestir}
     """
     renda_total = df_carteira["Renda_Mensal"].sum()
+    tickers = df_carteira["Ticker"]
     
     if estrategia == "proporcional":
         # Distribui proporcionalmente à renda gerada
-        distribuicao = {}
-        for _, row in df_carteira.iterrows():
-            if renda_total > 0:
-                distribuicao[row["Ticker"]] = row["Renda_Mensal"]
-            else:
-                distribuicao[row["Ticker"]] = 0
-        return distribuicao
+        valores = df_carteira["Renda_Mensal"] if renda_total > 0 else pd.Series(0.0, index=df_carteira.index)
+        return dict(zip(tickers, valores))
     
     elif estrategia == "yield_alto":
         # Prioriza fundos com maior yield
         df_sorted = df_carteira.sort_values("Yield_Mensal", ascending=False)
         pesos = df_sorted["Yield_Mensal"] / df_sorted["Yield_Mensal"].sum()
-        distribuicao = {}
-        for idx, (_, row) in enumerate(df_sorted.iterrows()):
-            distribuicao[row["Ticker"]] = renda_total * pesos.iloc[idx]
-        return distribuicao
+        return dict(zip(df_sorted["Ticker"], renda_total * pesos))
     
     elif estrategia == "diversificacao":
         # Prioriza fundos com menor % do patrimônio (diversificar)
-        df_carteira["Pct_Patrimonio"] = (df_carteira["Valor_Investido"] / df_carteira["Valor_Investido"].sum()) * 100
-        pesos = 1 / (df_carteira["Pct_Patrimonio"] + 1)  # Inverso da concentração
+        if "Pct_Patrimonio" in df_carteira.columns:
+            pct_patrimonio = df_carteira["Pct_Patrimonio"]
+        else:
+            pct_patrimonio = (df_carteira["Valor_Investido"] / df_carteira["Valor_Investido"].sum()) * 100
+        pesos = 1 / (pct_patrimonio + 1)  # Inverso da concentração
         pesos_normalizados = pesos / pesos.sum()
-        distribuicao = {}
-        for _, row in df_carteira.iterrows():
-            distribuicao[row["Ticker"]] = renda_total * pesos_normalizados[row.name]
-        return distribuicao
+        return dict(zip(tickers, renda_total * pesos_normalizados))
     
     else:
         # Default: proporcional
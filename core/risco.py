@@ -0,0 +1,218 @@
+"""
+Risco de preço da carteira a partir do histórico local de fechamentos
+Volatilidade, drawdown máximo e VaR/CVaR (histórico e paramétrico) de cada ativo
+e da carteira ponderada por valor, calculados de uma vez sobre a matriz de
+retornos (pregões x ativos, mais a coluna da carteira)
+
+A covariância usa shrinkage de Ledoit-Wolf (alvo: variância média na diagonal).
+Os momentos necessários ficam acumulados (CovarianciaIncremental) no cache
+compartilhado, então pregões novos atualizam a estimativa sem revisitar os antigos
+"""
+import hashlib
+from statistics import NormalDist
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.historico_precos import carregar_precos
+from core.shared_cache import cache_compartilhado
+
+DIAS_UTEIS_ANO = 252
+NIVEL_CONFIANCA = 0.95
+MINIMO_PREGOES = 20  # abaixo disso as estimativas não são exibidas
+
+# Variáveis de risco disponíveis para as regras de saúde (NaN sem histórico)
+METRICAS_RISCO = ("volatilidade_anual", "max_drawdown", "var_95", "cvar_95")
+
+
+def retornos_diarios(precos: pd.DataFrame) -> pd.DataFrame:
+    """Retornos simples diários (o primeiro pregão de cada ativo fica NaN)"""
+    return precos.pct_change(fill_method=None).iloc[1:]
+
+
+class CovarianciaIncremental:
+    """
+    Momentos acumulados dos retornos para a covariância de Ledoit-Wolf
+
+    Guarda T, Σx, Σxxᵀ, Σ‖x‖²x e Σ‖x‖⁴ (só pregões com todos os ativos):
+    com eles a covariância amostral e a intensidade de shrinkage saem
+    de fórmulas fechadas, sem os retornos brutos
+    """
+
+    def __init__(self, tickers: Tuple[str, ...]):
+        n = len(tickers)
+        self.tickers = tuple(tickers)
+        self.pregoes = 0
+        self.ultima_data: Optional[pd.Timestamp] = None
+        self._soma = np.zeros(n)
+        self._produtos = np.zeros((n, n))
+        self._soma_norma2_x = np.zeros(n)
+        self._soma_norma4 = 0.0
+
+    def adicionar(self, retornos: pd.DataFrame) -> int:
+        """Acumula os pregões completos posteriores a `ultima_data`; devolve quantos entraram"""
+        novos = retornos[list(self.tickers)]
+        if self.ultima_data is not None:
+            novos = novos[novos.index > self.ultima_data]
+        novos = novos.dropna()
+        if novos.empty:
+            return 0
+
+        x = novos.to_numpy(dtype=float)
+        norma2 = (x * x).sum(axis=1)
+        self.pregoes += len(x)
+        self._soma += x.sum(axis=0)
+        self._produtos += x.T @ x
+        self._soma_norma2_x += norma2 @ x
+        self._soma_norma4 += float(norma2 @ norma2)
+        self.ultima_data = novos.index.max()
+        return len(x)
+
+    def estimar(self) -> Tuple[np.ndarray, float]:
+        """(covariância diária com shrinkage, intensidade do shrinkage entre 0 e 1)"""
+        t, n = self.pregoes, len(self.tickers)
+        media = self._soma / t
+        amostral = self._produtos / t - np.outer(media, media)
+
+        alvo = np.trace(amostral) / n
+        delta2 = ((amostral - alvo * np.eye(n)) ** 2).sum() / n
+
+        # Σ‖x_t - média‖⁴ expandido em termos dos momentos acumulados
+        c = float(media @ media)
+        soma_y4 = (
+            self._soma_norma4
+            + 4 * float(media @ self._produtos @ media)
+            + t * c * c
+            - 4 * float(self._soma_norma2_x @ media)
+            + 2 * c * np.trace(self._produtos)
+            - 4 * c * float(self._soma @ media)
+        )
+        beta2 = (soma_y4 - t * (amostral ** 2).sum()) / (t * t * n)
+        shrinkage = min(max(beta2, 0.0), delta2) / delta2 if delta2 > 0 else 0.0
+
+        return shrinkage * alvo * np.eye(n) + (1 - shrinkage) * amostral, float(shrinkage)
+
+
+def covariancia_shrinkage(retornos: pd.DataFrame) -> Tuple[pd.DataFrame, float, int]:
+    """
+    Covariância de Ledoit-Wolf dos `retornos`, reaproveitando os momentos em cache
+
+    Returns:
+        (covariância diária, intensidade do shrinkage, pregões usados)
+    """
+    tickers = tuple(retornos.columns)
+    chave = hashlib.sha256("|".join(tickers).encode()).hexdigest()[:32]
+
+    # Os momentos em cache só valem se o histórico até `ultima_data` não mudou
+    # (arquivo regravado ou reiniciado): confere pela contagem de pregões completos
+    modelo = cache_compartilhado.obter("covariancia", chave)
+    if modelo is None or modelo.tickers != tickers or (
+        modelo.ultima_data is not None
+        and int((retornos.dropna().index <= modelo.ultima_data).sum()) != modelo.pregoes
+    ):
+        modelo = CovarianciaIncremental(tickers)
+    if modelo.adicionar(retornos):
+        cache_compartilhado.gravar("covariancia", chave, modelo)
+
+    if modelo.pregoes < 2:
+        vazia = pd.DataFrame(np.nan, index=list(tickers), columns=list(tickers))
+        return vazia, float("nan"), modelo.pregoes
+    cov, shrinkage = modelo.estimar()
+    return pd.DataFrame(cov, index=list(tickers), columns=list(tickers)), shrinkage, modelo.pregoes
+
+
+def analisar_risco(precos: pd.DataFrame, pesos: pd.Series,
+                   nivel: float = NIVEL_CONFIANCA) -> Optional[Dict]:
+    """
+    Risco por ativo e da carteira
+
+    Args:
+        precos: fechamentos em formato largo (datas x tickers)
+        pesos: valor investido por ticker (normalizado aqui sobre os tickers com histórico)
+        nivel: confiança do VaR/CVaR
+
+    Returns:
+        None sem histórico suficiente; senão {ativos (DataFrame), carteira (dict),
+        covariancia (DataFrame), shrinkage, pregoes, cobertura (% do patrimônio
+        com histórico), ate (última data)}. Percentuais: volatilidade anualizada,
+        drawdown negativo, VaR/CVaR como perda positiva em 1 dia
+    """
+    tickers = [t for t in precos.columns if t in pesos.index]
+    if not tickers:
+        return None
+    retornos = retornos_diarios(precos[tickers])
+    if retornos.dropna().shape[0] < MINIMO_PREGOES:
+        return None
+
+    peso = pesos.reindex(tickers).to_numpy(dtype=float)
+    cobertura = peso.sum() / pesos.sum() * 100
+    peso = peso / peso.sum()
+
+    # Carteira: só pregões com todos os ativos; ativos: tudo que cada um tem
+    x = retornos.to_numpy(dtype=float)
+    completos = ~np.isnan(x).any(axis=1)
+    carteira = np.where(completos, np.nan_to_num(x) @ peso, np.nan)
+    matriz = np.column_stack([x, carteira])
+
+    vol = np.nanstd(matriz, axis=0, ddof=1)
+    media = np.nanmean(matriz, axis=0)
+
+    riqueza = np.nancumprod(1 + matriz, axis=0)
+    drawdown = (riqueza / np.maximum.accumulate(riqueza, axis=0) - 1).min(axis=0)
+
+    corte = np.nanquantile(matriz, 1 - nivel, axis=0)
+    cauda = np.where(matriz <= corte, matriz, np.nan)
+    var_hist = -corte
+    cvar_hist = -np.nanmean(cauda, axis=0)
+
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - nivel)
+    var_param = -(media + z * vol)
+    cvar_param = vol * normal.pdf(z) / (1 - nivel) - media
+
+    tabela = pd.DataFrame({
+        "Volatilidade (% a.a.)": vol * np.sqrt(DIAS_UTEIS_ANO) * 100,
+        "Drawdown Máximo (%)": drawdown * 100,
+        "VaR Histórico (%)": var_hist * 100,
+        "CVaR Histórico (%)": cvar_hist * 100,
+        "VaR Paramétrico (%)": var_param * 100,
+        "CVaR Paramétrico (%)": cvar_param * 100,
+    }, index=pd.Index([*tickers, "Carteira"], name="Ticker"))
+
+    cov, shrinkage, pregoes = covariancia_shrinkage(retornos)
+    vol_modelo = float(np.sqrt(peso @ cov.to_numpy() @ peso * DIAS_UTEIS_ANO) * 100)
+
+    resumo = tabela.loc["Carteira"]
+    return {
+        "ativos": tabela.drop(index="Carteira"),
+        "carteira": {
+            "volatilidade_anual": float(resumo["Volatilidade (% a.a.)"]),
+            "volatilidade_modelo": vol_modelo,
+            "max_drawdown": float(resumo["Drawdown Máximo (%)"]),
+            "var_95": float(resumo["VaR Histórico (%)"]),
+            "cvar_95": float(resumo["CVaR Histórico (%)"]),
+            "var_parametrico": float(resumo["VaR Paramétrico (%)"]),
+            "cvar_parametrico": float(resumo["CVaR Paramétrico (%)"]),
+        },
+        "covariancia": cov,
+        "shrinkage": shrinkage,
+        "pregoes": pregoes,
+        "cobertura": float(cobertura),
+        "ate": retornos.index.max().strftime("%Y-%m-%d"),
+    }
+
+
+def risco_carteira(df_carteira: pd.DataFrame, nivel: float = NIVEL_CONFIANCA) -> Optional[Dict]:
+    """Risco da carteira enriquecida com o histórico local (None se ainda não houver)"""
+    pesos = df_carteira.groupby("Ticker")["Valor_Investido"].sum()
+    precos = carregar_precos(pesos.index)
+    if precos.empty:
+        return None
+    return analisar_risco(precos, pesos, nivel)
+
+
+def vetor_risco(risco: Optional[Dict]) -> Dict[str, float]:
+    """Variáveis de risco para as regras de saúde (NaN quando não há histórico)"""
+    carteira = (risco or {}).get("carteira", {})
+    return {nome: carteira.get(nome, float("nan")) for nome in METRICAS_RISCO}
@@ -0,0 +1,236 @@
+"""
+Cache compartilhado entre processos (SQLite em modo WAL)
+Workers do Streamlit, o worker.py e futuros processos de API leem e gravam no
+mesmo arquivo: um dado de mercado buscado por um processo serve a todos
+
+- Escritas atômicas (uma transação por entrada); leitores não bloqueiam escritores
+- Tamanho limitado (MAX_BYTES) com despejo LRU pelo último acesso; o total de bytes
+  fica numa linha de `meta` mantida por gatilhos (sem somar a tabela a cada escrita)
+- Valores serializados com pickle (arquivo local, escrito só por este app)
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+ARQUIVO_CACHE = Path(os.getenv("FII_CACHE_COMPARTILHADO", "data/cache/compartilhado.sqlite"))
+MAX_BYTES = int(os.getenv("FII_CACHE_COMPARTILHADO_MB", "64")) * 1024 * 1024
+# Último acesso é regravado no máximo uma vez por este intervalo (LRU aproximado,
+# evita uma escrita a cada leitura)
+INTERVALO_TOQUE = 60
+
+_AUSENTE = object()
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    namespace   TEXT NOT NULL,
+    chave       TEXT NOT NULL,
+    valor       BLOB NOT NULL,
+    tamanho     INTEGER NOT NULL,
+    criado_em   REAL NOT NULL,
+    expira_em   REAL,
+    acessado_em REAL NOT NULL,
+    PRIMARY KEY (namespace, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_entradas_acesso ON entradas (acessado_em);
+CREATE INDEX IF NOT EXISTS idx_entradas_expira ON entradas (expira_em) WHERE expira_em IS NOT NULL;
+
+-- Total de bytes mantido pelos gatilhos, na mesma transação de cada escrita
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS tamanho_inserir AFTER INSERT ON entradas BEGIN
+    UPDATE meta SET valor = valor + NEW.tamanho WHERE chave = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS tamanho_atualizar AFTER UPDATE OF tamanho ON entradas BEGIN
+    UPDATE meta SET valor = valor + NEW.tamanho - OLD.tamanho WHERE chave = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS tamanho_remover AFTER DELETE ON entradas BEGIN
+    UPDATE meta SET valor = valor - OLD.tamanho WHERE chave = 'bytes';
+END;
+-- Arquivos anteriores aos gatilhos: soma uma única vez
+INSERT OR IGNORE INTO meta VALUES ('bytes', (SELECT COALESCE(SUM(tamanho), 0) FROM entradas));
+"""
+
+
+class CacheCompartilhado:
+    """
+    Chave-valor em SQLite compartilhado entre processos
+
+    Cada thread de cada processo usa a própria conexão. Erros do SQLite (disco
+    cheio, somente leitura, banco travado) nunca se propagam: leitura vira miss
+    e escrita é ignorada
+    """
+
+    def __init__(self, caminho: Path = ARQUIVO_CACHE, max_bytes: int = MAX_BYTES):
+        self.caminho = Path(caminho)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.acertos: Counter = Counter()
+        self.falhas: Counter = Counter()
+
+    # -------------------------------------------------
+    # Conexão
+    # -------------------------------------------------
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, "conexao", None)
+        # Conexões não sobrevivem a fork: recria se o processo mudou
+        if conexao is None or self._local.pid != os.getpid():
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.executescript(_ESQUEMA)
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    # -------------------------------------------------
+    # Operações
+    # -------------------------------------------------
+    def obter(self, namespace: str, chave: str, padrao: Any = None) -> Any:
+        """Valor de (namespace, chave) ou `padrao` se ausente/expirado"""
+        agora = time.time()
+        try:
+            conexao = self._conexao()
+            linha = conexao.execute(
+                "SELECT valor, expira_em, acessado_em FROM entradas WHERE namespace = ? AND chave = ?",
+                (namespace, chave)
+            ).fetchone()
+            if linha is None or (linha[1] is not None and linha[1] <= agora):
+                self.falhas[namespace] += 1
+                return padrao
+            if agora - linha[2] > INTERVALO_TOQUE:
+                conexao.execute(
+                    "UPDATE entradas SET acessado_em = ? WHERE namespace = ? AND chave = ?",
+                    (agora, namespace, chave)
+                )
+            valor = pickle.loads(linha[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.falhas[namespace] += 1
+            return padrao
+        self.acertos[namespace] += 1
+        return valor
+
+    def gravar(self, namespace: str, chave: str, valor: Any, ttl: Optional[float] = None) -> bool:
+        """Grava (namespace, chave) com validade de `ttl` segundos (None = sem validade)"""
+        try:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        if len(dados) > self.max_bytes:
+            return False
+
+        agora = time.time()
+        try:
+            conexao = self._conexao()
+            with conexao:  # transação: grava, atualiza o total e despeja juntos
+                conexao.execute("BEGIN IMMEDIATE")
+                # Upsert (e não INSERT OR REPLACE): a remoção implícita do REPLACE não dispara gatilhos
+                conexao.execute(
+                    "INSERT INTO entradas VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, chave) DO UPDATE SET valor = excluded.valor, "
+                    "tamanho = excluded.tamanho, criado_em = excluded.criado_em, "
+                    "expira_em = excluded.expira_em, acessado_em = excluded.acessado_em",
+                    (namespace, chave, dados, len(dados), agora,
+                     agora + ttl if ttl is not None else None, agora)
+                )
+                self._despejar(conexao, agora)
+        except sqlite3.Error:
+            return False
+        return True
+
+    def _despejar(self, conexao: sqlite3.Connection, agora: float):
+        """Remove expirados e, se preciso, as entradas menos acessadas até caber em max_bytes"""
+        conexao.execute("DELETE FROM entradas WHERE expira_em IS NOT NULL AND expira_em <= ?", (agora,))
+        total = conexao.execute("SELECT valor FROM meta WHERE chave = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excesso = total - self.max_bytes
+        removidas = []
+        for namespace, chave, tamanho in conexao.execute(
+            "SELECT namespace, chave, tamanho FROM entradas ORDER BY acessado_em"
+        ):
+            removidas.append((namespace, chave))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        conexao.executemany("DELETE FROM entradas WHERE namespace = ? AND chave = ?", removidas)
+
+    def limpar(self, namespace: Optional[str] = None):
+        """Remove todas as entradas (ou só as de `namespace`)"""
+        try:
+            conexao = self._conexao()
+            if namespace is None:
+                conexao.execute("DELETE FROM entradas")
+            else:
+                conexao.execute("DELETE FROM entradas WHERE namespace = ?", (namespace,))
+        except sqlite3.Error:
+            pass
+        self.acertos.clear()
+        self.falhas.clear()
+
+    def estatisticas(self) -> pd.DataFrame:
+        """Entradas e bytes por namespace (no arquivo) + acertos/falhas deste processo"""
+        try:
+            linhas = self._conexao().execute(
+                "SELECT namespace, COUNT(*), SUM(tamanho) FROM entradas GROUP BY namespace"
+            ).fetchall()
+        except sqlite3.Error:
+            linhas = []
+        por_ns = {ns: (n, b) for ns, n, b in linhas}
+        nomes = sorted(set(por_ns) | set(self.acertos) | set(self.falhas))
+        return pd.DataFrame([{
+            "Namespace": ns,
+            "Entradas": por_ns.get(ns, (0, 0))[0],
+            "KB": por_ns.get(ns, (0, 0))[1] / 1024,
+            "Acertos": self.acertos[ns],
+            "Falhas": self.falhas[ns],
+        } for ns in nomes], columns=["Namespace", "Entradas", "KB", "Acertos", "Falhas"])
+
+
+# Instância global (a conexão só é aberta no primeiro uso)
+cache_compartilhado = CacheCompartilhado()
+
+
+def chave_chamada(func: Callable, args: tuple, kwargs: dict) -> str:
+    """Chave estável para uma chamada: nome qualificado da função + argumentos"""
+    bruto = pickle.dumps((func.__module__, func.__qualname__, args, sorted(kwargs.items())), protocol=4)
+    return hashlib.sha256(bruto).hexdigest()[:32]
+
+
+def compartilhado(namespace: str, ttl: Optional[float] = None,
+                  cachear_se: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorador: resultado da função no cache compartilhado entre processos
+
+    Args:
+        namespace: grupo das entradas (ex: "mercado")
+        ttl: validade em segundos
+        cachear_se: predicado sobre o resultado; resultados rejeitados (ex: None
+            de uma busca que falhou) não são gravados
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def chamar(*args, **kwargs):
+            chave = chave_chamada(func, args, kwargs)
+            valor = cache_compartilhado.obter(namespace, chave, _AUSENTE)
+            if valor is not _AUSENTE:
+                return valor
+
+            valor = func(*args, **kwargs)
+            if cachear_se is None or cachear_se(valor):
+                cache_compartilhado.gravar(namespace, chave, valor, ttl)
+            return valor
+        return chamar
+    return decorador
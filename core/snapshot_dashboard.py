@@ -0,0 +1,147 @@
+"""
+Snapshot do último estado calculado do dashboard (warm start)
+Métricas, saúde, projeção, benchmarks e valores de mercado são gravados em um
+JSON compacto, cada entrada com seu horário e o contexto em que foi calculada
+(versão da carteira, horizonte, tickers). Um processo recém-iniciado renderiza
+a partir dele enquanto recalcula em segundo plano
+"""
+import json
+import os
+import threading
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.carteira_cache import DIRETORIO_CACHE
+from core.portfolio_metrics import PortfolioMetrics
+
+ARQUIVO_SNAPSHOT = DIRETORIO_CACHE / "snapshot.json"
+VERSAO_FORMATO = 1
+
+# Entradas de mercado; sentimento e correlação dependem dos ativos da carteira,
+# as demais são do mercado como um todo
+_MERCADO = ("sentimento", "noticias", "indices", "correlacao", "selic")
+_POR_CARTEIRA = ("sentimento", "correlacao")
+
+
+def _para_json(obj):
+    """Converte tipos numpy/pandas/datetime para tipos nativos do JSON"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime, pd.Timestamp)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def carregar_snapshot(caminho: Path = ARQUIVO_SNAPSHOT) -> Dict[str, Any]:
+    """Lê o snapshot do disco. Retorna {} se não existir, estiver corrompido ou em outro formato"""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if snapshot.get("formato") != VERSAO_FORMATO:
+        return {}
+    return snapshot
+
+
+def salvar_snapshot(snapshot: Dict[str, Any], caminho: Path = ARQUIVO_SNAPSHOT) -> Path:
+    """Grava o snapshot de forma atômica (arquivo temporário + rename)"""
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    snapshot["formato"] = VERSAO_FORMATO
+
+    tmp = caminho.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"), default=_para_json)
+    os.replace(tmp, caminho)
+    return caminho
+
+
+def registrar(snapshot: Dict[str, Any], nome: str, valor: Any,
+              em: Optional[datetime] = None, **contexto):
+    """
+    Registra `valor` em snapshot[nome] com horário e contexto
+
+    Args:
+        nome: entrada (ex: "metricas", "indices")
+        valor: dado serializável em JSON (tipos numpy são convertidos)
+        em: horário do cálculo (padrão: agora)
+        contexto: parâmetros que precisam coincidir para o valor ser reaproveitado
+    """
+    snapshot[nome] = {
+        "valor": valor,
+        "em": (em or datetime.now()).isoformat(timespec="seconds"),
+        "contexto": contexto,
+    }
+
+
+def entrada(snapshot: Dict[str, Any], nome: str, **contexto) -> Optional[Dict[str, Any]]:
+    """Entrada `nome` se existir e tiver sido calculada no mesmo contexto, senão None"""
+    item = snapshot.get(nome)
+    if not item:
+        return None
+    salvo = item.get("contexto", {})
+    if any(salvo.get(chave) != valor for chave, valor in contexto.items()):
+        return None
+    return item
+
+
+def rotulo_horario(item: Dict[str, Any]) -> str:
+    """Horário de uma entrada no formato exibido ("19/10 14:32")"""
+    return datetime.fromisoformat(item["em"]).strftime("%d/%m %H:%M")
+
+
+def resumo_metricas(metricas: PortfolioMetrics) -> Dict[str, Any]:
+    """Agregados escalares de PortfolioMetrics (sem o DataFrame)"""
+    resumo = {c.name: getattr(metricas, c.name) for c in fields(metricas) if c.name != "frame"}
+    resumo["tickers_subperformantes"] = list(resumo["tickers_subperformantes"])
+    resumo["renda_anual"] = metricas.renda_anual
+    return resumo
+
+
+def valores_mercado(snapshot: Dict[str, Any], tickers) -> Dict[str, Dict[str, Any]]:
+    """Entradas de mercado do snapshot válidas para `tickers` ({nome: entrada})"""
+    tickers = list(tickers)
+    itens = {}
+    for nome in _MERCADO:
+        contexto = {"tickers": tickers} if nome in _POR_CARTEIRA else {}
+        item = entrada(snapshot, nome, **contexto)
+        if item is not None:
+            itens[nome] = item
+    return itens
+
+
+def atualizar_snapshot(snapshot: Dict[str, Any], versao: str, atualizar_dados: bool,
+                       horizonte: int, metricas: PortfolioMetrics, saude: Dict,
+                       projecao: pd.DataFrame, benchmarks: Optional[Dict[str, list]],
+                       mercado: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Registra o estado calculado nesta execução
+
+    Valores de mercado ausentes em `mercado` (busca falhou) mantêm a entrada
+    anterior, com o horário de quando foram obtidos
+    """
+    carteira = dict(versao=versao, atualizar_dados=atualizar_dados)
+
+    registrar(snapshot, "metricas", resumo_metricas(metricas), **carteira)
+    registrar(snapshot, "saude", saude, **carteira)
+    registrar(snapshot, "projecao", projecao.to_dict("list"), horizonte=horizonte, **carteira)
+    if benchmarks is not None:
+        registrar(snapshot, "benchmarks", benchmarks, horizonte=horizonte, **carteira)
+
+    tickers = list(metricas.tickers)
+    for nome, valor in mercado.items():
+        if nome == "indices" and all(i.get("valor") is None for i in valor.values()):
+            continue  # Falha na busca (obter_indices não propaga erros): mantém os anteriores
+        if nome in _POR_CARTEIRA:
+            registrar(snapshot, nome, valor, tickers=tickers)
+        else:
+            registrar(snapshot, nome, valor)
+
+    return snapshot
@@ -0,0 +1,34 @@
+"""
+Motor de cálculo da carteira, sem Streamlit
+Funções puras que recebem/devolvem dados; o dashboard, o worker e o servidor
+HTTP local (python -m engine.servidor) usam o mesmo caminho de cálculo
+"""
+from engine.calculos import (
+    ESTRATEGIAS,
+    analisar,
+    carregar,
+    metricas,
+    projecao,
+    recomendacoes,
+    reinvestimento,
+    risco,
+    saude,
+    saude_lote,
+    simples,
+    sugestao_por_metas,
+)
+
+__all__ = [
+    "ESTRATEGIAS",
+    "analisar",
+    "carregar",
+    "metricas",
+    "projecao",
+    "recomendacoes",
+    "reinvestimento",
+    "risco",
+    "saude",
+    "saude_lote",
+    "simples",
+    "sugestao_por_metas",
+]
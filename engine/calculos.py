@@ -0,0 +1,133 @@
+"""
+Cálculos da carteira sem interface
+Cada função recebe e devolve dados (DataFrames, dicts); `analisar` junta tudo em
+uma estrutura simples, pronta para JSON. Usado pelo dashboard (app_cache.py),
+pelo worker.py e pelo servidor HTTP (engine/servidor.py)
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.carteira_cache import versao_carteira
+from core.carteira_health import analisar_saude_carteira, analisar_saude_lote, gerar_recomendacoes
+from core.carteira_loader import carregar_carteira_enriquecida
+from core.portfolio_metrics import PortfolioMetrics
+from core.projections import projetar_crescimento
+from core.risco import risco_carteira
+from core.reinvestment_manager import calcular_distribuicao_reinvestimento, calcular_reinvestimento
+from core.snapshot_dashboard import resumo_metricas
+
+ESTRATEGIAS = ("proporcional", "yield_alto", "diversificacao")
+
+
+def carregar(caminho: Optional[str] = None, conteudo: Optional[bytes] = None,
+             atualizar_dados: bool = False,
+             dados_mercado: Optional[Dict[str, Dict]] = None,
+             forcar_atualizacao: bool = False) -> pd.DataFrame:
+    """
+    Carteira enriquecida a partir de um CSV (caminho ou bytes); usa o cache Arrow
+
+    `dados_mercado` ({ticker: {"preco", "dividendo"}}) evita buscar de novo o que já foi buscado;
+    `forcar_atualizacao` ignora o artefato existente e recalcula
+    """
+    return carregar_carteira_enriquecida(caminho, atualizar_dados=atualizar_dados, conteudo=conteudo,
+                                         dados_mercado=dados_mercado, forcar_atualizacao=forcar_atualizacao)
+
+
+def metricas(df: pd.DataFrame) -> PortfolioMetrics:
+    return PortfolioMetrics.calcular(df)
+
+
+def risco(metricas: PortfolioMetrics) -> Optional[Dict]:
+    """Risco de preço com o histórico local (None sem histórico suficiente)"""
+    return risco_carteira(metricas.frame)
+
+
+def saude(metricas: PortfolioMetrics, risco: Optional[Dict] = None) -> Dict:
+    return analisar_saude_carteira(metricas.frame, metricas, risco=risco)
+
+
+def saude_lote(tabela: pd.DataFrame) -> pd.DataFrame:
+    """Saúde de muitas carteiras (ou variantes de uma) a partir da tabela longa, vetorizada"""
+    return analisar_saude_lote(tabela)
+
+
+def recomendacoes(metricas: PortfolioMetrics) -> List[Dict]:
+    return gerar_recomendacoes(metricas.frame, metricas=metricas)
+
+
+def projecao(metricas: PortfolioMetrics, horizonte: int = 60) -> pd.DataFrame:
+    """Projeção com reinvestimento total (o DataFrame vem do cache em memória: não alterar)"""
+    return projetar_crescimento(metricas.patrimonio, metricas.renda_mensal, metricas.yield_medio, horizonte)
+
+
+def reinvestimento(df: pd.DataFrame, estrategia: str = "proporcional",
+                   usar_precos_atuais: bool = False) -> pd.DataFrame:
+    """Cotas a comprar com a renda do mês segundo `estrategia`"""
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estratégia inválida: {estrategia} (use {', '.join(ESTRATEGIAS)})")
+    distribuicao = calcular_distribuicao_reinvestimento(df, estrategia)
+    return calcular_reinvestimento(df, distribuicao, usar_precos_atuais=usar_precos_atuais)
+
+
+def sugestao_por_metas(renda: float, metas: Dict[str, float]) -> Dict[str, float]:
+    """Divide `renda` entre os ativos proporcionalmente às metas percentuais (config/regras.yaml)"""
+    total = sum(metas.values())
+    return {ativo: round(renda * (peso / total), 2) for ativo, peso in metas.items()}
+
+
+def simples(valor: Any) -> Any:
+    """Converte DataFrames, Series e tipos numpy em listas/dicts/escalares nativos (NaN -> None)"""
+    if isinstance(valor, pd.DataFrame):
+        return [simples(linha) for linha in valor.to_dict("records")]
+    if isinstance(valor, pd.Series):
+        return simples(valor.tolist())
+    if isinstance(valor, np.ndarray):
+        return simples(valor.tolist())
+    if isinstance(valor, dict):
+        return {str(k): simples(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [simples(v) for v in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    return valor
+
+
+def analisar(caminho: Optional[str] = None, conteudo: Optional[bytes] = None,
+             atualizar_dados: bool = False, horizonte: int = 60,
+             estrategia: str = "proporcional", usar_precos_atuais: bool = False) -> Dict[str, Any]:
+    """
+    Análise completa de uma carteira, em dados simples (JSON)
+
+    Returns:
+        {versao, metricas, saude, risco, recomendacoes, projecao, reinvestimento, posicoes}
+        (risco é None sem histórico local de preços)
+        projecao é {coluna: [valores]}; reinvestimento e posicoes são listas de linhas
+    """
+    if conteudo is None:
+        if caminho is None:
+            raise ValueError("Informe caminho ou conteudo do CSV")
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+
+    df = carregar(conteudo=conteudo, atualizar_dados=atualizar_dados)
+    m = metricas(df)
+    r = risco(m)
+
+    return simples({
+        "versao": versao_carteira(conteudo),
+        "metricas": resumo_metricas(m),
+        "saude": saude(m, r),
+        # Ticker é o índice das tabelas de risco: vira coluna/chave para não se perder
+        "risco": r and {**r, "ativos": r["ativos"].reset_index(), "covariancia": r["covariancia"].to_dict()},
+        "recomendacoes": recomendacoes(m),
+        "projecao": projecao(m, horizonte).to_dict("list"),
+        "reinvestimento": reinvestimento(m.frame, estrategia, usar_precos_atuais),
+        "posicoes": m.frame,
+    })
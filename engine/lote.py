@@ -0,0 +1,174 @@
+"""
+Processamento em lote de várias carteiras (CLI)
+
+    python -m engine.lote data/                         # todos os CSVs de carteira do diretório
+    python -m engine.lote "data/carteira*.csv" --processos 4 --saida data/lote/resumo.parquet
+    python -m engine.lote familia/ --atualizar-dados --estrategia yield_alto
+
+Cada arquivo passa por carga, enriquecimento, saúde, projeção e reinvestimento em
+um pool de processos. Os dados de mercado são buscados uma única vez (união dos
+tickers de todas as carteiras) e entregues a todos os processos, então nenhum
+ticker é buscado duas vezes. O resumo (uma linha por carteira) vai para Parquet
+ou CSV, conforme a extensão de --saida
+"""
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from core.carteira_loader import buscar_dados_mercado, carteira_simplificada, colunas_csv
+from engine.calculos import ESTRATEGIAS, carregar, metricas, projecao, reinvestimento, risco, saude
+
+THREADS_MERCADO = 8
+
+# Dados de mercado do lote, entregues a cada processo pelo inicializador do pool
+_mercado: Optional[Dict[str, Dict]] = None
+
+
+def eh_carteira(arquivo: Path) -> bool:
+    """True se o cabeçalho do CSV tem a coluna de quantidade (descarta outros CSVs do diretório)"""
+    try:
+        with open(arquivo, "rb") as f:
+            colunas = colunas_csv(f.readline())
+    except (OSError, ValueError):
+        return True  # ilegível: o erro aparece no resumo
+    return any(str(coluna).strip().lower() == "quantidade" for coluna in colunas)
+
+
+def listar_arquivos(entradas: List[str]) -> List[Path]:
+    """
+    CSVs de diretórios, padrões glob e arquivos informados (sem repetição, ordenados)
+
+    Dos diretórios e padrões entram só os CSVs de carteira (eh_carteira); arquivos
+    informados um a um entram sempre
+    """
+    arquivos = set()
+    for entrada in entradas:
+        caminho = Path(entrada)
+        if caminho.is_dir():
+            arquivos.update(filter(eh_carteira, caminho.glob("*.csv")))
+        elif caminho.is_file():
+            arquivos.add(caminho)
+        else:
+            encontrados = (Path(p) for p in glob.glob(entrada, recursive=True) if p.endswith(".csv"))
+            arquivos.update(filter(eh_carteira, encontrados))
+    return sorted(arquivos)
+
+
+def buscar_mercado(arquivos: List[Path], atualizar_dados: bool) -> Dict[str, Dict]:
+    """
+    Dados de mercado de todos os tickers das carteiras que precisam deles
+
+    Falhas entram como {} (a carteira fica com os valores do CSV), para que os
+    processos do pool não tentem buscar de novo
+    """
+    tickers = set()
+    for arquivo in arquivos:
+        try:
+            conteudo = arquivo.read_bytes()
+            if atualizar_dados or carteira_simplificada(colunas_csv(conteudo)):
+                tickers.update(pd.read_csv(arquivo, usecols=["Ticker"])["Ticker"].dropna().astype(str))
+        except (OSError, ValueError):
+            continue  # o erro aparece no resumo, no processamento do arquivo
+    return buscar_dados_mercado(sorted(tickers), threads=THREADS_MERCADO)
+
+
+def _iniciar_processo(mercado: Dict[str, Dict]):
+    global _mercado
+    _mercado = mercado
+
+
+def processar_arquivo(arquivo: str, atualizar_dados: bool = False, horizonte: int = 60,
+                      estrategia: str = "proporcional") -> Dict:
+    """Linha do resumo de uma carteira (com "erro" preenchido se falhar)"""
+    inicio = time.perf_counter()
+    linha = {"arquivo": str(arquivo), "erro": None}
+    try:
+        df = carregar(arquivo, atualizar_dados=atualizar_dados, dados_mercado=_mercado)
+        m = metricas(df)
+        s = saude(m, risco(m))  # regras de risco com o histórico local, como no dashboard
+        proj = projecao(m, horizonte)
+        reinv = reinvestimento(m.frame, estrategia)
+        linha.update({
+            "num_ativos": m.num_ativos,
+            "patrimonio": m.patrimonio,
+            "renda_mensal": m.renda_mensal,
+            "renda_anual": m.renda_anual,
+            "yield_medio": m.yield_medio,
+            "score_saude": s["score"],
+            "status_saude": s["status"],
+            "alertas": len(s["alertas"]),
+            "patrimonio_projetado": float(proj["Patrimônio Projetado"].iloc[-1]),
+            "renda_projetada": float(proj["Renda Mensal Projetada"].iloc[-1]),
+            "cotas_reinvestidas": int(reinv["Cotas_Compradas"].sum()),
+            "valor_reinvestido": float(reinv["Valor_Utilizado"].sum()),
+        })
+    except Exception as e:
+        linha["erro"] = f"{type(e).__name__}: {e}"
+    linha["segundos"] = time.perf_counter() - inicio
+    return linha
+
+
+def processar_lote(arquivos: List[Path], processos: Optional[int] = None, atualizar_dados: bool = False,
+                   horizonte: int = 60, estrategia: str = "proporcional") -> pd.DataFrame:
+    """Resumo de todas as carteiras (uma linha por arquivo, na ordem de `arquivos`)"""
+    mercado = buscar_mercado(arquivos, atualizar_dados)
+    argumentos = dict(atualizar_dados=atualizar_dados, horizonte=horizonte, estrategia=estrategia)
+    processos = min(processos or os.cpu_count() or 1, len(arquivos))
+
+    if processos <= 1:
+        _iniciar_processo(mercado)
+        linhas = [processar_arquivo(str(a), **argumentos) for a in arquivos]
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                                 initargs=(mercado,)) as executor:
+            futuros = [executor.submit(processar_arquivo, str(a), **argumentos) for a in arquivos]
+            linhas = [f.result() for f in futuros]
+    return pd.DataFrame(linhas)
+
+
+def salvar_resumo(resumo: pd.DataFrame, destino: Path) -> Path:
+    """Grava o resumo em Parquet (.parquet) ou CSV (demais extensões)"""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.suffix == ".parquet":
+        resumo.to_parquet(destino, index=False)
+    else:
+        resumo.to_csv(destino, index=False)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise em lote de carteiras (CSV)")
+    parser.add_argument("entradas", nargs="+", help="Diretórios, arquivos ou padrões glob de CSVs")
+    parser.add_argument("--processos", type=int, default=None, help="Tamanho do pool (padrão: nº de CPUs)")
+    parser.add_argument("--horizonte", type=int, default=60, help="Meses de projeção")
+    parser.add_argument("--estrategia", choices=ESTRATEGIAS, default="proporcional")
+    parser.add_argument("--atualizar-dados", action="store_true", help="Busca preços e dividendos atuais")
+    parser.add_argument("--saida", type=Path, default=Path("data/lote/resumo.parquet"))
+    args = parser.parse_args()
+
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        parser.error("Nenhum CSV encontrado")
+
+    inicio = time.perf_counter()
+    resumo = processar_lote(arquivos, args.processos, args.atualizar_dados, args.horizonte, args.estrategia)
+    decorrido = time.perf_counter() - inicio
+    destino = salvar_resumo(resumo, args.saida)
+
+    falhas = int(resumo["erro"].notna().sum())
+    print(resumo.drop(columns=["erro"]).to_string(index=False))
+    for _, linha in resumo[resumo["erro"].notna()].iterrows():
+        print(f"❌ {linha['arquivo']}: {linha['erro']}")
+    print(f"\n{len(arquivos)} carteiras ({falhas} com erro) em {decorrido:.2f}s "
+          f"= {len(arquivos) / decorrido:.1f} carteiras/s")
+    print(f"Resumo: {destino}")
+
+
+if __name__ == "__main__":
+    main()
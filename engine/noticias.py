@@ -0,0 +1,145 @@
+"""
+Pontuação de sentimento em lote para grandes volumes de notícias (CLI)
+
+    python -m engine.noticias                         # ingere data/noticias/ e pontua o que falta
+    python -m engine.noticias --processos 8 --bloco-mb 8
+    python -m engine.noticias --sem-ingestao          # só pontua o que já está no arquivo local
+
+O arquivo local de notícias (core/ingestao_noticias.py) é dividido em blocos de
+bytes alinhados em quebras de linha e cada bloco é pontuado em um pool de
+processos: o processo recebe só (início, fim) e lê o próprio trecho, e devolve
+apenas (id, positivas, negativas). Cada bloco concluído é gravado na tabela de
+pontuações do índice (core/indice_noticias.py) na hora, com a vazão acumulada.
+
+Interrompido (Ctrl+C, queda), basta rodar de novo: o ponto de retomada avança
+junto com os blocos contíguos já gravados. Ao final o índice é atualizado; como
+as pontuações já existem, ele só indexa e agrega
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from core.indice_noticias import indice_noticias
+from core.ingestao_noticias import ARQUIVO_NOTICIAS, ingerir_noticias
+from core.news_analyzer import contar_termos_noticia
+
+BLOCO_BYTES = 4 * 1024 * 1024  # ~2 mil notícias por bloco
+
+Pontuacao = Tuple[str, int, int]
+
+
+def dividir_blocos(caminho: Path, inicio: int, fim: int, bloco: int = BLOCO_BYTES) -> List[Tuple[int, int]]:
+    """Trechos [início, fim) de até ~`bloco` bytes, cada um começando no início de uma linha"""
+    limites = [inicio]
+    with open(caminho, "rb") as arquivo:
+        while limites[-1] + bloco < fim:
+            arquivo.seek(limites[-1] + bloco)
+            arquivo.readline()  # avança até o fim da linha cortada
+            if arquivo.tell() >= fim:
+                break
+            limites.append(arquivo.tell())
+    return list(zip(limites, limites[1:] + [fim]))
+
+
+def pontuar_bloco(caminho: str, inicio: int, fim: int) -> List[Pontuacao]:
+    """(id, positivas, negativas) das notícias com tickers no trecho (linhas incompletas ficam de fora)"""
+    pontuacoes = []
+    with open(caminho, "rb") as arquivo:
+        arquivo.seek(inicio)
+        for linha in arquivo:
+            if inicio >= fim or not linha.endswith(b"\n"):
+                break
+            inicio += len(linha)
+            try:
+                noticia = json.loads(linha)
+            except ValueError:
+                continue
+            if noticia.get("tickers"):  # só notícias que citam ativos entram nos agregados
+                pontuacoes.append((noticia["id"], *contar_termos_noticia(noticia)))
+    return pontuacoes
+
+
+def pontuar_em_lote(processos: int = None, bloco: int = BLOCO_BYTES, caminho: Path = ARQUIVO_NOTICIAS) -> Dict:
+    """
+    Pontua as notícias pendentes do arquivo local em um pool de processos
+
+    Returns:
+        {"blocos", "noticias", "segundos", "noticias_por_segundo"}
+    """
+    inicio, fim = indice_noticias.pendente_pontuacao()
+    blocos = dividir_blocos(caminho, inicio, fim, bloco) if fim > inicio else []
+    processos = max(1, min(processos or os.cpu_count() or 1, len(blocos) or 1))
+
+    # Ponto de retomada: fim do maior prefixo de blocos concluídos
+    concluidos = set()
+    proximo = 0
+    total = 0
+    comeco = time.perf_counter()
+
+    def registrar(indice: int, pontuacoes: List[Pontuacao]):
+        nonlocal proximo, total
+        concluidos.add(indice)
+        while proximo in concluidos:
+            proximo += 1
+        indice_noticias.gravar_pontuacoes(pontuacoes, ate=blocos[proximo - 1][1] if proximo else None)
+        total += len(pontuacoes)
+        decorrido = time.perf_counter() - comeco
+        print(f"  bloco {len(concluidos)}/{len(blocos)}: {total:,} notícias "
+              f"({total / decorrido:,.0f} notícias/s)", flush=True)
+
+    if processos <= 1:
+        for i, (a, b) in enumerate(blocos):
+            registrar(i, pontuar_bloco(str(caminho), a, b))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {executor.submit(pontuar_bloco, str(caminho), a, b): i for i, (a, b) in enumerate(blocos)}
+            try:
+                pendentes = set(futuros)
+                while pendentes:
+                    prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        registrar(futuros[futuro], futuro.result())
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    decorrido = time.perf_counter() - comeco
+    return {
+        "blocos": len(blocos),
+        "noticias": total,
+        "segundos": decorrido,
+        "noticias_por_segundo": total / decorrido if decorrido > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontuação de sentimento das notícias locais em lote")
+    parser.add_argument("--processos", type=int, default=None, help="Tamanho do pool (padrão: nº de CPUs)")
+    parser.add_argument("--bloco-mb", type=float, default=BLOCO_BYTES / 2 ** 20, help="Tamanho de cada bloco (MB)")
+    parser.add_argument("--sem-ingestao", action="store_true", help="Não lê novos dumps de data/noticias/")
+    args = parser.parse_args()
+
+    if not args.sem_ingestao:
+        inicio = time.perf_counter()
+        novas = ingerir_noticias()
+        print(f"Ingestão: {novas:,} notícias novas em {time.perf_counter() - inicio:.1f}s")
+
+    try:
+        resultado = pontuar_em_lote(args.processos, int(args.bloco_mb * 2 ** 20))
+    except KeyboardInterrupt:
+        print("\nInterrompido: rode de novo para continuar de onde parou")
+        raise SystemExit(130)
+    print(f"Pontuação: {resultado['noticias']:,} notícias em {resultado['blocos']} blocos, "
+          f"{resultado['segundos']:.1f}s = {resultado['noticias_por_segundo']:,.0f} notícias/s")
+
+    inicio = time.perf_counter()
+    indexadas = indice_noticias.atualizar()
+    print(f"Índice e agregados: {indexadas:,} notícias em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Servidor HTTP local do motor de cálculo (JSON, só biblioteca padrão)
+
+    python -m engine.servidor --porta 8765
+
+Rotas:
+    GET  /saude             -> {"status": "ok"}
+    POST /analisar          -> análise completa (engine.analisar)
+         corpo: {"caminho": "carteira.csv"} ou {"csv": "<conteúdo>"}, mais
+         opcionais horizonte, estrategia, atualizar_dados, usar_precos_atuais
+    POST /sugestao          -> {"renda": 700.0, "metas": {...}} (sem metas usa config/regras.yaml)
+
+`caminho` é relativo a data/ e não pode sair desse diretório
+"""
+import argparse
+import json
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from engine.calculos import analisar, simples, sugestao_por_metas
+
+DIRETORIO_DADOS = Path("data").resolve()
+MAX_CORPO = 5 * 1024 * 1024  # 5 MB
+
+
+def _caminho_seguro(caminho: str) -> Path:
+    """Resolve `caminho` dentro de data/ (erro se apontar para fora)"""
+    resolvido = (DIRETORIO_DADOS / caminho).resolve()
+    if not resolvido.is_relative_to(DIRETORIO_DADOS) or not resolvido.is_file():
+        raise ValueError(f"Arquivo não encontrado em data/: {caminho}")
+    return resolvido
+
+
+def _metas_padrao() -> dict:
+    import yaml
+    with open("config/regras.yaml") as f:
+        return yaml.safe_load(f)["meta_percentual"]
+
+
+def rota_analisar(corpo: dict) -> dict:
+    if "csv" in corpo:
+        conteudo = str(corpo["csv"]).encode("utf-8")
+    elif "caminho" in corpo:
+        conteudo = _caminho_seguro(str(corpo["caminho"])).read_bytes()
+    else:
+        raise ValueError("Informe 'csv' ou 'caminho'")
+    return analisar(
+        conteudo=conteudo,
+        atualizar_dados=bool(corpo.get("atualizar_dados", False)),
+        horizonte=int(corpo.get("horizonte", 60)),
+        estrategia=str(corpo.get("estrategia", "proporcional")),
+        usar_precos_atuais=bool(corpo.get("usar_precos_atuais", False)),
+    )
+
+
+def rota_sugestao(corpo: dict) -> dict:
+    if "renda" not in corpo:
+        raise ValueError("Informe 'renda'")
+    metas = corpo.get("metas") or _metas_padrao()
+    return {"sugestao": sugestao_por_metas(float(corpo["renda"]), metas)}
+
+
+ROTAS_POST = {
+    "/analisar": rota_analisar,
+    "/sugestao": rota_sugestao,
+}
+
+
+class Manipulador(BaseHTTPRequestHandler):
+    server_version = "FIIAssistente/1.0"
+
+    def _responder(self, status: HTTPStatus, dados: dict):
+        corpo = json.dumps(simples(dados), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path == "/saude":
+            self._responder(HTTPStatus.OK, {"status": "ok"})
+        else:
+            self._responder(HTTPStatus.NOT_FOUND, {"erro": f"Rota inexistente: {self.path}"})
+
+    def do_POST(self):
+        rota = ROTAS_POST.get(self.path)
+        if rota is None:
+            self._responder(HTTPStatus.NOT_FOUND, {"erro": f"Rota inexistente: {self.path}"})
+            return
+
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho > MAX_CORPO:
+            self._responder(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erro": "Corpo muito grande"})
+            return
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+            if not isinstance(corpo, dict):
+                raise ValueError("O corpo deve ser um objeto JSON")
+            self._responder(HTTPStatus.OK, rota(corpo))
+        except (ValueError, KeyError, TypeError) as e:  # JSONDecodeError é ValueError
+            self._responder(HTTPStatus.BAD_REQUEST, {"erro": str(e)})
+        except Exception as e:
+            self._responder(HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor JSON do motor de cálculo da carteira")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), Manipulador)
+    print(f"Servindo em http://{args.host}:{args.porta} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Formatação das tabelas do dashboard
+Os dados continuam numéricos: R$ e % são aplicados de forma declarativa via
+st.column_config (no navegador). Quando strings são realmente necessárias
+(ex: tabela com tipos misturados), a formatação é vetorizada por coluna
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Separador de milhar aplicado só na parte inteira
+_SEPARADOR_MILHAR = r"\B(?=(\d{3})+$)"
+
+
+# -------------------------------------------------
+# column_config (dados numéricos)
+# -------------------------------------------------
+def coluna_brl(rotulo: str, **kwargs):
+    """
+    Coluna monetária com separador de milhar: 1,234.56 (negativos entre parênteses)
+
+    O formato "accounting" não aceita prefixo (e o printf do navegador não tem
+    separador de milhar), então o "R$" vai no rótulo
+    """
+    if "R$" not in rotulo:
+        rotulo = f"{rotulo} (R$)"
+    return st.column_config.NumberColumn(rotulo, format="accounting", **kwargs)
+
+
+def coluna_pct(rotulo: str, casas: int = 2, **kwargs):
+    """Coluna percentual para valores já em % (ex: 1.23 -> 1.23%)"""
+    return st.column_config.NumberColumn(rotulo, format=f"%.{casas}f%%", **kwargs)
+
+
+def coluna_qtd(rotulo: str, **kwargs):
+    """Coluna de quantidade inteira"""
+    return st.column_config.NumberColumn(rotulo, format="%.0f", **kwargs)
+
+
+def coluna_texto(rotulo: str, **kwargs):
+    return st.column_config.TextColumn(rotulo, **kwargs)
+
+
+_CONSTRUTORES = {
+    "brl": coluna_brl,
+    "pct": coluna_pct,
+    "qtd": coluna_qtd,
+    "texto": coluna_texto,
+}
+
+
+def configurar_colunas(formatos: Dict[str, tuple]) -> Dict:
+    """
+    Monta o column_config a partir de {coluna: (tipo, rótulo)}
+
+    Tipos: "brl", "pct", "qtd", "texto"
+    """
+    return {
+        coluna: _CONSTRUTORES[tipo](rotulo)
+        for coluna, (tipo, rotulo) in formatos.items()
+    }
+
+
+def exibir_tabela(df: pd.DataFrame, formatos: Dict[str, tuple], **kwargs):
+    """st.dataframe com as colunas de `formatos` (na ordem dada), sem converter para string"""
+    st.dataframe(
+        df[list(formatos)],
+        column_config=configurar_colunas(formatos),
+        use_container_width=True,
+        hide_index=True,
+        **kwargs
+    )
+
+
+# -------------------------------------------------
+# Strings vetorizadas (quando realmente necessárias)
+# -------------------------------------------------
+def formatar_numero(valores, casas: int = 2, prefixo: str = "", sufixo: str = "",
+                    milhar: bool = True) -> pd.Series:
+    """Formata uma série numérica inteira de uma vez (sem lambda por célula)"""
+    serie = pd.Series(valores, dtype=float)
+    texto = pd.Series(np.char.mod(f"%.{casas}f", serie.to_numpy()), index=serie.index)
+
+    if milhar:
+        partes = texto.str.partition(".")
+        texto = partes[0].str.replace(_SEPARADOR_MILHAR, ",", regex=True) + partes[1] + partes[2]
+
+    return prefixo + texto + sufixo
+
+
+def formatar_brl(valores) -> pd.Series:
+    return formatar_numero(valores, casas=2, prefixo="R$ ")
+
+
+def formatar_pct(valores, casas: int = 2) -> pd.Series:
+    return formatar_numero(valores, casas=casas, sufixo="%", milhar=False)
+
+
+def formatar_qtd(valores) -> pd.Series:
+    return formatar_numero(valores, casas=0, milhar=False)
+
+
+_FORMATADORES = {
+    "brl": formatar_brl,
+    "pct": formatar_pct,
+    "qtd": formatar_qtd,
+    "texto": lambda valores: pd.Series(valores).astype(str),
+}
+
+
+def formatar_colunas(df: pd.DataFrame, formatos: Dict[str, str]) -> pd.DataFrame:
+    """Versão em texto de df, formatando cada coluna de {coluna: tipo} de forma vetorizada"""
+    return pd.DataFrame({
+        coluna: _FORMATADORES[tipo](df[coluna]).to_numpy()
+        for coluna, tipo in formatos.items()
+    }, index=df.index)
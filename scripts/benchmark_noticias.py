@@ -0,0 +1,104 @@
+"""
+Benchmark do casamento de palavras-chave de sentimento (core/news_analyzer.py)
+
+Gera artigos sintéticos (texto em português com termos do léxico espalhados,
+com e sem acento, no plural e dentro de outras palavras) e mede artigos/s de:
+  - por palavra: um `in` por termo sobre o texto em minúsculas (abordagem anterior)
+  - compilado: LexicoSentimento, uma regex compilada e uma passada por documento
+
+Com --termos N o léxico é ampliado com termos sintéticos até N, para ver como
+cada abordagem escala com o tamanho do léxico.
+
+Uso:
+    python scripts/benchmark_noticias.py
+    python scripts/benchmark_noticias.py --artigos 50000 --palavras 400
+    python scripts/benchmark_noticias.py --termos 24 100 400
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from core.news_analyzer import PALAVRAS_NEGATIVAS, PALAVRAS_POSITIVAS, LexicoSentimento  # noqa: E402
+
+VOCABULARIO = (
+    "o fundo imobiliário informou aos cotistas que a gestora concluiu a revisão do portfólio "
+    "com imóveis em São Paulo e no Rio de Janeiro e contratos atípicos de longo prazo "
+    "distribuição mensal por cota fato relevante assembleia emissão amortização CRI IPCA CDI "
+    "galpões lajes shopping centers locatários mercado secundário cotação patrimônio líquido"
+).split()
+# Formas que aparecem em notícias reais: sem acento, plural, maiúsculas, dentro de outra palavra
+_VARIACOES = (str, str.upper, lambda t: t + "s", lambda t: t.replace("ã", "a").replace("ç", "c"),
+              lambda t: t + "mente")
+
+
+def gerar_artigos(quantidade: int, palavras: int, termos, semente: int = 42):
+    """Artigos sintéticos com ~5% das palavras vindas do léxico"""
+    aleatorio = random.Random(semente)
+    termos = list(termos)
+    artigos = []
+    for _ in range(quantidade):
+        texto = []
+        for _ in range(palavras):
+            if aleatorio.random() < 0.05:
+                texto.append(aleatorio.choice(_VARIACOES)(aleatorio.choice(termos)))
+            else:
+                texto.append(aleatorio.choice(VOCABULARIO))
+        artigos.append(" ".join(texto))
+    return artigos
+
+
+def lexico_ampliado(quantidade: int):
+    """(positivas, negativas) do léxico atual completado com termos sintéticos"""
+    positivas, negativas = list(PALAVRAS_POSITIVAS), list(PALAVRAS_NEGATIVAS)
+    i = 0
+    while len(positivas) + len(negativas) < quantidade:
+        (positivas if i % 2 else negativas).append(f"termo{i:04d}")
+        i += 1
+    return positivas, negativas
+
+
+def contar_por_palavra(texto: str, positivas, negativas):
+    """Abordagem anterior: uma busca de substring por termo"""
+    texto = texto.lower()
+    return (sum(1 for palavra in positivas if palavra in texto),
+            sum(1 for palavra in negativas if palavra in texto))
+
+
+def medir(funcao, artigos) -> float:
+    """Artigos por segundo"""
+    inicio = time.perf_counter()
+    for artigo in artigos:
+        funcao(artigo)
+    return len(artigos) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artigos", type=int, default=20000, help="Quantidade de artigos sintéticos")
+    parser.add_argument("--palavras", type=int, default=300, help="Palavras por artigo")
+    parser.add_argument("--termos", type=int, nargs="+", default=[24, 100, 400],
+                        help="Tamanhos de léxico a medir (o atual tem 24 termos)")
+    args = parser.parse_args()
+
+    print(f"{'termos':>7} {'por palavra':>14} {'compilado':>14} {'compilação':>11}")
+    for quantidade in args.termos:
+        positivas, negativas = lexico_ampliado(quantidade)
+        artigos = gerar_artigos(args.artigos, args.palavras, positivas + negativas)
+
+        inicio = time.perf_counter()
+        lexico = LexicoSentimento(positivas, negativas)
+        compilacao = time.perf_counter() - inicio
+
+        por_palavra = medir(lambda t: contar_por_palavra(t, positivas, negativas), artigos)
+        compilado = medir(lexico.contar, artigos)
+        print(f"{len(positivas) + len(negativas):>7} {por_palavra:>10,.0f} a/s {compilado:>10,.0f} a/s "
+              f"{compilacao * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
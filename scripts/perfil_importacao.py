@@ -0,0 +1,82 @@
+"""
+Perfil de tempo de importação (cold start)
+
+Extrai os imports do cabeçalho dos arquivos informados (os que rodam antes do
+primeiro comando do script, ou seja, antes de qualquer renderização) e os executa
+em um processo Python novo com `-X importtime`, reportando o tempo total e os
+módulos mais caros. Não executa o restante do arquivo (ex: worker.py envia email)
+
+Uso:
+    python scripts/perfil_importacao.py app.py worker.py
+    python scripts/perfil_importacao.py app.py --top 25
+    python scripts/perfil_importacao.py app.py --todos   # inclui imports tardios de nível de módulo
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def imports_de_nivel_superior(caminho: Path, todos: bool = False) -> str:
+    """
+    Código com apenas os import/from-import do nível superior do arquivo
+
+    Por padrão para no primeiro comando que não seja import ou expressão solta
+    (ex: sys.path.append); com todos=True inclui também os imports posteriores
+    """
+    arvore = ast.parse(caminho.read_text(encoding="utf-8"))
+    linhas = []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            linhas.append(ast.unparse(no))
+        elif not isinstance(no, ast.Expr) and not todos:
+            break
+    return "\n".join(linhas)
+
+
+def medir(codigo: str):
+    """Executa `codigo` com -X importtime; retorna (total_us, [(cumulativo_us, modulo)])"""
+    env = {**os.environ, "PYTHONPATH": str(RAIZ)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    modulos = []
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        # Apenas módulos de nível superior (sem indentação) somam no total
+        if not nome.startswith("  "):
+            modulos.append((int(cumulativo), nome.strip()))
+
+    total = sum(c for c, _ in modulos)
+    return total, sorted(modulos, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivos", nargs="+", help="Arquivos .py a analisar (ex: app.py worker.py)")
+    parser.add_argument("--top", type=int, default=15, help="Quantidade de módulos mais caros a listar")
+    parser.add_argument("--todos", action="store_true", help="Inclui imports de nível de módulo após o cabeçalho")
+    args = parser.parse_args()
+
+    for arquivo in args.arquivos:
+        codigo = imports_de_nivel_superior(RAIZ / arquivo, args.todos)
+        total, modulos = medir(codigo)
+
+        escopo = "de nível de módulo" if args.todos else "do cabeçalho"
+        print(f"\n=== {arquivo}: {total / 1000:.0f} ms em imports {escopo} ===")
+        for cumulativo, nome in modulos[:args.top]:
+            print(f"  {cumulativo / 1000:8.1f} ms  {nome}")
+
+
+if __name__ == "__main__":
+    main()
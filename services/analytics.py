@@ -1,17 +1,18 @@
-import yfinance as yf
+from core.market_data import obter_preco_atual, calcular_dy_atual
+
 
 def calcular_renda(carteira):
     renda = 0
 
     for _, row in carteira.iterrows():
-        ticker = row["ticker"] + ".SA"
+        ticker = row["ticker"]
         qtd = row["quantidade"]
 
-        ativo = yf.Ticker(ticker)
-        info = ativo.info
-
-        dy = info.get("dividendYield") or 0
-        preco = ativo.history(period="1d")["Close"].iloc[-1]
+        # Cotação e DY passam pelo cache compartilhado (reaproveita buscas do app)
+        dy = (calcular_dy_atual(ticker) or 0) / 100
+        preco = obter_preco_atual(ticker)
+        if preco is None:
+            raise ValueError(f"Sem cotação para {ticker}")
 
         renda += qtd * preco * dy / 12
 
@@ -1,8 +1,5 @@
-def sugestao_reinvestimento(dividendo, regras):
-    total = sum(regras.values())
-    sugestao = {}
+from engine import sugestao_por_metas
 
-    for ativo, peso in regras.items():
-        sugestao[ativo] = round(dividendo * (peso / total), 2)
 
-    return sugestao
+def sugestao_reinvestimento(dividendo, regras):
+    return sugestao_por_metas(dividendo, regras)
@@ -231,5 +231,21 @@ class SimpleAuth:
         if st.sidebar.button("🚪 Logout", type="secondary"):
             self.logout()
 
-# Instância global do autenticador simples
-simple_auth = SimpleAuth()
\ No newline at end of file
+# Instância global do autenticador simples, criada no primeiro uso
+# (importar o módulo não exige AUTH_PASSWORD nem sessão do Streamlit)
+_instancia = None
+
+
+def obter_autenticador() -> SimpleAuth:
+    """Retorna o autenticador global, criando-o na primeira chamada"""
+    global _instancia
+    if _instancia is None:
+        _instancia = SimpleAuth()
+    return _instancia
+
+
+def __getattr__(nome):
+    # Compatibilidade: `from simple_auth import simple_auth`
+    if nome == "simple_auth":
+        return obter_autenticador()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
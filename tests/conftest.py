@@ -0,0 +1,17 @@
+"""
+Fixtures comuns: caches isolados por teste (nada é lido nem gravado em data/cache)
+"""
+import pytest
+
+from core import shared_cache
+from core.memory_cache import cache_memoria
+
+
+@pytest.fixture(autouse=True)
+def caches_isolados(tmp_path, monkeypatch):
+    """Cache compartilhado num SQLite temporário e cache em memória vazio"""
+    monkeypatch.setattr(shared_cache, "cache_compartilhado",
+                        shared_cache.CacheCompartilhado(tmp_path / "compartilhado.sqlite"))
+    cache_memoria.limpar()
+    yield
+    cache_memoria.limpar()
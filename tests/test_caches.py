@@ -0,0 +1,67 @@
+"""
+Caches em memória e compartilhado (SQLite): despejo LRU dentro do orçamento de bytes
+"""
+import pytest
+
+from core import shared_cache
+from core.memory_cache import CacheMemoria, tamanho_em_bytes
+from core.shared_cache import CacheCompartilhado
+
+VALOR = b"x" * 1000
+
+
+def test_memoria_despeja_o_menos_usado():
+    cache = CacheMemoria(max_bytes=tamanho_em_bytes(VALOR) * 2)
+    cache.gravar("ns", "a", VALOR)
+    cache.gravar("ns", "b", VALOR)
+    assert cache.obter("ns", "a") == VALOR  # "b" passa a ser o menos usado
+    cache.gravar("ns", "c", VALOR)
+
+    assert cache.obter("ns", "b") is None
+    assert cache.obter("ns", "a") == VALOR and cache.obter("ns", "c") == VALOR
+    assert cache.bytes == tamanho_em_bytes(VALOR) * 2
+    assert cache.despejos["ns"] == 1
+
+
+def test_memoria_recusa_valor_maior_que_o_orcamento_e_expira_ttl():
+    cache = CacheMemoria(max_bytes=100)
+    assert not cache.gravar("ns", "grande", VALOR)
+    assert cache.gravar("ns", "curto", 1, ttl=0)
+    assert cache.obter("ns", "curto", "ausente") == "ausente"
+    assert cache.bytes == 0
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """time.time controlado (último acesso determinístico)"""
+    agora = [1_000_000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: agora[0])
+    return agora
+
+
+def test_compartilhado_despeja_o_menos_acessado(tmp_path, relogio):
+    cache = CacheCompartilhado(tmp_path / "c.sqlite", max_bytes=2500)
+    cache.gravar("ns", "a", VALOR)
+    relogio[0] += 1
+    cache.gravar("ns", "b", VALOR)
+    relogio[0] += shared_cache.INTERVALO_TOQUE + 1
+    assert cache.obter("ns", "a") == VALOR  # toque: "b" passa a ser o menos acessado
+    cache.gravar("ns", "c", VALOR)
+
+    assert cache.obter("ns", "b") is None
+    assert cache.obter("ns", "a") == VALOR and cache.obter("ns", "c") == VALOR
+
+
+def test_compartilhado_total_de_bytes_acompanha_as_escritas(tmp_path):
+    cache = CacheCompartilhado(tmp_path / "c.sqlite")
+    cache.gravar("ns", "a", VALOR)
+    cache.gravar("ns", "a", VALOR * 2)  # upsert
+    cache.gravar("outro", "b", VALOR)
+    cache.limpar("outro")
+
+    conexao = cache._conexao()
+    total = conexao.execute("SELECT valor FROM meta WHERE chave = 'bytes'").fetchone()[0]
+    assert total == conexao.execute("SELECT SUM(tamanho) FROM entradas").fetchone()[0]
+
+    # Outro processo (outra instância no mesmo arquivo) enxerga as entradas
+    assert CacheCompartilhado(tmp_path / "c.sqlite").obter("ns", "a") == VALOR * 2
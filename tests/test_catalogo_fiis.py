@@ -0,0 +1,51 @@
+"""
+Catálogo de FIIs: buscas só para os desatualizados, falhas também esperam IDADE_MAXIMA
+"""
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from core import catalogo_fiis, market_data
+
+
+@pytest.fixture
+def catalogo(tmp_path, monkeypatch):
+    """Catálogo vazio em tmp_path; devolve o contador de buscas (tickers em `falhas` levantam erro)"""
+    monkeypatch.setattr(catalogo_fiis, "ARQUIVO_BASE", tmp_path / "base.csv")
+    monkeypatch.setattr(catalogo_fiis, "ARQUIVO_CATALOGO", tmp_path / "catalogo.parquet")
+    monkeypatch.setattr(catalogo_fiis, "_carregado", None)
+    buscas = Counter()
+    falhas = {"ZZZA11"}
+
+    def buscar(ticker):
+        buscas[ticker] += 1
+        if ticker in falhas:
+            raise ConnectionError("sem rede")
+        return {"Cotas_Emitidas": 1e6, "VP_Cota": 100.0, "DY_Anual": 0.12, "Preco": 98.0, "Nome": ticker}
+
+    monkeypatch.setattr(catalogo_fiis, "_buscar_metadados", buscar)
+    return buscas
+
+
+def test_falha_registrada_nao_e_rebuscada(catalogo):
+    assert catalogo_fiis.atualizar_catalogo(["HGLG11", "ZZZA11"]) == 1
+    assert catalogo_fiis.atualizar_catalogo(["HGLG11", "ZZZA11"]) == 0
+    assert catalogo == {"HGLG11": 1, "ZZZA11": 1}
+
+    atual = catalogo_fiis.carregar_catalogo()
+    assert atual.valor("ZZZA11", "Atualizado_Em") is None
+    assert atual.valor("ZZZA11", "Buscado_Em") is not None
+    assert atual.desatualizados(["HGLG11", "ZZZA11"]) == []
+
+    depois = datetime.now() + catalogo_fiis.IDADE_MAXIMA * 2
+    assert atual.desatualizados(["HGLG11", "ZZZA11"], agora=depois) == ["HGLG11", "ZZZA11"]
+
+
+def test_dy_atual_so_le_o_catalogo(catalogo):
+    assert market_data.calcular_dy_atual("HGLG11") is None
+    assert not catalogo
+
+    catalogo_fiis.atualizar_catalogo(["HGLG11"])
+    assert market_data.calcular_dy_atual("HGLG11") == pytest.approx(12.0)
+    assert catalogo == {"HGLG11": 1}
@@ -0,0 +1,58 @@
+"""
+Gráficos: redução LTTB e esqueletos em cache (não alterados pelas figuras montadas a partir deles)
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+import charts
+
+
+def test_figura_nao_altera_o_esqueleto():
+    nomes = ("Carteira", "SELIC")
+    esqueleto = charts._esqueleto_benchmarks(nomes, "plotly_dark", False)
+    original = copy.deepcopy(esqueleto)
+
+    fig = charts.grafico_benchmarks(np.arange(12), {nome: np.arange(12.0) for nome in nomes})
+    fig.update_layout(title="Outro")
+    fig.data[0].line.color = "#000000"
+
+    assert esqueleto == original
+    assert fig.data[1].y.tolist() == list(range(12))
+
+
+def test_series_longas_usam_webgl_e_sao_reduzidas():
+    n = charts.PONTOS_MAX * 3
+    df = pd.DataFrame({
+        "Mês": np.arange(n),
+        "Renda Mensal Projetada": np.sin(np.arange(n) / 50),
+        "Patrimônio Projetado": np.arange(n, dtype=float),
+    })
+    fig = charts.grafico_crescimento(df)
+
+    assert all(trace.type == "scattergl" for trace in fig.data)
+    assert all(len(trace.x) == charts.PONTOS_MAX for trace in fig.data)
+
+
+def test_lttb_mantem_extremos_e_picos():
+    n = 10_000
+    x = np.arange(n)
+    y = np.sin(x / 300)
+    y[4321] = 50.0  # pico isolado
+
+    indices = charts.lttb(x, y, limite=200)
+
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+
+def test_lttb_series_curtas_e_datas():
+    assert charts.lttb(np.arange(10), np.arange(10), limite=50).tolist() == list(range(10))
+
+    datas = pd.date_range("2020-01-01", periods=5000, freq="D").to_numpy()
+    x, y = charts.reduzir_serie(datas, np.arange(5000.0), limite=100)
+    assert len(x) == 100 and x.dtype == datas.dtype
+    assert x[0] == datas[0] and x[-1] == datas[-1]
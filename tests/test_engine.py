@@ -0,0 +1,43 @@
+"""
+engine.analisar: resultado em dados simples (JSON)
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from core import carteira_cache, risco
+
+CARTEIRA = b"""Ticker,Quantidade,Preco_Medio,Dividendo_Mensal
+HGLG11,10,160.00,1.10
+KNCR11,50,100.00,1.05
+MXRF11,300,10.00,0.10
+"""
+
+
+@pytest.fixture
+def historico(tmp_path, monkeypatch):
+    """Artefatos num diretório temporário e fechamentos sintéticos no lugar do histórico local"""
+    monkeypatch.setattr(carteira_cache, "DIRETORIO_CACHE", tmp_path)
+
+    def precos_falsos(tickers):
+        datas = pd.bdate_range(end="2026-10-16", periods=120)
+        gerador = np.random.default_rng(7)
+        return pd.DataFrame({
+            ticker: 100 * np.cumprod(1 + gerador.normal(0, 0.01, len(datas)))
+            for ticker in dict.fromkeys(tickers)
+        }, index=datas)
+
+    monkeypatch.setattr(risco, "carregar_precos", precos_falsos)
+
+
+def test_risco_por_ativo_mantem_o_ticker(historico):
+    resultado = engine.analisar(conteudo=CARTEIRA)
+
+    ativos = resultado["risco"]["ativos"]
+    assert [linha["Ticker"] for linha in ativos] == ["HGLG11", "KNCR11", "MXRF11"]
+    assert all(linha["Volatilidade (% a.a.)"] > 0 for linha in ativos)
+    assert set(resultado["risco"]["covariancia"]) == {"HGLG11", "KNCR11", "MXRF11"}
+    json.dumps(resultado)  # tudo serializável
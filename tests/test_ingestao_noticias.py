@@ -0,0 +1,58 @@
+"""
+Ingestão de notícias: duplicatas descartadas entre arquivos e execuções, dumps retomados de onde pararam
+"""
+import json
+
+import pytest
+
+from core import indice_noticias
+from core.ingestao_noticias import ingerir_noticias, ler_noticias
+
+RSS = """<?xml version="1.0"?><rss><channel><title>FIIs</title>
+<item><title>HGLG11 anuncia novo contrato</title><description>Vacância baixa no HGLG11</description>
+<pubDate>Mon, 15 Jan 2024 10:00:00 -0300</pubDate></item>
+</channel></rss>"""
+
+
+def linha(titulo: str, conteudo: str) -> str:
+    return json.dumps({"title": titulo, "content": conteudo, "date": "2024-01-17"}) + "\n"
+
+
+@pytest.fixture
+def fontes(tmp_path, monkeypatch):
+    """data/ em tmp_path, com índice próprio; devolve a pasta dos dumps"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(indice_noticias, "indice_noticias", indice_noticias.IndiceNoticias())
+    pasta = tmp_path / "data" / "noticias"
+    pasta.mkdir(parents=True)
+    return pasta
+
+
+def test_duplicatas_entre_arquivos_e_execucoes(fontes):
+    (fontes / "feed.rss").write_text(RSS, encoding="utf-8")
+    (fontes / "dump.jsonl").write_text(
+        linha("HGLG11 anuncia novo contrato", "Vacância baixa no HGLG11") + linha("Alta no IFIX", "mercado"),
+        encoding="utf-8"
+    )
+
+    assert ingerir_noticias() == 2
+    assert ingerir_noticias() == 0
+
+    # Com o índice em dia, duplicatas são encontradas nele (não no arquivo)
+    indice_noticias.indice_noticias.atualizar()
+    (fontes / "outro.jsonl").write_text(linha("Alta no IFIX", "mercado"), encoding="utf-8")
+    assert ingerir_noticias() == 0
+    assert [n["tickers"] for n in ler_noticias()] == [["HGLG11"], []]
+
+
+def test_dump_jsonl_retomado_do_ponto_onde_parou(fontes):
+    dump = fontes / "dump.jsonl"
+    dump.write_text(linha("A", "um") + '{"title": "B", "content": "do', encoding="utf-8")
+    assert ingerir_noticias() == 1  # a linha incompleta fica para depois
+
+    # Trecho já lido alterado no lugar (mesmo tamanho): não é relido
+    dump.write_text(dump.read_text(encoding="utf-8").replace('"A"', '"Z"'), encoding="utf-8")
+    with open(dump, "a", encoding="utf-8") as f:
+        f.write('is"}\n' + linha("C", "tres"))
+    assert ingerir_noticias() == 2
+    assert [n["titulo"] for n in ler_noticias()] == ["A", "B", "C"]
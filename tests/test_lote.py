@@ -0,0 +1,14 @@
+"""
+engine.lote: seleção dos CSVs de carteira
+"""
+from engine.lote import listar_arquivos
+
+
+def test_diretorio_ignora_csvs_que_nao_sao_carteira(tmp_path):
+    (tmp_path / "carteira.csv").write_text("Ticker,Quantidade\nHGLG11,10\n")
+    (tmp_path / "catalogo.csv").write_text("Ticker,Nome,Segmento\nHGLG11,Pátria Log,Logística\n")
+
+    assert listar_arquivos([str(tmp_path)]) == [tmp_path / "carteira.csv"]
+    assert listar_arquivos([str(tmp_path / "*.csv")]) == [tmp_path / "carteira.csv"]
+    # Informado explicitamente: entra (e o erro aparece no resumo)
+    assert listar_arquivos([str(tmp_path / "catalogo.csv")]) == [tmp_path / "catalogo.csv"]
@@ -0,0 +1,64 @@
+"""
+Históricos de mercado: uma busca no Yahoo Finance por símbolo, recortada por janela
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance
+
+from core import market_data
+
+
+class TickerFalso:
+    """yf.Ticker que conta as chamadas de history e devolve pregões sintéticos"""
+    chamadas = Counter()
+
+    def __init__(self, simbolo):
+        self.simbolo = simbolo
+
+    def history(self, period):
+        TickerFalso.chamadas[self.simbolo] += 1
+        dias = int(period.rstrip("d"))
+        datas = pd.bdate_range(end="2026-10-16", periods=dias, tz="America/Sao_Paulo")
+        datas = datas[datas > datas[-1] - pd.Timedelta(days=dias)]
+        fechamento = 100 + np.cumsum(np.random.default_rng(len(self.simbolo)).normal(size=len(datas)))
+        return pd.DataFrame({"Close": fechamento}, index=datas)
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    TickerFalso.chamadas = Counter()
+    monkeypatch.setattr(yfinance, "Ticker", TickerFalso)
+    return TickerFalso.chamadas
+
+
+def test_uma_busca_por_simbolo_para_todas_as_janelas(yahoo):
+    indices = market_data.obter_indices(dias=30)
+    correlacao = market_data.calcular_correlacao_carteira_mercado(["HGLG11"], dias=60)
+    preco = market_data.obter_preco_atual("HGLG11")
+
+    assert yahoo == {"^BVSP": 1, "IFIX.SA": 1, "HGLG11.SA": 1}
+    assert indices["ifix"]["valor"] is not None
+    assert correlacao != 0.0
+    assert preco is not None
+
+
+def test_recortes_respeitam_a_janela(yahoo):
+    completo = market_data._historico("IFIX.SA", market_data.JANELA_HISTORICO)
+    trinta = market_data._historico("IFIX.SA", 30)
+    um = market_data._historico("IFIX.SA", 1)
+
+    assert yahoo["IFIX.SA"] == 1
+    assert trinta.index[0] > completo.index[-1] - pd.Timedelta(days=30)
+    assert trinta.index[-1] == completo.index[-1]
+    assert len(um) == 1 and um["Close"].iloc[-1] == completo["Close"].iloc[-1]
+
+
+def test_janela_maior_que_a_padrao_busca_a_parte(yahoo):
+    market_data._historico("IFIX.SA", 30)
+    longo = market_data._historico("IFIX.SA", 2 * market_data.JANELA_HISTORICO)
+
+    assert yahoo["IFIX.SA"] == 2
+    assert longo.index[0] < longo.index[-1] - pd.Timedelta(days=market_data.JANELA_HISTORICO)
@@ -0,0 +1,64 @@
+"""
+Métricas incrementais e em lote: mesmos valores que PortfolioMetrics calculado do zero
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.metricas_incrementais import MetricasIncrementais
+from core.portfolio_metrics import METRICAS_VETOR, PortfolioMetrics, metricas_lote, tabela_longa
+
+TICKERS = ["BTLG11", "HGLG11", "KNCR11", "MXRF11", "VISC11", "XPML11", "ZZZA11", "ZZZB11"]
+COLUNAS = ["Ticker", "Quantidade", "Preco_Medio", "Dividendo_Mensal"]
+
+
+def posicao(gerador) -> tuple:
+    return (str(gerador.choice(TICKERS)), float(gerador.integers(0, 400)),
+            float(gerador.uniform(8, 160)), float(gerador.uniform(0.02, 1.6)))
+
+
+def assert_mesmo_vetor(obtido, esperado):
+    for nome in METRICAS_VETOR:
+        assert obtido[nome] == pytest.approx(esperado[nome], rel=1e-9, abs=1e-9), nome
+
+
+def test_edicoes_incrementais_iguais_ao_recalculo():
+    gerador = np.random.default_rng(7)
+    df = pd.DataFrame([posicao(gerador) for _ in range(30)], columns=COLUNAS)
+    df = df[df["Quantidade"] > 0]
+    modelo = MetricasIncrementais.da_carteira(df)
+
+    for passo in range(300):
+        chave = int(gerador.integers(0, 40))
+        if chave in modelo and gerador.random() < 0.2:
+            modelo.remover(chave)
+            df = df.drop(index=chave)
+        else:
+            linha = posicao(gerador)  # quantidade 0 remove a posição
+            modelo.definir(chave, *linha)
+            if linha[1] > 0:
+                df.loc[chave, COLUNAS] = linha
+            else:
+                df = df.drop(index=chave, errors="ignore")
+
+        if passo % 25 == 0 and len(df):
+            completo = PortfolioMetrics.calcular(df.astype({c: float for c in COLUNAS[1:]}))
+            assert len(modelo) == len(df)
+            assert_mesmo_vetor(modelo.vetor(), completo.vetor())
+            assert sorted(modelo.tickers_subperformantes) == sorted(completo.tickers_subperformantes)
+
+
+def test_metricas_lote_iguais_a_cada_carteira():
+    gerador = np.random.default_rng(11)
+    carteiras = {}
+    for i in range(25):
+        linhas = [posicao(gerador) for _ in range(gerador.integers(1, 12))]
+        df = pd.DataFrame(linhas, columns=COLUNAS)
+        df["Quantidade"] += 1
+        carteiras[f"c{i}"] = PortfolioMetrics.calcular(df)
+
+    lote = metricas_lote(tabela_longa({nome: m.frame for nome, m in carteiras.items()}))
+
+    assert list(lote.index) == list(carteiras)
+    for nome, m in carteiras.items():
+        assert_mesmo_vetor(lote.loc[nome], m.vetor())
@@ -0,0 +1,65 @@
+"""
+Motor de regras: mesma resposta para uma carteira (escalares) e para o lote (arrays)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.carteira_health import analisar_saude_lote, analisar_saude_valores
+from core.portfolio_metrics import PortfolioMetrics, tabela_longa
+from core.regras_saude import carregar_regras, compilar_expressao, compilar_regras
+
+TICKERS = ["BTLG11", "HGLG11", "KNCR11", "MXRF11", "VISC11", "XPML11", "ZZZA11", "ZZZB11"]
+
+
+def carteiras_aleatorias(quantidade: int, semente: int = 3):
+    gerador = np.random.default_rng(semente)
+    carteiras = {}
+    for i in range(quantidade):
+        tickers = gerador.choice(TICKERS, size=gerador.integers(1, len(TICKERS) + 1), replace=False)
+        carteiras[f"c{i}"] = pd.DataFrame({
+            "Ticker": tickers,
+            "Quantidade": gerador.integers(1, 500, len(tickers)).astype(float),
+            "Preco_Medio": gerador.uniform(8, 160, len(tickers)),
+            "Dividendo_Mensal": gerador.uniform(0.02, 1.6, len(tickers)),
+        })
+    return carteiras
+
+
+def test_bool_op_mistura_array_e_escalar():
+    avaliar = compilar_expressao("num_ativos > 0 and volatilidade_anual > 20")
+    resultado = avaliar({"num_ativos": np.array([1, 2, 3]), "volatilidade_anual": float("nan")})
+    assert resultado.tolist() == [False, False, False]
+
+    avaliar = compilar_expressao("num_ativos > 2 or volatilidade_anual > 20 or hhi > 5000")
+    resultado = avaliar({"num_ativos": np.array([1, 2, 3]), "volatilidade_anual": 25.0, "hhi": np.zeros(3)})
+    assert resultado.tolist() == [True, True, True]
+
+
+REGRAS_MISTAS = compilar_regras({
+    "faixas": [{"minimo": 50, "status": "Boa", "cor": "green"}, {"minimo": 0, "status": "Ruim", "cor": "red"}],
+    "regras": [
+        {"id": "poucos_e_volatil", "grupo": "alertas", "penalidade": 30,
+         "condicao": "num_ativos < 4 and volatilidade_anual > 20", "saida": {"titulo": "x"}},
+        {"id": "poucos_ou_volatil", "grupo": "alertas", "penalidade": 20,
+         "condicao": "num_ativos < 4 or not volatilidade_anual <= 20", "saida": {"titulo": "x"}},
+        {"id": "concentrada", "grupo": "insights",
+         "condicao": "max_concentracao > 40 and (hhi > 3000 or num_ativos == 1)", "saida": {"titulo": "x"}},
+    ],
+})
+
+
+@pytest.mark.parametrize("regras", [REGRAS_MISTAS, carregar_regras()], ids=["mistas", "yaml"])
+def test_lote_igual_a_carteira_individual(regras):
+    carteiras = carteiras_aleatorias(40)
+    metricas = {nome: PortfolioMetrics.calcular(df) for nome, df in carteiras.items()}
+    lote = analisar_saude_lote(tabela_longa({nome: m.frame for nome, m in metricas.items()}), regras)
+
+    for nome, m in metricas.items():
+        individual = analisar_saude_valores(m.vetor(), regras)
+        disparos = regras.avaliar(m.vetor())
+        for regra in regras.regras:
+            assert bool(lote.loc[nome, regra.id]) == bool(disparos[regra.id]), (nome, regra.id)
+        assert lote.loc[nome, "score"] == individual["score"]
+        assert lote.loc[nome, "status"] == individual["status"]
+    assert pd.api.types.is_integer_dtype(lote["score"])
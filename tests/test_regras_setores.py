@@ -0,0 +1,39 @@
+"""
+Regras de setor com fundos fora do catálogo (config/regras_saude.yaml)
+"""
+import pandas as pd
+
+from core.carteira_health import gerar_recomendacoes
+from core.metricas_incrementais import MetricasIncrementais
+from core.portfolio_metrics import PortfolioMetrics, metricas_lote
+
+
+def carteira(*posicoes):
+    return pd.DataFrame(posicoes, columns=["Ticker", "Quantidade", "Preco_Medio", "Dividendo_Mensal"])
+
+
+# BTLG11 classificado (10% do patrimônio); ZZZA11/ZZZB11 fora do catálogo
+POUCO_CLASSIFICADA = carteira(("BTLG11", 10, 100.0, 0.8), ("ZZZA11", 45, 100.0, 0.9), ("ZZZB11", 45, 100.0, 0.9))
+
+
+def titulos(df):
+    return {r["titulo"] for r in gerar_recomendacoes(df)}
+
+
+def test_carteira_pouco_classificada_nao_pede_diversificar_segmentos():
+    assert "Diversificar Segmentos" not in titulos(POUCO_CLASSIFICADA)
+    assert "Classificar Fundos" in titulos(POUCO_CLASSIFICADA)
+
+
+def test_carteira_classificada_em_um_segmento_pede_diversificar():
+    df = carteira(("BTLG11", 10, 100.0, 0.8), ("HGLG11", 10, 100.0, 0.8))
+    assert "Diversificar Segmentos" in titulos(df)
+    assert "Classificar Fundos" not in titulos(df)
+
+
+def test_pct_classificado_igual_nos_tres_calculos():
+    m = PortfolioMetrics.calcular(POUCO_CLASSIFICADA)
+    tabela = m.frame.assign(Carteira="a")
+    assert m.pct_classificado == 10.0
+    assert metricas_lote(tabela).loc["a", "pct_classificado"] == 10.0
+    assert MetricasIncrementais.da_carteira(POUCO_CLASSIFICADA).vetor()["pct_classificado"] == 10.0
@@ -7,7 +7,6 @@ import os
 import pandas as pd
 from pathlib import Path
 from typing import Optional, Dict, Any
-import streamlit as st
 from datetime import datetime
 
 class UserDataManager:
@@ -143,6 +142,7 @@ class UserDataManager:
             with open(config_path, 'w') as f:
                 json.dump(config, f, indent=2)
         except Exception as e:
+            import streamlit as st
             st.error(f"Erro ao salvar configurações: {e}")
     
     def get_reports_history(self) -> list:
@@ -178,6 +178,7 @@ class UserDataManager:
             with open(report_path, 'w') as f:
                 json.dump(report_data, f, indent=2)
         except Exception as e:
+            import streamlit as st
             st.error(f"Erro ao salvar relatório: {e}")
     
     def cleanup_old_files(self, days: int = 30):
@@ -207,7 +208,7 @@ class UserDataManager:
 
 def get_user_data_manager():
     """Retorna o gerenciador de dados do usuário atual (usuário único)"""
-    from simple_auth import simple_auth
-    if simple_auth.is_authenticated():
+    from simple_auth import obter_autenticador
+    if obter_autenticador().is_authenticated():
         return UserDataManager("adriano_main")  # ID fixo para o usuário único
     return None
\ No newline at end of file
@@ -1,16 +1,24 @@
 import yaml
-from services.loader import carregar_carteira
-from services.analytics import calcular_renda
-from services.reinvest import sugestao_reinvestimento
+from engine import analisar, sugestao_por_metas
+from core.carteira_loader import carregar_carteira_csv
+from core.catalogo_fiis import atualizar_catalogo, carregar_catalogo
+from core.ingestao_noticias import ingerir_noticias
 from services.alerts import enviar_email
 
-carteira = carregar_carteira()
-renda = calcular_renda(carteira)
+# Catálogo de FIIs em dia (rebusca só o que passou de IDADE_MAXIMA)
+atualizar_catalogo([*carregar_catalogo().tabela.index, *carregar_carteira_csv()["Ticker"]])
+
+# Notícias novas dos dumps em data/noticias/ (RSS, Atom ou JSONL)
+ingerir_noticias()
+
+# Mesmo motor de cálculo do dashboard (reaproveita o artefato Arrow da carteira, se existir)
+resultado = analisar("data/carteira.csv")
+renda = round(resultado["metricas"]["renda_mensal"], 2)
 
 with open("config/regras.yaml") as f:
     regras = yaml.safe_load(f)["meta_percentual"]
 
-sugestao = sugestao_reinvestimento(renda, regras)
+sugestao = sugestao_por_metas(renda, regras)
 
 mensagem = f"Renda mensal estimada: R$ {renda}\n\nSugestão de reinvestimento:\n"
 